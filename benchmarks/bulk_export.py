@@ -0,0 +1,72 @@
+"""Bulk export benchmark.
+
+Builds a synthetic history and exports all of it in every streaming format,
+reporting throughput and the peak memory allocated during the export
+compared with the size of the history on disk.
+
+    python benchmarks/bulk_export.py --sessions 500 --messages 200 --workers 4
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.chat_history import ChatHistory  # noqa: E402
+
+WORDS = ("the model answer python code function error list data request memory cache thread session "
+         "value return import class window async await query index export archive stream").split()
+
+
+def build_history(storage_dir: str, sessions: int, messages: int, size: int) -> int:
+    history = ChatHistory(storage_dir, journal=False)
+    rng = random.Random(7)
+    for s in range(sessions):
+        history.clear_session()
+        for i in range(messages):
+            words = " ".join(rng.choice(WORDS) for _ in range(size // 6))
+            history.add_message("user" if i % 2 == 0 else "assistant", words)
+        history.save_session(f"bench_{s:05d}", {"model": "mistral"})
+    history.close()
+    return sum(entry.stat().st_size for entry in os.scandir(storage_dir) if entry.name.endswith(".json"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--size", type=int, default=400, help="average message length in characters")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as storage_dir, tempfile.TemporaryDirectory() as out_dir:
+        on_disk = build_history(storage_dir, args.sessions, args.messages, args.size)
+        history = ChatHistory(storage_dir)
+        names = [session["name"] for session in history.list_sessions()]
+        print(f"{len(names)} sessions, {on_disk / 1024 / 1024:.1f} MB of JSON, {args.workers} workers")
+
+        for format, destination in (
+            ("markdown", os.path.join(out_dir, "md")),
+            ("jsonl", os.path.join(out_dir, "history.jsonl")),
+            ("tar", os.path.join(out_dir, "history.tar.gz")),
+            ("zip", os.path.join(out_dir, "history.zip")),
+        ):
+            tracemalloc.start()
+            start = time.perf_counter()
+            report = history.export_sessions(names, format, destination, workers=args.workers)
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(
+                f"  {format:<9} {report['messages'] / elapsed:>9.0f} messages/s  "
+                f"{on_disk / 1024 / 1024 / elapsed:>6.1f} MB/s  peak memory {peak / 1024 / 1024:>5.1f} MB"
+            )
+        history.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""History analytics benchmark.
+
+Saves a synthetic history and compares per-model reply-length and
+latency percentiles computed with a Python loop over every session
+against ``HistoryAnalytics``: the first (cold) column build, an
+incremental refresh after one new message, and the vectorized
+aggregates on the cached columns.
+
+    python benchmarks/history_analytics.py --sessions 200 --messages 200
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.chat_history import ChatHistory  # noqa: E402
+from modules.history_analytics import HistoryAnalytics  # noqa: E402
+
+MODELS = ["mistral", "llama3", "phi3", "gemma"]
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def python_loop(history: ChatHistory):
+    """Per-model reply lengths and latencies, the way get_session_stats would do it"""
+    lengths = defaultdict(list)
+    latencies = defaultdict(list)
+    for session in history.list_sessions():
+        data = history.read_session(session["name"])
+        model = data.get("metadata", {}).get("model")
+        for message in data.get("messages", []):
+            if message["role"] == "assistant":
+                lengths[model].append(len(message["content"]))
+                if "latency_ms" in message:
+                    latencies[model].append(message["latency_ms"])
+    return {
+        model: (statistics.median(lengths[model]), statistics.quantiles(latencies[model], n=20)[-1])
+        for model in lengths
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=200, help="messages per session")
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    with tempfile.TemporaryDirectory() as storage_dir:
+        history = ChatHistory(storage_dir)
+        for s in range(args.sessions):
+            history.current_session = []
+            history.session_name = None
+            for i in range(args.messages):
+                message = {
+                    "role": "user" if i % 2 == 0 else "assistant",
+                    "content": "x" * rng.randint(20, 1500),
+                    "timestamp": f"2024-{1 + s % 12:02d}-{1 + s % 28:02d}T12:{i % 60:02d}:00",
+                }
+                if i % 2:
+                    message["latency_ms"] = int(rng.lognormvariate(7, 0.6))
+                history.current_session.append(message)
+            history.save_session(f"session_{s}", {"model": MODELS[s % len(MODELS)]})
+        total = args.sessions * args.messages
+        print(f"{args.sessions} sessions, {total} messages")
+
+        _, elapsed = timed(lambda: python_loop(history))
+        print(f"  Python loop over every session     {elapsed:>8.1f} ms")
+
+        analytics = HistoryAnalytics(history)
+        _, elapsed = timed(analytics.refresh)
+        print(f"  column build (cold)                {elapsed:>8.1f} ms")
+
+        history.add_message("user", "one more message")
+        analytics = HistoryAnalytics(history)
+        report, elapsed = timed(analytics.refresh)
+        print(f"  incremental refresh from cache     {elapsed:>8.1f} ms  ({report['read']} messages read)")
+
+        _, elapsed = timed(lambda: (analytics.summary(), analytics.per_model(), analytics.per_day()))
+        print(f"  vectorized aggregates              {elapsed:>8.1f} ms")
+        history.close()
+
+
+if __name__ == "__main__":
+    main()
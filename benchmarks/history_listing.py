@@ -0,0 +1,86 @@
+"""Session listing benchmark.
+
+Generates synthetic saved sessions and times ``ChatHistory.list_sessions``
+and ``read_session`` with the JSON file backend (with a cold, warm and
+partly stale session manifest, and in a process that learns of sessions
+another process saved from the change log) and the SQLite backend.
+
+    python benchmarks/history_listing.py --sessions 10000 --messages 20
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.chat_history import ChatHistory  # noqa: E402
+
+MODELS = ("deepseek-coder", "deepseek-r1", "mistral", "llama2")
+
+
+def generate(storage_dir: str, sessions: int, messages: int):
+    """Write ``sessions`` JSON session files with ``messages`` messages each"""
+    os.makedirs(storage_dir, exist_ok=True)
+    for i in range(sessions):
+        name = f"{random.choice(MODELS)}_{i:08d}"
+        body = [
+            {"role": "user" if j % 2 == 0 else "assistant", "content": "lorem ipsum " * random.randint(5, 80),
+             "timestamp": f"2025-01-{1 + i % 28:02d}T12:00:{j % 60:02d}"}
+            for j in range(messages)
+        ]
+        with open(os.path.join(storage_dir, f"chat_{name}.json"), "w", encoding="utf-8") as f:
+            json.dump({"session_name": name, "messages": body, "metadata": {
+                "created_at": f"2025-01-{1 + i % 28:02d}T12:00:00",
+                "last_modified": f"2025-01-{1 + i % 28:02d}T12:{i % 60:02d}:00",
+                "message_count": messages,
+            }}, f, indent=2)
+
+
+def timed(label: str, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"  {label:<28} {(time.perf_counter() - start) * 1000:>10.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=5000)
+    parser.add_argument("--messages", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as storage_dir:
+        print(f"Generating {args.sessions} sessions x {args.messages} messages...")
+        generate(storage_dir, args.sessions, args.messages)
+
+        print("JSON files:")
+        history = ChatHistory(storage_dir)
+        sessions = timed("list_sessions (no manifest)", history.list_sessions)
+        timed("list_sessions (manifest)", ChatHistory(storage_dir).list_sessions)
+        for session in sessions[:10]:
+            history.load_session(session["name"])
+            history.save_session(session["name"])
+        timed("list_sessions (10 changed)", ChatHistory(storage_dir).list_sessions)
+        watcher = ChatHistory(storage_dir)
+        watcher.list_sessions()
+        for session in sessions[10:20]:
+            history.load_session(session["name"])
+            history.save_session(session["name"])
+        timed("list_sessions (change log)", watcher.list_sessions)
+        timed("read_session", lambda: history.read_session(sessions[len(sessions) // 2]["name"]))
+
+        print("SQLite:")
+        history = ChatHistory(storage_dir, backend="sqlite")
+        timed("import (first run)", history.import_json_sessions)
+        timed("import (unchanged)", history.import_json_sessions)
+        sessions = timed("list_sessions", history.list_sessions)
+        timed("read_session", lambda: history.read_session(sessions[len(sessions) // 2]["name"]))
+        history.store.close()
+
+
+if __name__ == "__main__":
+    main()
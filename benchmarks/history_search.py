@@ -0,0 +1,110 @@
+"""Full-text history search benchmark.
+
+Builds a synthetic corpus (1M messages by default) in a temporary FTS5
+index and reports indexing throughput and query latency percentiles for
+word, prefix, phrase and filtered queries against a p95 target. Queries
+rank every match unless ``--window`` limits them to the newest matches.
+
+    python benchmarks/history_search.py --messages 1000000 --target-ms 100 --window 2000
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.history_search import HistorySearch  # noqa: E402
+
+MODELS = ("deepseek-coder", "deepseek-r1", "mistral", "llama2")
+SESSION_SIZE = 20
+
+
+def make_vocabulary(size: int):
+    rng = random.Random(1)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(letters) for _ in range(rng.randint(3, 10))))
+    words = sorted(words)
+    # Zipf-like weights so a few words are very common and most are rare
+    cumulative = list(itertools.accumulate(1 / (rank + 1) for rank in range(size)))
+    return words, cumulative
+
+
+def sessions(count: int, words, cumulative):
+    rng = random.Random(2)
+    # Messages are slices of one pre-sampled word stream; sampling per message dominates otherwise
+    pool = rng.choices(words, cum_weights=cumulative, k=1_000_000)
+    for i in range(count // SESSION_SIZE):
+        day = f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}"
+        messages = []
+        for j in range(SESSION_SIZE):
+            offset = rng.randrange(len(pool) - 60)
+            messages.append({
+                "role": "user" if j % 2 == 0 else "assistant",
+                "content": " ".join(pool[offset:offset + rng.randint(8, 60)]),
+                "timestamp": f"{day}T12:{j:02d}:00",
+            })
+        yield f"session_{i:07d}", messages, MODELS[i % len(MODELS)]
+
+
+def measure(search: HistorySearch, label: str, repeats: int, **query):
+    times = []
+    hits = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        hits = search.search(**query)
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+    print(f"  {label:<34} p50 {statistics.median(times):>7.1f} ms  p95 {p95:>7.1f} ms  ({len(hits)} hits)")
+    return p95
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--vocabulary", type=int, default=50_000)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--target-ms", type=float, default=100.0, help="p95 latency target per query")
+    parser.add_argument("--window", type=int, help="rank only the newest N matches of each query")
+    args = parser.parse_args()
+
+    words, cumulative = make_vocabulary(args.vocabulary)
+    with tempfile.TemporaryDirectory() as directory:
+        search = HistorySearch(os.path.join(directory, "search.db"))
+        start = time.perf_counter()
+        added = search.index_sessions(sessions(args.messages, words, cumulative))
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(search.db_path) / 1024 / 1024
+        print(f"Indexed {added} messages in {elapsed:.1f}s ({added / elapsed:,.0f} messages/s, {size:.0f} MB)")
+
+        common, mid, rare = words[0], words[200], words[20_000 % len(words)]
+        queries = [
+            ("stopword-frequency word", {"query": common}),
+            ("mid-frequency word", {"query": mid}),
+            ("rare word", {"query": rare}),
+            ("two words", {"query": f"{mid} {words[300]}"}),
+            ("prefix", {"query": mid[:3] + "*"}),
+            ("phrase", {"query": f'"{words[0]} {words[1]}"'}),
+            ("word + role filter", {"query": mid, "role": "assistant"}),
+            ("word + model filter", {"query": mid, "model": "mistral"}),
+            ("word + date range", {"query": mid, "since": "2024-06-01", "until": "2024-07-01"}),
+        ]
+        failures = 0
+        for label, query in queries:
+            if measure(search, label, args.repeats, window=args.window, **query) > args.target_ms:
+                failures += 1
+        search.close()
+
+    verdict = "PASS" if not failures else f"FAIL ({failures} queries over target)"
+    print(f"p95 target {args.target_ms:.0f} ms: {verdict}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Paged session loading benchmark.
+
+Saves one large session and compares loading it whole with
+``ChatHistory.load_session`` against opening it with
+``ChatHistory.open_paged``: time to the newest page, random access to
+single messages, and memory allocated.
+
+    python benchmarks/paged_loading.py --messages 20000 --size 1000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.chat_history import ChatHistory  # noqa: E402
+from modules.session_pager import PAGE_SIZE  # noqa: E402
+
+
+def measure(func):
+    """Time one call, then measure peak allocation of a second one (tracing slows it down)"""
+    start = time.perf_counter()
+    result = func()
+    elapsed = (time.perf_counter() - start) * 1000
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--size", type=int, default=1000, help="average message length in characters")
+    parser.add_argument("--journaled", type=int, default=50, help="messages appended through the journal")
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    with tempfile.TemporaryDirectory() as storage_dir:
+        history = ChatHistory(storage_dir)
+        for i in range(args.messages):
+            history.current_session.append({
+                "role": "user" if i % 2 == 0 else "assistant",
+                "content": "x" * rng.randint(args.size // 2, args.size * 3 // 2),
+                "timestamp": f"2024-01-01T00:00:{i % 60:02d}",
+            })
+        history.save_session("large", {"model": "mistral"})
+        for i in range(args.journaled):
+            history.add_message("user", f"journaled message {i}")
+        size = os.path.getsize(os.path.join(storage_dir, "chat_large.json"))
+        total = args.messages + args.journaled
+        print(f"Session with {total} messages ({size / 1024 / 1024:.1f} MB snapshot + journal)")
+
+        reader = ChatHistory(storage_dir)
+        _, elapsed, peak = measure(lambda: reader.load_session("large"))
+        print(f"  load_session (whole file)    {elapsed:>8.1f} ms  peak {peak:>6.1f} MB")
+
+        reader = ChatHistory(storage_dir)
+        pager, elapsed, peak = measure(lambda: reader.open_paged("large").page(0))
+        print(f"  open_paged + newest page     {elapsed:>8.1f} ms  peak {peak:>6.1f} MB  ({PAGE_SIZE} messages)")
+
+        pager = reader.open_paged("large")
+        _, elapsed, peak = measure(lambda: pager.page(50))
+        print(f"  older page (50 pages back)   {elapsed:>8.1f} ms  peak {peak:>6.1f} MB")
+
+        indexes = [rng.randrange(total) for _ in range(1000)]
+        _, elapsed, _ = measure(lambda: [pager[i] for i in indexes])
+        print(f"  random message access        {elapsed / len(indexes) * 1000:>8.1f} us per message")
+        history.close()
+        reader.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Startup import-time report.
+
+Runs imports in fresh interpreters with ``-X importtime`` and prints the
+slowest modules, comparing the lazy speech module against the eager
+imports it used to perform at startup.
+
+    python benchmarks/startup_report.py
+    python benchmarks/startup_report.py --target "import main" --top 30
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S.*)$")
+
+# What modules/speech_module.py imported at module level before lazy loading
+EAGER_SPEECH_IMPORTS = (
+    "for name in ('PyQt6.QtCore', 'numpy', 'pkg_resources', 'TTS.api', 'pyttsx3', 'whisper', 'sounddevice'):\n"
+    "    try:\n"
+    "        __import__(name)\n"
+    "    except ImportError:\n"
+    "        pass\n"
+)
+
+
+def measure(code: str):
+    """Import ``code`` in a fresh interpreter and return (wall seconds, rows, error)"""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+
+    rows = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name.strip(), int(self_us), int(cumulative_us), len(indent) // 2))
+    error = result.stderr.strip().splitlines()[-1] if result.returncode != 0 else None
+    return elapsed, rows, error
+
+
+def report(label: str, code: str, top: int):
+    elapsed, rows, error = measure(code)
+    top_level = [row for row in rows if row[3] <= 1]
+    total_us = sum(row[2] for row in top_level)
+    print(f"\n== {label}: {code.splitlines()[0]!r}")
+    if error:
+        print(f"   import failed: {error}")
+    print(f"   wall time {elapsed * 1000:.0f} ms, import time {total_us / 1000:.0f} ms, {len(rows)} modules")
+    print(f"   {'cumulative':>12} {'self':>10}  module")
+    for name, self_us, cumulative_us, _ in sorted(rows, key=lambda row: row[2], reverse=True)[:top]:
+        print(f"   {cumulative_us / 1000:>9.1f} ms {self_us / 1000:>7.1f} ms  {name}")
+    return total_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", default="import modules.speech_module", help="import statement to profile")
+    parser.add_argument("--top", type=int, default=15, help="number of modules to list")
+    args = parser.parse_args()
+
+    lazy_us = report("Lazy speech module", args.target, args.top)
+    eager_us = report("Eager speech imports (previous behaviour)", EAGER_SPEECH_IMPORTS, args.top)
+
+    print(f"\nStartup import time saved: {(eager_us - lazy_us) / 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Time-to-first-audio benchmark for Coqui TTS.
+
+Synthesizes a multi-paragraph response the way the speech worker does
+with and without sentence pipelining: as a whole (audio starts once the
+entire response is rendered) and sentence by sentence (audio starts once
+the first sentence is rendered). Playback is not included, so the
+numbers are the synthesis wait before anything can be heard. Needs
+Coqui TTS (``pip install TTS``); the model is loaded once beforehand.
+
+    python benchmarks/tts_first_audio.py --paragraphs 4
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.speech_module import COQUI_TTS_AVAILABLE, load_backend, split_sentences  # noqa: E402
+
+PARAGRAPH = (
+    "Sure, here is how the setup works. First you install the package and its optional extras. "
+    "Then the configuration file is created in your home directory, where you can change the model, "
+    "the theme and the performance settings. When everything is in place, start the application "
+    "and pick a model from the list. Does that answer your question?"
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare time-to-first-audio of whole and pipelined TTS")
+    parser.add_argument("--paragraphs", type=int, default=4)
+    parser.add_argument("--model", default="tts_models/en/ljspeech/glow-tts")
+    args = parser.parse_args()
+
+    if not COQUI_TTS_AVAILABLE:
+        print("Coqui TTS is not installed (pip install TTS)")
+        return
+
+    text = "\n\n".join([PARAGRAPH] * args.paragraphs)
+    sentences = split_sentences(text)
+    start = time.perf_counter()
+    model = load_backend("coqui").TTS(args.model)
+    model.to("cpu")
+    print(f"Model loaded in {time.perf_counter() - start:.1f}s")
+    print(f"Response: {len(text)} characters, {len(sentences)} sentences")
+
+    start = time.perf_counter()
+    model.tts(text)
+    whole = time.perf_counter() - start
+
+    start = time.perf_counter()
+    first = None
+    for sentence in sentences:
+        model.tts(sentence)
+        if first is None:
+            first = time.perf_counter() - start
+    total = time.perf_counter() - start
+
+    print(f"{'mode':<12}{'first audio':>14}{'all synthesized':>18}")
+    print(f"{'whole':<12}{whole * 1000:>12.0f}ms{whole * 1000:>16.0f}ms")
+    print(f"{'pipelined':<12}{first * 1000:>12.0f}ms{total * 1000:>16.0f}ms")
+    print(f"First audio {whole / first:.1f}x sooner")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""History write-amplification benchmark.
+
+Simulates a conversation that is saved after every message and reports how
+many bytes ``ChatHistory`` writes with full snapshot rewrites (the previous
+behaviour) and with the append-only journal plus background compaction.
+
+    python benchmarks/write_amplification.py --messages 1000 --size 600
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.chat_history import ChatHistory  # noqa: E402
+
+
+def run(journal: bool, messages: int, size: int, fsync_policy: str):
+    with tempfile.TemporaryDirectory() as storage_dir:
+        history = ChatHistory(storage_dir, journal=journal, fsync_policy=fsync_policy)
+        start = time.perf_counter()
+        for i in range(messages):
+            history.add_message("user" if i % 2 == 0 else "assistant", "x" * random.randint(size // 2, size * 3 // 2))
+            history.save_session("benchmark", {"model": "mistral"})
+        history.wait_for_compaction()
+        history.close()
+        elapsed = time.perf_counter() - start
+        logical = os.path.getsize(os.path.join(storage_dir, "chat_benchmark.json"))
+        journal_path = os.path.join(storage_dir, "chat_benchmark.journal")
+        if os.path.exists(journal_path):
+            logical += os.path.getsize(journal_path)
+    return history.bytes_written, logical, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--size", type=int, default=600, help="average message length in characters")
+    parser.add_argument("--fsync", default="batch", choices=("always", "batch", "none"))
+    args = parser.parse_args()
+
+    print(f"{args.messages} messages, ~{args.size} chars each, saved after every message (fsync: {args.fsync})")
+    for label, journal in (("Full rewrite", False), ("Journal", True)):
+        written, logical, elapsed = run(journal, args.messages, args.size, args.fsync)
+        print(
+            f"  {label:<13} {written / 1024 / 1024:>9.1f} MB written for {logical / 1024 / 1024:.2f} MB on disk "
+            f"(amplification {written / logical:>6.1f}x) in {elapsed:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
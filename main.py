@@ -1,4 +1,9 @@
-from PyQt6.QtCore import QThread, pyqtSignal, Qt
+import time
+
+# Reference point for startup timing
+STARTUP_TIME = time.perf_counter()
+
+from PyQt6.QtCore import QSettings, QThread, QTimer, pyqtSignal, Qt
 from PyQt6.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -15,20 +20,25 @@ from PyQt6.QtWidgets import (
     QMenuBar,
     QMenu,
     QMessageBox,
+    QFileDialog,
 )
 import sys
 import os
 import subprocess
 import logging
-from datetime import datetime
 
 from modules.speech_module import SpeechHandler, PYTTSX3_AVAILABLE, COQUI_TTS_AVAILABLE, STT_AVAILABLE
 from modules.theme_manager import ThemeManager, Theme
-from modules.model_config import ModelConfig
+from modules.model_config import ConfigWatcher, ModelConfig, get_model_config
 from modules.logger_config import setup_logging
 from modules.chat_history import ChatHistory
 from modules.shortcut_manager import ShortcutManager
 from modules.tab_manager import TabManager
+from modules.search_panel import SearchPanel
+from modules.history_search_dialog import HistorySearchDialog
+from modules.stall_detector import StallDetector, StallReportDialog
+from modules.startup import StageWorker, StartupSequence
+from modules.session_retention import format_report
 
 # Setup logging
 loggers = setup_logging()
@@ -100,17 +110,38 @@ class Worker(QThread):
             self.result_ready.emit(error_msg)
 
 
+def check_ollama():
+    """Return the models installed in Ollama, or None if Ollama is unavailable"""
+    try:
+        result = subprocess.run(["ollama", "list"], capture_output=True, text=True, timeout=15)
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+    return [line.split()[0] for line in result.stdout.strip().splitlines()[1:] if line.strip()]
+
+
 class AIChatApp(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("AI Chat App")
         self.setGeometry(100, 100, 800, 600)
 
-        # Initialize components
-        self.speech_handler = SpeechHandler(self)
+        # Watches the event loop for stalls once the startup stages are done
+        self.stall_detector = StallDetector(self)
+
+        # Only cheap components are built before the window is shown; models,
+        # speech engines, history indexing and the backend check follow in
+        # the startup stages
+        self.speech_handler = None
+        self.model_config = None
         self.theme_manager = ThemeManager()
-        self.model_config = ModelConfig()
-        self.chat_history = ChatHistory()
+        settings = QSettings("AI-Chat-App", "Performance")
+        self.chat_history = ChatHistory(
+            backend=settings.value("history_backend", "json"),
+            fsync_policy=settings.value("history_fsync", "batch"),
+            dedup_threshold=int(settings.value("dedup_min_chars", 1024)),
+        )
         self.shortcut_manager = ShortcutManager(self)
 
         # Initialize UI
@@ -120,12 +151,76 @@ class AIChatApp(QMainWindow):
 
         # Apply default theme
         self.theme_manager.apply_theme(QApplication.instance(), Theme.LIGHT)
-        
-        # Initialize TTS status
-        self.speaking_indicator.setText(self.speech_handler.is_tts_working())
-        
+
+        # Startup stages with readiness shown in the status bar
+        self.startup = StartupSequence(self, STARTUP_TIME)
+        self.startup.add_stage("config", "Models")
+        self.startup.add_stage("history", "History")
+        self.startup.add_stage("backend", "Ollama")
+        self.startup.add_stage("speech", "Speech")
+        self.startup.all_finished.connect(self.stall_detector.start)
+        self._startup_started = False
+
+        self.startup.mark("window shell built")
         logger.info("Application initialized")
 
+    def showEvent(self, event):
+        """Start the deferred startup stages once the window is shown"""
+        super().showEvent(event)
+        if not self._startup_started:
+            self._startup_started = True
+            QTimer.singleShot(0, self.start_subsystems)
+
+    def start_subsystems(self):
+        """Paint the shell, then initialize subsystems without blocking it"""
+        self.repaint()
+        self.startup.mark("first paint")
+
+        self.startup.run_in_background("backend", check_ollama, self.on_backend_checked)
+        self.startup.begin("history", "indexing...")
+        self.tab_manager.index_saved_sessions(self.on_history_indexed)
+        self.startup.run_deferred("config", self.init_config)
+        self.startup.run_deferred("speech", self.init_speech)
+
+    def on_history_indexed(self, count):
+        """Startup stage done: saved sessions are searchable; suggest a clean-up if one is due"""
+        self.startup.finish("history", f"{count} new messages indexed")
+        if not self.tab_manager.retention_enabled:
+            return
+
+        # Only report at startup; sessions are removed from Clean Up History after confirmation
+        def planned(report):
+            if report["actions"]:
+                self.statusBar().showMessage(
+                    f"{format_report(report).splitlines()[0]} (File > Clean Up History...)", 10000
+                )
+
+        self.tab_manager.start_retention(dry_run=True, on_finished=planned)
+
+    def init_config(self):
+        """Startup stage: load model configuration and open the model tabs"""
+        self.model_config = get_model_config()
+        self.config_watcher = ConfigWatcher(self.model_config, self)
+        self.tab_manager.initialize_model_tabs(self.model_config)
+        self.startup.mark("interactive")
+        return f"{len(self.model_config.list_available_models())} models"
+
+    def init_speech(self):
+        """Startup stage: create the speech handler and its controls"""
+        self.speech_handler = SpeechHandler(self)
+        self.setup_speech_controls()
+        self.speaking_indicator.setText(self.speech_handler.is_tts_working())
+        engines = len(self.speech_handler.get_available_tts_methods())
+        return f"{engines} TTS engine(s), STT {'on' if STT_AVAILABLE else 'off'}"
+
+    def on_backend_checked(self, models):
+        """Startup stage result: report Ollama availability"""
+        if models is None:
+            logger.warning("Ollama is not installed or not in PATH")
+            return "not found"
+        logger.info(f"Ollama available with {len(models)} installed models")
+        return f"ready ({len(models)} models)"
+
     def setup_menu(self):
         """Setup the application menu bar"""
         menubar = self.menuBar()
@@ -140,12 +235,40 @@ class AIChatApp(QMainWindow):
         save_action.setShortcut("Ctrl+S")
         save_action.triggered.connect(self.save_current_session)
 
+        export_action = file_menu.addAction("Export Chat (Markdown)")
+        export_action.setShortcut("Ctrl+E")
+        export_action.triggered.connect(self.export_current_session)
+
+        export_all_action = file_menu.addAction("Export All Sessions...")
+        export_all_action.triggered.connect(self.export_all_sessions)
+
+        import_action = file_menu.addAction("Import Conversations...")
+        import_action.triggered.connect(self.import_conversations)
+
+        analysis_export_action = file_menu.addAction("Export for Analysis...")
+        analysis_export_action.triggered.connect(self.export_for_analysis)
+
+        star_action = file_menu.addAction("Star Chat")
+        star_action.triggered.connect(self.star_current_session)
+
+        cleanup_action = file_menu.addAction("Clean Up History...")
+        cleanup_action.triggered.connect(self.clean_up_history)
+
         # View Menu
         view_menu = menubar.addMenu("View")
         theme_action = view_menu.addAction("Toggle Theme")
         theme_action.setShortcut("Ctrl+T")
         theme_action.triggered.connect(self.toggle_theme)
 
+        history_search_action = view_menu.addAction("Search History...")
+        history_search_action.triggered.connect(self.show_history_search)
+
+        analytics_action = view_menu.addAction("History Analytics...")
+        analytics_action.triggered.connect(self.show_history_analytics)
+
+        stall_action = view_menu.addAction("Stall Report")
+        stall_action.triggered.connect(self.show_stall_report)
+
         # Settings Menu
         settings_menu = menubar.addMenu("Settings")
         model_action = settings_menu.addAction("Model Settings")
@@ -165,7 +288,11 @@ class AIChatApp(QMainWindow):
         self.setup_top_controls()
 
         # Tab Manager
-        self.tab_manager = TabManager(self)
+        self.tab_manager = TabManager(self, chat_history=self.chat_history)
+
+        # Search across open tabs and saved sessions
+        self.search_panel = SearchPanel(self.tab_manager)
+        self.layout.addWidget(self.search_panel)
         self.layout.addWidget(self.tab_manager)
 
     def setup_shortcuts(self):
@@ -174,18 +301,39 @@ class AIChatApp(QMainWindow):
         self.shortcut_manager.register_shortcut("save_session", self.save_current_session)
         self.shortcut_manager.register_shortcut("clear_chat", self.clear_current_chat)
         self.shortcut_manager.register_shortcut("toggle_theme", self.toggle_theme)
-        self.shortcut_manager.register_shortcut("toggle_tts", lambda: self.tts_toggle.setChecked(not self.tts_toggle.isChecked()))
+        self.shortcut_manager.register_shortcut("toggle_tts", self.toggle_tts_shortcut)
         self.shortcut_manager.register_shortcut("stop_tts", self.stop_speaking)
         self.shortcut_manager.register_shortcut("start_stt", self.start_listening)
+        self.shortcut_manager.register_shortcut("search", self.search_panel.focus)
+        self.shortcut_manager.register_shortcut("search_history", self.show_history_search)
 
     def setup_top_controls(self):
-        """Setup the top control panel"""
+        """Setup the top control panel; speech controls are filled in by the speech stage"""
         top_controls = QFrame()
         top_controls.setFrameStyle(QFrame.Shape.StyledPanel | QFrame.Shadow.Raised)
         top_layout = QHBoxLayout(top_controls)
 
+        self.tts_group = QVBoxLayout()
+        self.stt_group = QVBoxLayout()
+        self.speech_loading_label = QLabel("Loading speech engines...")
+        self.speech_loading_label.setStyleSheet("color: gray;")
+        self.tts_group.addWidget(self.speech_loading_label)
+
+        top_layout.addLayout(self.tts_group)
+        top_layout.addLayout(self.stt_group)
+        self.layout.addWidget(top_controls)
+
+        # Speaking Status
+        self.speaking_indicator = QLabel("")
+        self.speaking_indicator.setStyleSheet("color: gray;")
+        self.layout.addWidget(self.speaking_indicator)
+
+    def setup_speech_controls(self):
+        """Setup the TTS and STT controls"""
+        self.speech_loading_label.deleteLater()
+
         # TTS Controls
-        tts_group = QVBoxLayout()
+        tts_group = self.tts_group
         tts_methods = self.speech_handler.get_available_tts_methods()
 
         if tts_methods:
@@ -196,6 +344,7 @@ class AIChatApp(QMainWindow):
             tts_label = QLabel("TTS Method:")
             self.tts_dropdown = QComboBox()
             self.tts_dropdown.addItems(tts_methods)
+            self.tts_dropdown.currentTextChanged.connect(self.preload_tts)
             tts_group.addWidget(tts_label)
             tts_group.addWidget(self.tts_dropdown)
 
@@ -208,17 +357,17 @@ class AIChatApp(QMainWindow):
             tts_label.setStyleSheet("color: gray;")
             tts_group.addWidget(tts_label)
 
-        top_layout.addLayout(tts_group)
-
         # STT Controls
-        stt_group = QVBoxLayout()
+        stt_group = self.stt_group
         if STT_AVAILABLE:
-            stt_label = QLabel("Speech-to-Text:")
+            self.stt_toggle = QCheckBox("Enable STT")
+            self.stt_toggle.stateChanged.connect(self.toggle_stt)
             self.stt_button = QPushButton("🎤 Listen")
             self.stt_button.clicked.connect(self.start_listening)
+            self.stt_button.setEnabled(False)
             self.stt_status = QLabel("")
             self.stt_status.setStyleSheet("color: gray;")
-            stt_group.addWidget(stt_label)
+            stt_group.addWidget(self.stt_toggle)
             stt_group.addWidget(self.stt_button)
             stt_group.addWidget(self.stt_status)
         else:
@@ -226,16 +375,10 @@ class AIChatApp(QMainWindow):
             stt_label.setStyleSheet("color: gray;")
             stt_group.addWidget(stt_label)
 
-        top_layout.addLayout(stt_group)
-        self.layout.addWidget(top_controls)
-
-        # Speaking Status
-        self.speaking_indicator = QLabel("")
-        self.speaking_indicator.setStyleSheet("color: gray;")
-        self.layout.addWidget(self.speaking_indicator)
-
     def create_new_tab(self):
         """Create a new chat tab"""
+        if self.model_config is None:
+            return None
         model_name = self.model_config.list_available_models()[0]  # Default to first model
         tab = self.tab_manager.create_model_tab(model_name)
         return tab
@@ -244,30 +387,147 @@ class AIChatApp(QMainWindow):
         """Save the current chat session"""
         current_tab = self.tab_manager.get_current_tab()
         if current_tab:
-            model_name = self.tab_manager.tabText(self.tab_manager.currentIndex())
-            chat_text = current_tab.output_display.toPlainText()
-            
             try:
-                # Save to chat history
-                session_name = f"{model_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                messages = []
-                for line in chat_text.split('\n'):
-                    if line.startswith("User: "):
-                        messages.append({"role": "user", "content": line[6:]})
-                    elif line.startswith("Assistant: "):
-                        messages.append({"role": "assistant", "content": line[11:]})
-                
-                self.chat_history.current_session = messages
-                if self.chat_history.save_session(session_name):
-                    logger.info(f"Saved chat session to chat history: {session_name}")
+                self.tab_manager.save_tab_session(current_tab)
             except Exception as e:
                 logger.error(f"Error saving chat session: {e}")
 
+    def export_current_session(self):
+        """Export the current chat session as Markdown"""
+        current_tab = self.tab_manager.get_current_tab()
+        if current_tab:
+            filename = self.tab_manager.export_tab_session(current_tab, "markdown")
+            if filename and current_tab.output_display is not None:
+                current_tab.output_display.append(f"Exported chat to {filename}")
+
+    def export_all_sessions(self):
+        """Export every saved session into one archive on a background thread"""
+        if getattr(self, "export_worker", None) is not None:
+            self.statusBar().showMessage("An export is already running", 3000)
+            return
+        destination, selected = QFileDialog.getSaveFileName(
+            self,
+            "Export All Sessions",
+            os.path.join(self.chat_history.storage_dir, "exports", "chat_history.zip"),
+            "Zip archive (*.zip);;Compressed tar archive (*.tar.gz);;JSON Lines (*.jsonl)",
+        )
+        if not destination:
+            return
+        format = "jsonl" if selected.startswith("JSON") else "tar" if selected.startswith("Compressed") else "zip"
+
+        self.tab_manager.save_all_sessions()
+        names = [session["name"] for session in self.chat_history.list_sessions()]
+        self.statusBar().showMessage(f"Exporting {len(names)} sessions...")
+        self.export_worker = StageWorker(lambda: self.chat_history.export_sessions(names, format, destination))
+
+        def done(report, error):
+            self.export_worker = None
+            if error:
+                self.statusBar().showMessage(f"Export failed: {error}", 5000)
+            else:
+                self.statusBar().showMessage(
+                    f"Exported {report['sessions']} sessions to {destination} in {report['seconds']:.1f}s", 5000
+                )
+
+        self.export_worker.result_ready.connect(done)
+        self.export_worker.start()
+
+    def export_for_analysis(self):
+        """Update the Parquet dataset of the history on a background thread"""
+        from modules.columnar_export import PYARROW_AVAILABLE, ColumnarExporter
+        if not PYARROW_AVAILABLE:
+            QMessageBox.information(self, "Export for Analysis", "Columnar export needs pyarrow (pip install pyarrow).")
+            return
+        if getattr(self, "columnar_worker", None) is not None:
+            self.statusBar().showMessage("An export is already running", 3000)
+            return
+        destination = QFileDialog.getExistingDirectory(
+            self, "Export for Analysis", os.path.join(self.chat_history.storage_dir, "exports")
+        )
+        if not destination:
+            return
+
+        self.tab_manager.save_all_sessions()
+        self.statusBar().showMessage("Exporting changed sessions for analysis...")
+        self.columnar_worker = StageWorker(lambda: ColumnarExporter(self.chat_history, destination).export())
+
+        def done(report, error):
+            self.columnar_worker = None
+            if error:
+                self.statusBar().showMessage(f"Export failed: {error}", 5000)
+            else:
+                self.statusBar().showMessage(
+                    f"Exported {report['sessions']} changed sessions ({report['unchanged']} unchanged) "
+                    f"in {report['seconds']:.1f}s", 5000
+                )
+
+        self.columnar_worker.result_ready.connect(done)
+        self.columnar_worker.start()
+
+    def import_conversations(self):
+        """Import a ChatGPT or Open WebUI export on a background thread"""
+        if getattr(self, "import_worker", None) is not None:
+            self.statusBar().showMessage("An import is already running", 3000)
+            return
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Import Conversations", "", "Chat exports (*.json *.zip);;All files (*)"
+        )
+        if not path:
+            return
+
+        from modules.chat_import import ChatImporter
+        self.statusBar().showMessage(f"Importing {os.path.basename(path)}...")
+        self.import_worker = StageWorker(lambda: ChatImporter(self.chat_history).run(path))
+
+        def done(report, error):
+            self.import_worker = None
+            if error:
+                self.statusBar().showMessage(f"Import failed (run it again to resume): {error}", 5000)
+                return
+            self.statusBar().showMessage(
+                f"Imported {report['sessions']} sessions ({report['records_per_second']:.0f} records/s)", 5000
+            )
+            # Changes written by this process are not picked up from the change log
+            self.tab_manager.index_saved_sessions()
+
+        self.import_worker.result_ready.connect(done)
+        self.import_worker.start()
+
+    def star_current_session(self):
+        """Star or unstar the current chat so retention keeps it"""
+        current_tab = self.tab_manager.get_current_tab()
+        if current_tab:
+            starred = self.tab_manager.toggle_star(current_tab)
+            if starred is None:
+                self.statusBar().showMessage("Nothing to star yet", 3000)
+            else:
+                self.statusBar().showMessage("Chat starred" if starred else "Star removed", 3000)
+
+    def clean_up_history(self):
+        """Show what the retention policy would remove and apply it on confirmation"""
+        if self.tab_manager.retention_worker is not None:
+            self.statusBar().showMessage("History clean-up is already running", 3000)
+            return
+
+        def planned(report):
+            if not report["actions"]:
+                QMessageBox.information(self, "Clean Up History", "Nothing to clean up.")
+                return
+            reply = QMessageBox.question(
+                self, "Clean Up History", f"{format_report(report)}\n\nApply these changes now?"
+            )
+            if reply == QMessageBox.StandardButton.Yes:
+                self.tab_manager.start_retention(
+                    on_finished=lambda done: self.statusBar().showMessage(format_report(done).splitlines()[0], 5000)
+                )
+
+        self.tab_manager.start_retention(dry_run=True, on_finished=planned)
+
     def clear_current_chat(self):
         """Clear the current chat tab"""
         current_tab = self.tab_manager.get_current_tab()
         if current_tab:
-            current_tab.output_display.clear()
+            self.tab_manager.clear_tab(current_tab)
             logger.info("Cleared current chat")
 
     def show_shortcuts_dialog(self):
@@ -275,16 +535,34 @@ class AIChatApp(QMainWindow):
         self.shortcut_manager.show_dialog()
         logger.debug("Opened shortcuts dialog")
 
+    def show_history_search(self):
+        """Show full-text search over the saved history"""
+        if self.chat_history.search is None:
+            QMessageBox.information(self, "Search History", "Full-text search needs SQLite with FTS5.")
+            return
+        HistorySearchDialog(self.tab_manager, self).exec()
+
+    def show_history_analytics(self):
+        """Show per-model and per-day statistics over the saved history"""
+        # Imported on first use so NumPy stays off the startup path
+        from modules.analytics_dialog import AnalyticsDialog
+        AnalyticsDialog(self.chat_history, self).exec()
+
+    def show_stall_report(self):
+        """Show the GUI stall summary"""
+        StallReportDialog(self.stall_detector, self).exec()
+
     def toggle_theme(self):
         """Toggle between light and dark themes"""
         current_theme = self.theme_manager.current_theme
         new_theme = Theme.DARK if current_theme == Theme.LIGHT else Theme.LIGHT
         self.theme_manager.apply_theme(QApplication.instance(), new_theme)
+        self.tab_manager.apply_theme(new_theme.value)
 
     def show_model_settings(self):
         """Show model settings dialog"""
         current_tab = self.tab_manager.get_current_tab()
-        if current_tab:
+        if current_tab and self.model_config is not None:
             model_name = self.tab_manager.tabText(self.tab_manager.currentIndex())
             info = self.model_config.get_model_info(model_name)
             if info:
@@ -301,6 +579,8 @@ class AIChatApp(QMainWindow):
         """Toggle TTS functionality"""
         self.tts_enabled = bool(state)
         self.stop_button.setEnabled(self.tts_enabled)
+        if self.tts_enabled:
+            self.preload_tts(self.tts_dropdown.currentText())
         status = "enabled" if self.tts_enabled else "disabled"
         current_tab = self.tab_manager.get_current_tab()
         if current_tab:
@@ -308,16 +588,40 @@ class AIChatApp(QMainWindow):
         # Update TTS status indicator
         self.speaking_indicator.setText(self.speech_handler.is_tts_working())
 
+    def preload_tts(self, method):
+        """Import the selected TTS engine in the background once TTS is enabled"""
+        if getattr(self, "tts_enabled", False):
+            self.speech_handler.preload_tts(method)
+
+    def toggle_stt(self, state):
+        """Enable STT and import its engines in the background"""
+        enabled = bool(state)
+        self.stt_button.setEnabled(enabled)
+        if enabled:
+            self.speech_handler.preload_stt()
+            self.stt_status.setText("Ready")
+        else:
+            self.stt_status.setText("")
+
+    def toggle_tts_shortcut(self):
+        """Flip the TTS checkbox, if TTS is available"""
+        if hasattr(self, "tts_toggle"):
+            self.tts_toggle.setChecked(not self.tts_toggle.isChecked())
+
     def stop_speaking(self):
         """Stop current TTS output"""
+        if self.speech_handler is None:
+            return
         self.speech_handler.stop_speaking()
         # Status will be updated by the speech handler
 
     def start_listening(self):
         """Start STT recording"""
         current_tab = self.tab_manager.get_current_tab()
-        if not current_tab:
+        if not current_tab or not STT_AVAILABLE or self.speech_handler is None:
             return
+        if not self.stt_toggle.isChecked():
+            self.stt_toggle.setChecked(True)
 
         self.stt_button.setEnabled(False)
         self.stt_status.setText("Listening...")
@@ -338,22 +642,32 @@ class AIChatApp(QMainWindow):
     def closeEvent(self, event):
         """Enhanced cleanup before closing"""
         logger.info("Starting application shutdown...")
+        self.tab_manager.stop_retention()
         
-        # Ask to save sessions
-        reply = QMessageBox.question(
-            self,
-            "Save Sessions",
-            "Would you like to save all chat sessions before closing?",
-            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-        )
+        if self.tab_manager.autosaver is not None:
+            # Autosave keeps history current; only the last few seconds are left to write
+            start = time.perf_counter()
+            self.tab_manager.shutdown_autosave()
+            logger.info(f"Flushed pending autosaves in {(time.perf_counter() - start) * 1000:.0f} ms")
+        else:
+            # Ask to save sessions
+            reply = QMessageBox.question(
+                self,
+                "Save Sessions",
+                "Would you like to save all chat sessions before closing?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            )
 
-        if reply == QMessageBox.StandardButton.Yes:
-            logger.info("Saving all chat sessions...")
-            self.tab_manager.save_all_sessions()
+            if reply == QMessageBox.StandardButton.Yes:
+                logger.info("Saving all chat sessions...")
+                self.tab_manager.save_all_sessions()
+            self.tab_manager.shutdown_autosave()
 
         # Stop any ongoing TTS
         logger.debug("Stopping TTS...")
         self.stop_speaking()
+        if self.speech_handler is not None:
+            self.speech_handler.shutdown()
         
         # Close all tabs and cleanup workers
         logger.debug("Cleaning up worker threads...")
@@ -365,6 +679,15 @@ class AIChatApp(QMainWindow):
                     tab.current_worker.quit()
                     tab.current_worker.wait()
                     logger.debug(f"Worker thread for tab {i} stopped")
+
+        # Stop the syntax highlighting worker and drop hibernation files
+        self.tab_manager.highlighter.shutdown()
+        self.tab_manager.hibernator.shutdown()
+
+        # Write any pending configuration edits and sync history journals
+        if self.model_config is not None:
+            self.model_config.flush()
+        self.chat_history.close()
         
         # Clean up any temporary files
         logger.debug("Cleaning up temporary files...")
@@ -380,6 +703,7 @@ class AIChatApp(QMainWindow):
             except Exception as e:
                 logger.warning(f"Error cleaning up temporary files: {e}")
         
+        self.stall_detector.stop()
         logger.info("Application shutdown complete")
         event.accept()
 
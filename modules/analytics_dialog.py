@@ -0,0 +1,124 @@
+from PyQt6.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QSpinBox,
+    QTableWidget,
+    QTableWidgetItem,
+    QTabWidget,
+)
+from PyQt6.QtCore import Qt
+from typing import Dict, List
+import logging
+
+from .history_analytics import HistoryAnalytics, TABLE_COLUMNS
+from .startup import StageWorker
+
+logger = logging.getLogger("main.analytics.dialog")
+
+
+class AnalyticsDialog(QDialog):
+    """Per-model and per-day statistics over the whole saved history"""
+
+    def __init__(self, chat_history, parent=None):
+        super().__init__(parent)
+        self.analytics = HistoryAnalytics(chat_history)
+        self.worker = None
+        self.setWindowTitle("History Analytics")
+        self.setMinimumSize(800, 450)
+
+        layout = QVBoxLayout(self)
+        self.summary_label = QLabel("Reading history...")
+        self.summary_label.setWordWrap(True)
+        layout.addWidget(self.summary_label)
+
+        self.tabs = QTabWidget()
+        self.model_table = self._create_table()
+        self.day_table = self._create_table()
+        self.tabs.addTab(self.model_table, "By model")
+        self.tabs.addTab(self.day_table, "By day")
+        layout.addWidget(self.tabs)
+
+        controls = QHBoxLayout()
+        controls.addWidget(QLabel("Days:"))
+        self.days_spin = QSpinBox()
+        self.days_spin.setRange(1, 3650)
+        self.days_spin.setValue(30)
+        self.days_spin.valueChanged.connect(self.show_days)
+        controls.addWidget(self.days_spin)
+        controls.addStretch()
+        self.refresh_button = QPushButton("Refresh")
+        self.refresh_button.clicked.connect(self.refresh)
+        controls.addWidget(self.refresh_button)
+        layout.addLayout(controls)
+
+        self.refresh()
+
+    def refresh(self):
+        """Read new messages into the columns on a background thread"""
+        if self.worker is not None:
+            return
+        # The worker swaps the columns that show_days reads
+        self.refresh_button.setEnabled(False)
+        self.days_spin.setEnabled(False)
+        self.worker = StageWorker(self.analytics.refresh)
+        self.worker.result_ready.connect(self._on_refreshed)
+        self.worker.start()
+
+    def show_days(self):
+        """Fill the per-day table for the selected number of days"""
+        self._fill_table(self.day_table, self.analytics.per_day(self.days_spin.value()))
+
+    def done(self, result: int):
+        if self.worker is not None:
+            self.worker.wait()
+        super().done(result)
+
+    def _on_refreshed(self, report: Dict, error: str):
+        self.worker = None
+        self.refresh_button.setEnabled(True)
+        self.days_spin.setEnabled(True)
+        if error:
+            self.summary_label.setText(f"Failed to read history: {error}")
+            return
+        summary = self.analytics.summary()
+        latency = summary["latency_ms"]
+        text = (
+            f"{summary['sessions']} sessions, {summary['messages']} messages "
+            f"({summary['user_messages']} user / {summary['ai_messages']} assistant), "
+            f"average length {summary['average_message_length']:.0f} characters"
+        )
+        if summary["first"]:
+            text += f", from {summary['first'][:10]} to {summary['last'][:10]}"
+        if latency:
+            text += f". Response latency p50 {latency[50]:.0f} ms, p95 {latency[95]:.0f} ms"
+        self.summary_label.setText(text)
+        self._fill_table(self.model_table, self.analytics.per_model())
+        self.show_days()
+        logger.debug(f"Analytics dialog refreshed ({report['read']} new messages in {report['ms']:.0f} ms)")
+
+    def _create_table(self) -> QTableWidget:
+        table = QTableWidget(0, len(TABLE_COLUMNS))
+        table.setHorizontalHeaderLabels([title or "name" for _, title in TABLE_COLUMNS])
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        table.verticalHeader().setVisible(False)
+        return table
+
+    def _fill_table(self, table: QTableWidget, rows: List[Dict]):
+        table.setSortingEnabled(False)
+        table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for column, (key, _) in enumerate(TABLE_COLUMNS):
+                value = values.get(key)
+                item = QTableWidgetItem()
+                if value is None:
+                    item.setText("-")
+                elif key == "name":
+                    item.setText(value)
+                else:
+                    item.setData(Qt.ItemDataRole.DisplayRole, value)
+                table.setItem(row, column, item)
+        table.setSortingEnabled(True)
+        table.resizeColumnsToContents()
@@ -0,0 +1,124 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+from typing import Dict, List, Optional, Tuple
+import json
+import logging
+import os
+import queue
+
+logger = logging.getLogger("main.autosave")
+
+
+class RecoveryJournal:
+    """Per-tab JSONL record of the messages a tab has not yet autosaved.
+
+    Every message added to a tab is appended, with its index in the
+    conversation, to ``tab_<id>.jsonl`` and flushed to the operating system,
+    so an application crash loses nothing. Once an autosave has persisted a
+    tab the file is removed; files left behind at startup belong to tabs
+    that were open when the application crashed.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._files: Dict[str, object] = {}
+
+    def record(self, tab_id: str, model_name: str, session_name: Optional[str], index: int, message: Dict):
+        """Append a message added to a tab"""
+        handle = self._files.get(tab_id)
+        if handle is None:
+            handle = open(self._path(tab_id), "a", encoding="utf-8")
+            self._files[tab_id] = handle
+        record = {"model": model_name, "session": session_name, "index": index, "message": message}
+        handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+        handle.flush()
+
+    def reset(self, tab_id: str):
+        """Forget the recorded messages of a tab"""
+        handle = self._files.pop(tab_id, None)
+        if handle is not None:
+            handle.close()
+        path = self._path(tab_id)
+        if os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"Failed to remove recovery file {path}: {e}")
+
+    def pending(self) -> List[Tuple[str, Dict]]:
+        """(path, recovered conversation) for every recovery file on disk"""
+        recovered = []
+        for entry in os.scandir(self.directory):
+            if not (entry.name.startswith("tab_") and entry.name.endswith(".jsonl")):
+                continue
+            if entry.name[len("tab_"):-len(".jsonl")] in self._files:
+                continue
+            model_name, session_name, messages = None, None, {}
+            with open(entry.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        logger.warning(f"Skipping incomplete recovery record in {entry.path}")
+                        continue
+                    model_name = record["model"]
+                    session_name = record["session"] or session_name
+                    messages[record["index"]] = record["message"]
+            if messages:
+                recovered.append((entry.path, {"model": model_name, "session": session_name, "messages": messages}))
+            else:
+                os.remove(entry.path)
+        return recovered
+
+    def close(self):
+        """Close open files; their contents stay on disk"""
+        for handle in self._files.values():
+            handle.close()
+        self._files.clear()
+
+    def _path(self, tab_id: str) -> str:
+        return os.path.join(self.directory, f"tab_{tab_id}.jsonl")
+
+
+class AutosaveWorker(QThread):
+    """Saves tab conversations to chat history off the GUI thread.
+
+    Jobs are ``(tab_id, session_name, model_name, messages)`` snapshots.
+    When several jobs for the same tab are queued only the newest is saved.
+    """
+    saved = pyqtSignal(str, str, int, bool)
+
+    def __init__(self, chat_history):
+        super().__init__()
+        self.chat_history = chat_history
+        self._queue: queue.Queue = queue.Queue()
+
+    def submit(self, tab_id: str, session_name: str, model_name: str, messages: List[Dict]):
+        self._queue.put((tab_id, session_name, model_name, messages))
+
+    def stop(self):
+        """Save what is queued, then end the thread"""
+        self._queue.put(None)
+
+    def run(self):
+        running = True
+        while running:
+            jobs = {}
+            job = self._queue.get()
+            while True:
+                if job is None:
+                    running = False
+                else:
+                    jobs[job[0]] = job
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            for tab_id, session_name, model_name, messages in jobs.values():
+                try:
+                    ok = bool(self.chat_history.save_session(session_name, {"model": model_name}, messages=messages))
+                except Exception as e:
+                    logger.error(f"Autosave of {session_name} failed: {e}")
+                    ok = False
+                self.saved.emit(tab_id, session_name, len(messages), ok)
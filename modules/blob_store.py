@@ -0,0 +1,291 @@
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterable, List
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+
+logger = logging.getLogger("main.history.blobs")
+
+# Message bodies at least this long are stored once by hash
+DEFAULT_THRESHOLD = 1024
+CACHE_SIZE = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    stored INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS session_blobs (
+    session TEXT NOT NULL,
+    hash TEXT NOT NULL REFERENCES blobs(hash),
+    occurrences INTEGER NOT NULL,
+    PRIMARY KEY (session, hash)
+);
+CREATE INDEX IF NOT EXISTS idx_session_blobs_hash ON session_blobs(hash);
+"""
+
+
+class BlobStore:
+    """Content-addressed storage for large message bodies.
+
+    ``refs.db`` records, by hash, every large body in the history and how
+    often each session contains it. The first copy of a body stays inline;
+    once the same body turns up again it is written once to
+    ``<directory>/<hash[:2]>/<hash>`` and later messages carry
+    ``{"blob": hash}`` in place of their ``content``. Unique bodies
+    therefore never cost an extra file. A body is forgotten, and its blob
+    deleted, once no session contains it.
+    """
+
+    def __init__(self, directory: str, threshold: int = DEFAULT_THRESHOLD):
+        self.directory = directory
+        self.threshold = threshold
+        self.db_path = os.path.join(directory, "refs.db")
+        self._local = threading.local()
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # Held from writing blobs until they are referenced, so collection cannot race a save
+        self._ref_lock = threading.RLock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Connection for the calling thread"""
+        conn = getattr(self._local, "connection", None)
+        if conn is None:
+            os.makedirs(self.directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.connection = conn
+        return conn
+
+    def close(self):
+        """Close the calling thread's connection"""
+        conn = getattr(self._local, "connection", None)
+        if conn is not None:
+            conn.close()
+            self._local.connection = None
+
+    def store(self, session_name: str, messages: Iterable[Dict], append: bool = False) -> List[Dict]:
+        """Copies of ``messages`` with repeated large bodies replaced by blob references.
+
+        The messages are recorded as the session's complete list, or with
+        ``append`` as messages added to it.
+        """
+        messages = list(messages)
+        if not self.threshold and not any("blob" in message for message in messages):
+            if not append and os.path.exists(self.db_path):
+                with self._ref_lock, self.connection as conn:
+                    conn.execute("DELETE FROM session_blobs WHERE session = ?", (session_name,))
+            return messages
+
+        with self._ref_lock, self._transaction() as conn:
+            if not append:
+                conn.execute("DELETE FROM session_blobs WHERE session = ?", (session_name,))
+            counts: Counter = Counter()
+            result = []
+            for message in messages:
+                digest = message.get("blob")
+                content = message.get("content")
+                if digest is None and self.threshold and isinstance(content, str) and len(content) >= self.threshold:
+                    encoded = content.encode("utf-8")
+                    digest = hashlib.sha256(encoded).hexdigest()
+                    known = counts[digest] or conn.execute(
+                        "SELECT 1 FROM session_blobs WHERE hash = ? LIMIT 1", (digest,)
+                    ).fetchone()
+                    conn.execute("INSERT OR IGNORE INTO blobs (hash, size) VALUES (?, ?)", (digest, len(encoded)))
+                    if known:
+                        # Seen before: keep one copy as a blob and reference it
+                        self._write_blob(digest, encoded)
+                        conn.execute("UPDATE blobs SET stored = 1 WHERE hash = ? AND stored = 0", (digest,))
+                        message = {key: value for key, value in message.items() if key != "content"}
+                        message["blob"] = digest
+                if digest is not None:
+                    counts[digest] += 1
+                result.append(message)
+            conn.executemany(
+                "INSERT INTO session_blobs (session, hash, occurrences) VALUES (?, ?, ?) "
+                "ON CONFLICT(session, hash) DO UPDATE SET occurrences = occurrences + excluded.occurrences",
+                [(session_name, digest, count) for digest, count in counts.items()],
+            )
+        return result
+
+    @contextmanager
+    def batch(self):
+        """Record the references of several ``store`` calls in one transaction"""
+        with self._ref_lock, self.connection:
+            self._local.batch = True
+            try:
+                yield
+            finally:
+                self._local.batch = False
+
+    def resolve(self, messages: List[Dict]) -> List[Dict]:
+        """Put the bodies of blob references back into ``messages`` (in place)"""
+        for message in messages:
+            digest = message.pop("blob", None)
+            if digest is not None:
+                message["content"] = self.read(digest)
+        return messages
+
+    def read(self, digest: str) -> str:
+        """The body stored under ``digest``"""
+        with self._cache_lock:
+            content = self._cache.get(digest)
+            if content is not None:
+                self._cache.move_to_end(digest)
+                return content
+        with open(self._blob_path(digest), "rb") as f:
+            content = f.read().decode("utf-8")
+        with self._cache_lock:
+            self._cache[digest] = content
+            if len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return content
+
+    def release(self, session_name: str) -> int:
+        """Drop a session's references and delete blobs nobody references any more"""
+        if not os.path.exists(self.db_path):
+            return 0
+        with self._ref_lock:
+            with self.connection as conn:
+                conn.execute("DELETE FROM session_blobs WHERE session = ?", (session_name,))
+            return self.collect_garbage()
+
+    def collect_garbage(self) -> int:
+        """Forget bodies no session contains and delete their blobs; returns how many were dropped"""
+        with self._ref_lock, self.connection as conn:
+            orphans = conn.execute(
+                "SELECT hash, stored FROM blobs WHERE hash NOT IN (SELECT hash FROM session_blobs)"
+            ).fetchall()
+            conn.executemany("DELETE FROM blobs WHERE hash = ?", [(digest,) for digest, _ in orphans])
+            for digest, stored in orphans:
+                if not stored:
+                    continue
+                try:
+                    os.remove(self._blob_path(digest))
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(f"Failed to remove blob {digest}: {e}")
+        if orphans:
+            logger.debug(f"Forgot {len(orphans)} bodies no session contains any more")
+        return len(orphans)
+
+    def stats(self) -> Dict:
+        """Large-body counts and sizes: distinct, kept as blobs, and as contained in sessions"""
+        conn = self.connection
+        bodies, unique, blobs, blob_bytes = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored), 0), "
+            "COALESCE(SUM(size * stored), 0) FROM blobs"
+        ).fetchone()
+        referenced = conn.execute(
+            "SELECT COALESCE(SUM(b.size * r.occurrences), 0) FROM session_blobs r JOIN blobs b ON b.hash = r.hash"
+        ).fetchone()[0]
+        return {
+            "bodies": bodies,
+            "unique_bytes": unique,
+            "blobs": blobs,
+            "blob_bytes": blob_bytes,
+            "referenced_bytes": referenced,
+            "ratio": referenced / unique if unique else 1.0,
+        }
+
+    @contextmanager
+    def _transaction(self):
+        conn = self.connection
+        if getattr(self._local, "batch", False):
+            yield conn
+        else:
+            with conn:
+                yield conn
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def _write_blob(self, digest: str, data: bytes) -> bool:
+        """Write a blob unless it exists; returns True if it was written"""
+        path = self._blob_path(digest)
+        if os.path.exists(path):
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix=".blob_", suffix=".tmp", dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        return True
+
+
+def analyze(sessions: Iterable[List[Dict]], threshold: int = DEFAULT_THRESHOLD) -> Dict:
+    """Deduplication a history would get, without writing anything"""
+    seen: Dict[str, int] = {}
+    total = 0
+    large = 0
+    for messages in sessions:
+        for message in messages:
+            encoded = message.get("content", "").encode("utf-8")
+            total += len(encoded)
+            if len(encoded) >= threshold:
+                large += len(encoded)
+                seen.setdefault(hashlib.sha256(encoded).hexdigest(), len(encoded))
+    unique = sum(seen.values())
+    return {
+        "content_bytes": total,
+        "large_bytes": large,
+        "unique_bytes": unique,
+        "blobs": len(seen),
+        "ratio": large / unique if unique else 1.0,
+        "saved_bytes": large - unique,
+    }
+
+
+def main():
+    import argparse
+    from .chat_history import ChatHistory
+
+    parser = argparse.ArgumentParser(description="Report message deduplication for the saved history")
+    parser.add_argument("--storage", default="chat_history/chat_history", help="chat history directory")
+    parser.add_argument("--threshold", type=int, default=DEFAULT_THRESHOLD, help="minimum body length in characters")
+    parser.add_argument("--migrate", action="store_true", help="rewrite sessions so duplicates are stored once")
+    args = parser.parse_args()
+
+    history = ChatHistory(args.storage, dedup_threshold=args.threshold)
+    names = [session["name"] for session in history.list_sessions()]
+
+    def messages():
+        for name in names:
+            data = history.read_session(name)
+            if data is not None:
+                yield data.get("messages", [])
+
+    report = analyze(messages(), args.threshold)
+    mb = 1024 * 1024
+    print(f"{len(names)} sessions, {report['content_bytes'] / mb:.1f} MB of message bodies")
+    print(f"Bodies >= {args.threshold} chars: {report['large_bytes'] / mb:.1f} MB in {report['blobs']} distinct bodies "
+          f"({report['unique_bytes'] / mb:.1f} MB) -> dedup ratio {report['ratio']:.2f}x, "
+          f"{report['saved_bytes'] / mb:.1f} MB saved")
+
+    if args.migrate:
+        migrated = history.deduplicate_sessions(names)
+        stats = history.blobs.stats()
+        print(f"Rewrote {migrated} sessions: {stats['referenced_bytes'] / mb:.1f} MB of large bodies now take "
+              f"{stats['unique_bytes'] / mb:.1f} MB ({stats['ratio']:.2f}x), "
+              f"{stats['blobs']} of {stats['bodies']} distinct bodies kept as blobs")
+    history.close()
+
+
+if __name__ == "__main__":
+    # python -m modules.blob_store --migrate
+    main()
@@ -0,0 +1,232 @@
+from PyQt6.QtWidgets import QTextEdit
+from PyQt6.QtGui import QTextCursor, QTextFrameFormat
+from typing import List, Optional
+import html
+import logging
+
+from .markdown_renderer import MarkdownRenderer, render_plain
+
+logger = logging.getLogger("main.chat_display")
+
+# Rough cost of a rendered character (UTF-16 text, formats and layout) for memory estimates
+DOCUMENT_BYTES_PER_CHAR = 10
+
+ROLE_LABELS = {
+    "user": "User",
+    "assistant": "Assistant",
+}
+
+
+class MessageEntry:
+    """A rendered message and the document frame that holds it"""
+
+    __slots__ = ("role", "frame", "renderer", "content")
+
+    def __init__(self, role: str, frame, renderer: Optional[MarkdownRenderer], content: str):
+        self.role = role
+        self.frame = frame
+        self.renderer = renderer
+        self.content = content
+
+
+class ChatDisplay(QTextEdit):
+    """Read-only chat transcript that renders assistant messages as Markdown.
+
+    Every message lives in its own QTextFrame, so asynchronously
+    highlighted code blocks only rewrite that frame instead of
+    re-rendering the whole transcript.
+
+    With a scrollback window set, only the newest messages are kept in the
+    document; older frames are dropped as new ones arrive and paged back in
+    from the message store when the user scrolls to the top.
+    """
+
+    def __init__(self, highlighter=None, parent=None):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.highlighter = highlighter
+        self.theme = "light"
+        self.entries: List[MessageEntry] = []
+        self.store = None
+
+        # Scrollback window; entries[0] is message number first_index of the store
+        self.first_index = 0
+        self.max_messages: Optional[int] = None
+        self.max_chars: Optional[int] = None
+        self.page_size = 20
+        self._paging = False
+        self.verticalScrollBar().valueChanged.connect(self._on_scrolled)
+
+        if highlighter is not None:
+            highlighter.highlighted.connect(self._on_highlighted)
+            self.document().setDefaultStyleSheet(highlighter.stylesheet(self.theme))
+
+    def set_scrollback(self, max_messages: int, max_bytes: int):
+        """Keep at most ``max_messages`` messages / ``max_bytes`` in the document"""
+        self.max_messages = max_messages
+        self.max_chars = max_bytes // DOCUMENT_BYTES_PER_CHAR
+        self._trim()
+
+    def bind(self, store):
+        """Render the newest messages of a store and follow its updates"""
+        if self.store is not None:
+            self.store.unsubscribe(self._on_store_changed)
+        self.store = store
+        start = max(len(store) - self.max_messages, 0) if self.max_messages else 0
+        self.first_index = start
+        for message in store.get_range(start, len(store)):
+            self._insert_entry(message["role"], message["content"])
+        self._trim()
+        self._scroll_to_bottom()
+        store.subscribe(self._on_store_changed)
+
+    def unbind(self):
+        """Stop following the bound message store"""
+        if self.store is not None:
+            self.store.unsubscribe(self._on_store_changed)
+            self.store = None
+
+    def memory_usage(self) -> int:
+        """Estimated bytes held by the rendered document"""
+        return self.document().characterCount() * DOCUMENT_BYTES_PER_CHAR
+
+    def append_message(self, role: str, content: str) -> int:
+        """Append a message and return its index"""
+        self._insert_entry(role, content)
+        self._trim()
+        self._scroll_to_bottom()
+        return self.first_index + len(self.entries) - 1
+
+    def page_in(self, count: int):
+        """Render up to ``count`` older messages above the current ones"""
+        if self.store is None or self.first_index == 0 or self._paging:
+            return
+        self._paging = True
+        try:
+            scrollbar = self.verticalScrollBar()
+            old_maximum = scrollbar.maximum()
+            old_value = scrollbar.value()
+
+            start = max(self.first_index - count, 0)
+            older = self.store.get_range(start, self.first_index)
+            # Insert newest first, each directly above the current first message
+            for message in reversed(older):
+                self._insert_entry(message["role"], message["content"], prepend=True)
+            self.first_index = start
+
+            scrollbar.setValue(old_value + scrollbar.maximum() - old_maximum)
+            logger.debug(f"Paged in {len(older)} older messages")
+        finally:
+            self._paging = False
+
+    def set_theme(self, theme: str):
+        """Swap the highlight stylesheet; cached highlights are reused as-is"""
+        self.theme = theme
+        if self.highlighter is None:
+            return
+        self.document().setDefaultStyleSheet(self.highlighter.stylesheet(theme))
+        for entry in self.entries:
+            if entry.renderer is not None:
+                entry.renderer.rerender()
+            self._write_entry(entry)
+
+    def scroll_to_message(self, index: int):
+        """Scroll to a message and select it, paging it in if needed"""
+        if index < self.first_index:
+            self.page_in(self.first_index - index)
+        position = index - self.first_index
+        if not 0 <= position < len(self.entries):
+            return
+        frame = self.entries[position].frame
+        cursor = frame.firstCursorPosition()
+        cursor.setPosition(frame.lastPosition(), QTextCursor.MoveMode.KeepAnchor)
+        self.setTextCursor(cursor)
+        self.ensureCursorVisible()
+
+    def clear(self):
+        """Clear the transcript"""
+        self.entries = []
+        self.first_index = 0
+        super().clear()
+
+    def _on_store_changed(self, store, message):
+        if message is None:
+            self.clear()
+        else:
+            self.append_message(message["role"], message["content"])
+
+    def _on_scrolled(self, value: int):
+        if value == self.verticalScrollBar().minimum() and self.first_index > 0 and not self._paging:
+            self.page_in(self.page_size)
+
+    def _insert_entry(self, role: str, content: str, prepend: bool = False):
+        renderer = None
+        if role == "assistant":
+            renderer = MarkdownRenderer(self.highlighter)
+            renderer.feed(content)
+            renderer.finish()
+
+        cursor = QTextCursor(self.document())
+        if prepend and self.entries:
+            cursor.setPosition(self.entries[0].frame.firstPosition() - 1)
+        else:
+            cursor.movePosition(QTextCursor.MoveOperation.End)
+        frame_format = QTextFrameFormat()
+        frame_format.setTopMargin(8)
+        frame = cursor.insertFrame(frame_format)
+
+        entry = MessageEntry(role, frame, renderer, content)
+        if prepend:
+            self.entries.insert(0, entry)
+        else:
+            self.entries.append(entry)
+        self._write_entry(entry)
+
+    def _trim(self):
+        """Drop the oldest frames while the document exceeds the scrollback window"""
+        if self.max_messages is None:
+            return
+        self._paging = True
+        removed = 0
+        while len(self.entries) > 1 and (
+            len(self.entries) > self.max_messages
+            or self.document().characterCount() > self.max_chars
+        ):
+            frame = self.entries.pop(0).frame
+            cursor = QTextCursor(self.document())
+            cursor.setPosition(frame.firstPosition() - 1)
+            cursor.setPosition(frame.lastPosition() + 1, QTextCursor.MoveMode.KeepAnchor)
+            cursor.removeSelectedText()
+            removed += 1
+        self.first_index += removed
+        self._paging = False
+
+    def _on_highlighted(self, digest: str):
+        scrollbar = self.verticalScrollBar()
+        at_bottom = scrollbar.value() == scrollbar.maximum()
+        position = scrollbar.value()
+        for entry in self.entries:
+            if entry.renderer is not None and entry.renderer.refresh(digest):
+                self._write_entry(entry)
+        scrollbar.setValue(scrollbar.maximum() if at_bottom else position)
+
+    def _write_entry(self, entry: MessageEntry):
+        label = f"<b>{html.escape(ROLE_LABELS.get(entry.role, entry.role.title()))}:</b> "
+        if entry.renderer is not None:
+            body = entry.renderer.html()
+        else:
+            body = f"<p>{render_plain(entry.content)}</p>"
+
+        # Keep the role label on the first line when the message opens with a paragraph
+        if body.startswith("<p>"):
+            body = f"<p>{label}{body[3:]}"
+        else:
+            body = f"<p>{label}</p>{body}"
+
+        cursor = entry.frame.firstCursorPosition()
+        cursor.setPosition(entry.frame.lastPosition(), QTextCursor.MoveMode.KeepAnchor)
+        cursor.insertHtml(body)
+
+    def _scroll_to_bottom(self):
+        scrollbar = self.verticalScrollBar()
+        scrollbar.setValue(scrollbar.maximum())
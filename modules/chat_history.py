@@ -1,20 +1,106 @@
+from collections import deque
+from contextlib import contextmanager
 import json
 import os
 from datetime import datetime
 from typing import List, Dict, Optional
 import logging
-import shutil
+import queue
+import tempfile
+import threading
+import time
+
+from .blob_store import DEFAULT_THRESHOLD, BlobStore
+from .history_search import FTS5_AVAILABLE, HistorySearch
+from .history_sync import ChangeLog, HistoryLock
+from .session_archive import SessionArchive
+from .session_export import FILE_FORMATS, BulkExporter, render_lines
+from .session_journal import SessionJournal
+from .session_manifest import SessionManifest
+from .session_pager import MESSAGES_OPENER, PagedMessages, Segment, SessionPager, encode_snapshot
+from .sqlite_history import SQLiteHistoryStore
 
 logger = logging.getLogger("main.history")
 
+# A journal is compacted into its snapshot once it holds at least this many
+# records and at least as many records as the snapshot itself
+COMPACT_MIN_RECORDS = 64
+
+# Changes by other processes kept for poll_changes; older ones are dropped
+MAX_PENDING_CHANGES = 10000
+
 
 class ChatHistory:
-    def __init__(self, storage_dir: str = "chat_history/chat_history"):
+    """Saved chat sessions, stored as one JSON file each or in a SQLite database.
+
+    With ``backend="sqlite"`` sessions live in ``history.db`` inside the
+    storage directory; existing JSON session files are imported by
+    ``import_json_sessions`` and left in place.
+
+    With the JSON backend and ``journal=True``, saving a session that is
+    already on disk appends only its new messages to ``chat_<name>.journal``
+    instead of rewriting the snapshot. A background thread compacts large
+    journals back into the canonical ``chat_<name>.json`` snapshot; reads
+    merge the snapshot with any journal records.
+
+    JSON sessions untouched for a while can be moved into a compressed
+    ``SessionArchive`` by ``archive_old_sessions``; reading, listing and
+    exporting them works as before, and saving one again restores it.
+
+    JSON sessions keep message bodies of ``dedup_threshold`` characters or
+    more in a content-addressed ``BlobStore``, so repeated prompts and
+    documents are stored once; reads put the bodies back transparently.
+
+    Several processes can share a storage directory: JSON reads and writes
+    hold a ``HistoryLock`` (shared or exclusive) and every change is
+    recorded in a ``ChangeLog``. Other processes pick changes up from the
+    log to drop stale journal state, keep their session listing current
+    without rescanning the directory, and report them via ``poll_changes``.
+    """
+
+    def __init__(self, storage_dir: str = "chat_history/chat_history", backend: str = "json",
+                 journal: bool = True, fsync_policy: str = "batch", dedup_threshold: int = DEFAULT_THRESHOLD):
         self.storage_dir = storage_dir
         self.current_session = []
         self.session_name = None
         self.ensure_storage_exists()
-        logger.info(f"Chat history initialized with storage at {storage_dir}")
+        self.backend = backend
+        self.store = None
+        self.manifest = SessionManifest(storage_dir)
+        self.archive = SessionArchive(storage_dir)
+        self.blobs = BlobStore(os.path.join(storage_dir, "blobs"), dedup_threshold if backend == "json" else 0)
+
+        # Journaled persistence for the JSON backend
+        self.journal = journal and backend == "json"
+        self.fsync_policy = fsync_policy
+        self.bytes_written = 0
+        self._journals: Dict[str, SessionJournal] = {}
+        self._persisted: Dict[str, int] = {}
+        self._journal_lock = threading.RLock()
+        self._compact_queue: queue.Queue = queue.Queue()
+        self._compact_pending = set()
+        self._compactor: Optional[threading.Thread] = None
+
+        if backend == "sqlite":
+            self.store = SQLiteHistoryStore(os.path.join(storage_dir, "history.db"))
+
+        # Coordination with other processes using the same directory
+        self.lock = HistoryLock(storage_dir)
+        self.changes = ChangeLog(storage_dir)
+        self._change_cursor = self.changes.cursor()
+        self._changes_lock = threading.Lock()
+        self._foreign_changes: deque = deque(maxlen=MAX_PENDING_CHANGES)
+        self._listing: Optional[Dict[str, Dict]] = None
+        self._listing_stale = set()
+        self._listing_lock = threading.Lock()
+
+        # Full-text index over all saved messages, kept up to date on save
+        self.search: Optional[HistorySearch] = None
+        if FTS5_AVAILABLE:
+            self.search = HistorySearch(os.path.join(storage_dir, "search.db"))
+        else:
+            logger.warning("SQLite FTS5 is not available; full-text history search is disabled")
+        logger.info(f"Chat history initialized with {backend} storage at {storage_dir}")
 
     def ensure_storage_exists(self):
         """Create storage directory if it doesn't exist"""
@@ -30,11 +116,21 @@ class ChatHistory:
             "timestamp": datetime.now().isoformat(),
         }
         self.current_session.append(message)
+        if self.journal and self.session_name and self._append_to_journal(self.session_name):
+            self._index_for_search(self.session_name, self.current_session)
         logger.debug(f"Added message from {role}")
 
-    def save_session(self, session_name: Optional[str] = None):
-        """Save current session to file"""
-        if not self.current_session or (len(self.current_session) == 1 and self.current_session[0]['content'].startswith("Welcome to")):
+    def save_session(self, session_name: Optional[str] = None, metadata: Optional[Dict] = None,
+                     messages: Optional[List[Dict]] = None):
+        """Save current session to file, merging any extra metadata (e.g. model).
+
+        Passing ``messages`` saves that conversation instead and leaves the
+        current session alone, which lets a background thread save safely.
+        """
+        current = messages is None
+        if current:
+            messages = self.current_session
+        if not messages or (len(messages) == 1 and messages[0]['content'].startswith("Welcome to")):
             logger.debug("No meaningful messages to save")
             return
 
@@ -42,76 +138,303 @@ class ChatHistory:
             session_name = datetime.now().strftime("%Y%m%d_%H%M%S")
 
         try:
-            filename = os.path.join(self.storage_dir, f"chat_{session_name}.json")
+            if self.store is not None:
+                self.store.save_session(session_name, messages, metadata)
+                with self.lock.exclusive():
+                    self.changes.record("save", session_name)
+                if current:
+                    self.session_name = session_name
+                self._index_for_search(session_name, messages, metadata)
+                logger.info(f"Saved session {session_name} to {self.store.db_path}")
+                return True
 
-            with open(filename, "w", encoding="utf-8") as f:
-                json.dump(
-                    {
-                        "session_name": session_name,
-                        "messages": self.current_session,
-                        "metadata": {
-                            "created_at": datetime.now().isoformat(),
-                            "message_count": len(self.current_session),
-                            "last_modified": datetime.now().isoformat(),
-                        },
+            if self.journal and self._append_to_journal(session_name, messages):
+                if current:
+                    self.session_name = session_name
+                self._index_for_search(session_name, messages, metadata)
+                logger.debug(f"Journaled session {session_name}")
+                return True
+
+            filename = self._snapshot_path(session_name)
+            with self._journal_lock, self.lock.exclusive():
+                # Keep metadata set separately (e.g. a star) when the session is rewritten
+                previous = self._read_metadata(session_name)
+                data = {
+                    "session_name": session_name,
+                    "messages": messages,
+                    "metadata": {
+                        **previous,
+                        "created_at": previous.get("created_at") or datetime.now().isoformat(),
+                        "message_count": len(messages),
+                        "last_modified": datetime.now().isoformat(),
+                        **(metadata or {}),
                     },
-                    f,
-                    indent=2,
-                )
+                }
+                self._write_snapshot(filename, data)
+                self._discard_journal(session_name)
+                self._persisted[session_name] = len(messages)
+                if session_name in self.archive:
+                    self.archive.remove(session_name)
+                self.changes.record("save", session_name)
 
-            self.session_name = session_name
+            if current:
+                self.session_name = session_name
+            self._index_for_search(session_name, messages, metadata)
             logger.info(f"Saved session to {filename}")
             return True
         except Exception as e:
             logger.error(f"Failed to save session: {e}")
             return False
 
-    def load_session(self, session_name: str) -> bool:
-        """Load a specific session"""
-        filename = os.path.join(self.storage_dir, f"chat_{session_name}.json")
+    def save_sessions(self, sessions: List[Dict]) -> int:
+        """Save many sessions, given in the session file shape, as one batch.
+
+        SQLite writes them in a single transaction; JSON files are written
+        under one hold of the history lock. The search index is updated in
+        one batch either way. Returns how many sessions were saved.
+        """
+        if not sessions:
+            return 0
+        if self.store is not None:
+            self.store.save_sessions(sessions)
+            with self.lock.exclusive():
+                for data in sessions:
+                    self.changes.record("save", data["session_name"])
+        else:
+            now = datetime.now().isoformat()
+            with self._journal_lock, self.lock.exclusive(), self.blobs.batch():
+                for data in sessions:
+                    session_name = data["session_name"]
+                    messages = data.get("messages", [])
+                    data = {
+                        "session_name": session_name,
+                        "messages": messages,
+                        "metadata": {"created_at": now, "last_modified": now, **data.get("metadata", {}),
+                                     "message_count": len(messages)},
+                    }
+                    self._write_snapshot(self._snapshot_path(session_name), data)
+                    self._discard_journal(session_name)
+                    self._persisted[session_name] = len(messages)
+                    if session_name in self.archive:
+                        self.archive.remove(session_name)
+                    self.changes.record("save", session_name)
+
+        if self.search is not None:
+            try:
+                self.search.index_sessions(
+                    (data["session_name"], data.get("messages", []), data.get("metadata", {}).get("model"))
+                    for data in sessions
+                )
+            except Exception as e:
+                logger.error(f"Failed to index saved sessions for search: {e}")
+        return len(sessions)
+
+    def read_session(self, session_name: str) -> Optional[Dict]:
+        """Read a saved session without changing the current session"""
+        if self.store is not None:
+            try:
+                return self.store.read_session(session_name)
+            except Exception as e:
+                logger.error(f"Failed to read session {session_name}: {e}")
+                return None
+        return self._read_json_session(session_name)
+
+    def _read_json_session(self, session_name: str) -> Optional[Dict]:
+        """A JSON session: its snapshot with journal records merged, or its archived copy"""
+        filename = self._snapshot_path(session_name)
 
         if not os.path.exists(filename):
+            if session_name in self.archive:
+                try:
+                    data = self.archive.read(session_name)
+                    self.blobs.resolve(data.get("messages", []))
+                    return data
+                except Exception as e:
+                    logger.error(f"Failed to read archived session {session_name}: {e}")
+                    return None
             logger.warning(f"Session file not found: {filename}")
-            return False
+            return None
 
         try:
-            with open(filename, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                self.current_session = data.get("messages", [])
-                self.session_name = session_name
-                logger.info(f"Loaded session from {filename}")
-                return True
+            with self._journal_lock, self.lock.shared():
+                with open(filename, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                journaled = []
+                for path in (self._compacting_path(session_name), self._journal_path(session_name)):
+                    if os.path.exists(path):
+                        journaled.extend(SessionJournal.read(path))
+            if journaled:
+                self._merge_journal(data, journaled)
+            self.blobs.resolve(data.get("messages", []))
+            return data
         except Exception as e:
-            logger.error(f"Failed to load session: {e}")
+            logger.error(f"Failed to read session {session_name}: {e}")
+            return None
+
+    def import_json_sessions(self, store: Optional[SQLiteHistoryStore] = None) -> int:
+        """Import new or changed JSON sessions into the SQLite store (``store``, or this history's own).
+
+        Sessions are read the way the JSON backend reads them, so messages
+        still in a journal are imported with their snapshot, and archived
+        sessions are imported with their ``archived_at`` in the metadata.
+        """
+        store = store or self.store
+        if store is None:
+            return 0
+        try:
+            return store.import_sessions(self._json_import_sources())
+        except Exception as e:
+            logger.error(f"Failed to import JSON sessions: {e}")
+            return 0
+
+    def _json_import_sources(self):
+        """``(key, mtime, session_name, read)`` for every JSON session, for ``SQLiteHistoryStore.import_sessions``"""
+        for entry in os.scandir(self.storage_dir):
+            if not (entry.name.startswith("chat_") and entry.name.endswith(".json")):
+                continue
+            session_name = entry.name[len("chat_"):-len(".json")]
+            # Appending to the journal changes the session without touching its snapshot
+            mtime = max(
+                os.stat(path).st_mtime
+                for path in (entry.path, self._compacting_path(session_name), self._journal_path(session_name))
+                if os.path.exists(path)
+            )
+            yield entry.name, mtime, session_name, lambda name=session_name: self._read_json_session(name)
+
+        for entry in self.archive.list_entries():
+            details = self.archive.details(entry["name"])
+            if details is None or os.path.exists(self._snapshot_path(entry["name"])):
+                continue
+            path = os.path.join(self.archive.directory, details["file"])
+            yield (f"archive/{details['file']}", os.stat(path).st_mtime, entry["name"],
+                   lambda name=entry["name"], details=details: self._read_archived_for_import(name, details))
+
+    def _read_archived_for_import(self, session_name: str, details: Dict) -> Optional[Dict]:
+        data = self._read_json_session(session_name)
+        if data is not None:
+            data.setdefault("metadata", {})["archived_at"] = details["archived_at"]
+        return data
+
+    def index_for_search(self, session_name: str, data: Dict):
+        """Add a read session's new messages to the full-text index"""
+        self._index_for_search(session_name, data.get("messages", []), data.get("metadata"))
+
+    def update_search_index(self) -> int:
+        """Index every saved session's unindexed messages; returns how many were added"""
+        if self.search is None:
+            return 0
+
+        def changed_sessions():
+            for session in self.list_sessions():
+                if session["name"] and self.search.indexed_count(session["name"]) != session["message_count"]:
+                    data = self.read_session(session["name"])
+                    if data is not None:
+                        yield session["name"], data.get("messages", []), data.get("metadata", {}).get("model")
+
+        return self.search.index_sessions(changed_sessions())
+
+    def load_session(self, session_name: str) -> bool:
+        """Load a specific session"""
+        data = self.read_session(session_name)
+        if data is None:
             return False
 
+        self.current_session = data.get("messages", [])
+        self.session_name = session_name
+        logger.info(f"Loaded session {session_name}")
+        return True
+
+    def open_paged(self, session_name: str) -> Optional[PagedMessages]:
+        """Open a saved session for paged reading without loading its messages.
+
+        The returned sequence reads messages by offset on demand, so the
+        newest page or message N can be fetched without parsing the rest.
+        Its ``metadata`` holds the session metadata.
+        """
+        if self.store is not None:
+            info = self.store.session_info(session_name)
+            if info is None:
+                return None
+            return PagedMessages(
+                info["metadata"]["message_count"],
+                lambda start, end: self.store.read_range(session_name, start, end),
+                info["metadata"],
+            )
+
+        snapshot = self._snapshot_path(session_name)
+        if not os.path.exists(snapshot):
+            data = self.read_session(session_name)
+            if data is None:
+                return None
+            messages = data.get("messages", [])
+            return PagedMessages(len(messages), lambda start, end: messages[start:end], data.get("metadata"))
+
+        with self._journal_lock, self.lock.shared():
+            try:
+                with open(snapshot, "rb") as f:
+                    header = f.readline()
+                if not header.endswith(MESSAGES_OPENER):
+                    # Written before snapshots kept one message per line: rewrite it once
+                    with self.lock.exclusive():
+                        with open(snapshot, "r", encoding="utf-8") as f:
+                            self._write_snapshot(snapshot, json.load(f))
+                        with open(snapshot, "rb") as f:
+                            header = f.readline()
+                metadata = json.loads(header.rstrip() + b"]}").get("metadata", {})
+                return SessionPager(lambda: self._session_segments(session_name), metadata, self.blobs.resolve)
+            except Exception as e:
+                logger.error(f"Failed to open session {session_name} for paging: {e}")
+                return None
+
     def list_sessions(self) -> List[Dict[str, str]]:
-        """List all available chat sessions with metadata"""
-        sessions = []
-        for filename in os.listdir(self.storage_dir):
-            if filename.startswith("chat_") and filename.endswith(".json"):
-                try:
-                    filepath = os.path.join(self.storage_dir, filename)
-                    with open(filepath, "r", encoding="utf-8") as f:
-                        data = json.load(f)
-                        sessions.append(
-                            {
-                                "name": data.get("session_name"),
-                                "created_at": data.get("metadata", {}).get(
-                                    "created_at"
-                                ),
-                                "message_count": data.get("metadata", {}).get(
-                                    "message_count", 0
-                                ),
-                                "last_modified": data.get("metadata", {}).get(
-                                    "last_modified"
-                                ),
-                            }
-                        )
-                except Exception as e:
-                    logger.error(f"Error reading session file {filename}: {e}")
+        """List all available chat sessions with metadata.
+
+        The first listing scans the directory; later ones only refresh the
+        sessions named in the change log since, whichever process wrote them.
+        """
+        if self.store is not None:
+            return self.store.list_sessions()
+
+        with self._listing_lock:
+            self._drain_changes()
+            if self._listing is None:
+                self._listing_stale.clear()
+                sessions = self.manifest.list_entries()
+                if self.journal:
+                    self._apply_journals(sessions)
+                live = {session["name"] for session in sessions}
+                sessions.extend(entry for entry in self.archive.list_entries() if entry["name"] not in live)
+                self._listing = {session["name"]: session for session in sessions}
+            else:
+                for session_name in self._listing_stale:
+                    entry = self._list_entry(session_name)
+                    if entry is None:
+                        self._listing.pop(session_name, None)
+                    else:
+                        self._listing[session_name] = entry
+                self._listing_stale.clear()
+            sessions = [dict(session) for session in self._listing.values()]
+        return sorted(sessions, key=lambda x: x.get("last_modified") or "", reverse=True)
+
+    @contextmanager
+    def transaction(self):
+        """Hold the history lock exclusively across several calls (e.g. read, modify, save a session)"""
+        with self._journal_lock, self.lock.exclusive():
+            yield
+
+    def poll_changes(self) -> List[Dict]:
+        """Session changes made by other processes since the last call.
 
-        return sorted(sessions, key=lambda x: x.get("last_modified", ""), reverse=True)
+        Each change has ``op`` (save, append, compact, delete, archive) and
+        ``session``; an ``op`` of "reset" means changes were missed and
+        everything should be reloaded. Costs one ``stat`` when nothing changed.
+        """
+        if self.changes.changed(self._change_cursor):
+            self._drain_changes()
+        with self._changes_lock:
+            changes = list(self._foreign_changes)
+            self._foreign_changes.clear()
+        return changes
 
     def export_session(self, format: str = "txt") -> Optional[str]:
         """Export current session in various formats"""
@@ -124,31 +447,22 @@ class ChatHistory:
             export_dir = os.path.join(self.storage_dir, "exports")
             os.makedirs(export_dir, exist_ok=True)
 
-            if format == "txt":
-                filename = os.path.join(export_dir, f"chat_{session_name}.txt")
-                with open(filename, "w", encoding="utf-8") as f:
-                    for msg in self.current_session:
-                        f.write(f"{msg['role'].upper()}: {msg['content']}\n\n")
-
-            elif format == "markdown":
-                filename = os.path.join(export_dir, f"chat_{session_name}.md")
-                with open(filename, "w", encoding="utf-8") as f:
-                    f.write(f"# Chat Session: {session_name}\n\n")
-                    for msg in self.current_session:
-                        f.write(f"### {msg['role'].title()}\n")
-                        f.write(f"{msg['content']}\n\n")
-
-            elif format == "json":
-                filename = os.path.join(export_dir, f"chat_{session_name}_export.json")
-                shutil.copy2(
-                    os.path.join(self.storage_dir, f"chat_{session_name}.json"),
-                    filename,
-                )
-
-            else:
+            if format not in FILE_FORMATS:
                 logger.error(f"Unsupported export format: {format}")
                 return None
 
+            # Exported from memory, so unsaved and archived sessions work too
+            data = {
+                "session_name": session_name,
+                "messages": self.current_session,
+                "metadata": {"message_count": len(self.current_session), "exported_at": datetime.now().isoformat()},
+            }
+            suffix = "_export.json" if format == "json" else FILE_FORMATS[format]
+            filename = os.path.join(export_dir, f"chat_{session_name}{suffix}")
+            with open(filename, "w", encoding="utf-8") as f:
+                for chunk in render_lines(data, format):
+                    f.write(chunk)
+
             logger.info(f"Exported session to {filename}")
             return filename
 
@@ -156,6 +470,12 @@ class ChatHistory:
             logger.error(f"Failed to export session: {e}")
             return None
 
+    def export_sessions(
+        self, session_names: List[str], format: str, destination: str, workers: int = 4, **kwargs
+    ) -> Dict:
+        """Stream saved sessions to txt/markdown/json files, a JSONL file or a tar/zip archive"""
+        return BulkExporter(self, workers=workers).export(session_names, format, destination, **kwargs)
+
     def clear_session(self):
         """Clear the current session"""
         self.current_session = []
@@ -164,19 +484,95 @@ class ChatHistory:
 
     def delete_session(self, session_name: str) -> bool:
         """Delete a saved session"""
+        if self.search is not None:
+            self.search.remove_session(session_name)
         try:
-            filename = os.path.join(self.storage_dir, f"chat_{session_name}.json")
-            if os.path.exists(filename):
-                os.remove(filename)
-                logger.info(f"Deleted session {session_name}")
-                return True
-            else:
-                logger.warning(f"Session {session_name} not found")
-                return False
+            if self.store is not None:
+                deleted = self.store.delete_session(session_name)
+                if deleted:
+                    with self.lock.exclusive():
+                        self.changes.record("delete", session_name)
+                    logger.info(f"Deleted session {session_name}")
+                else:
+                    logger.warning(f"Session {session_name} not found")
+                return deleted
+
+            filename = self._snapshot_path(session_name)
+            with self._journal_lock, self.lock.exclusive():
+                self._discard_journal(session_name)
+                self._persisted.pop(session_name, None)
+                if self.archive.remove(session_name):
+                    deleted = "archived session"
+                elif os.path.exists(filename):
+                    os.remove(filename)
+                    self.manifest.remove(os.path.basename(filename))
+                    deleted = "session"
+                else:
+                    logger.warning(f"Session {session_name} not found")
+                    return False
+                self.changes.record("delete", session_name)
+                self.blobs.release(session_name)
+            logger.info(f"Deleted {deleted} {session_name}")
+            return True
         except Exception as e:
             logger.error(f"Failed to delete session: {e}")
             return False
 
+    def set_starred(self, session_name: str, starred: bool = True) -> bool:
+        """Star a saved session (or remove its star); starred sessions are kept by retention"""
+        if self.store is not None:
+            if not self.store.update_metadata(session_name, {"starred": starred}):
+                return False
+            with self.lock.exclusive():
+                self.changes.record("save", session_name)
+            return True
+
+        snapshot = self._snapshot_path(session_name)
+        try:
+            if os.path.exists(snapshot):
+                self.compact_session(session_name)
+                with self._journal_lock, self.lock.exclusive():
+                    with open(snapshot, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    data.setdefault("metadata", {})["starred"] = starred
+                    self._write_snapshot(snapshot, data)
+                    self.changes.record("save", session_name)
+                return True
+            if session_name in self.archive:
+                # Starring an archived session brings it back
+                with self._journal_lock, self.lock.exclusive():
+                    data = self.read_session(session_name)
+                    data.setdefault("metadata", {})["starred"] = starred
+                    self._write_snapshot(snapshot, data)
+                    self.archive.remove(session_name)
+                    self.changes.record("save", session_name)
+                return True
+        except Exception as e:
+            logger.error(f"Failed to star session {session_name}: {e}")
+            return False
+        logger.warning(f"Session {session_name} not found")
+        return False
+
+    def session_sizes(self) -> Dict[str, int]:
+        """Bytes on disk of every saved session (compressed size for archived ones)"""
+        if self.store is not None:
+            return self.store.session_sizes()
+
+        sizes = self.archive.sizes()
+        for entry in os.scandir(self.storage_dir):
+            name = entry.name
+            if not name.startswith("chat_"):
+                continue
+            for suffix in (".json", ".journal", ".journal.compacting"):
+                if name.endswith(suffix):
+                    session_name = name[len("chat_"):-len(suffix)]
+                    try:
+                        sizes[session_name] = sizes.get(session_name, 0) + entry.stat().st_size
+                    except OSError:
+                        pass
+                    break
+        return sizes
+
     def get_session_stats(self) -> Dict:
         """Get statistics about the current session"""
         if not self.current_session:
@@ -199,3 +595,300 @@ class ChatHistory:
             "ai_messages": ai_messages,
             "average_message_length": total_length / len(self.current_session),
         }
+
+    def archive_old_sessions(self, max_age_days: float) -> Dict:
+        """Move JSON sessions untouched for ``max_age_days`` into the compressed archive"""
+        report = {"sessions": 0, "original_bytes": 0, "compressed_bytes": 0}
+        if self.store is not None or max_age_days <= 0:
+            return report
+
+        cutoff = time.time() - max_age_days * 86400
+        for entry in os.scandir(self.storage_dir):
+            if not (entry.name.startswith("chat_") and entry.name.endswith(".json")):
+                continue
+            try:
+                if entry.stat().st_mtime > cutoff:
+                    continue
+                session_name = entry.name[len("chat_"):-len(".json")]
+                with self._journal_lock, self.lock.exclusive():
+                    # Sessions with journal records are still in use
+                    if session_name in self._journals or os.path.exists(self._journal_path(session_name)) \
+                            or os.path.exists(self._compacting_path(session_name)) \
+                            or os.stat(entry.path).st_mtime > cutoff:
+                        continue
+                    with open(entry.path, "rb") as f:
+                        raw = f.read()
+                    item = self.archive.add(session_name, raw, json.loads(raw))
+                    os.remove(entry.path)
+                    self._persisted.pop(session_name, None)
+                    self.changes.record("archive", session_name)
+            except Exception as e:
+                logger.error(f"Failed to archive {entry.name}: {e}")
+                continue
+            report["sessions"] += 1
+            report["original_bytes"] += item["original_size"]
+            report["compressed_bytes"] += item["compressed_size"]
+
+        if report["sessions"]:
+            logger.info(
+                f"Archived {report['sessions']} sessions: {report['original_bytes'] / 1024:.0f} KB "
+                f"-> {report['compressed_bytes'] / 1024:.0f} KB ({self.archive.codec})"
+            )
+        return report
+
+    def compact_session(self, session_name: str) -> bool:
+        """Fold a session's journal into its snapshot; returns False if there was nothing to do"""
+        snapshot = self._snapshot_path(session_name)
+        compacting = self._compacting_path(session_name)
+
+        # Move the journal aside so new appends start a fresh one
+        with self._journal_lock, self.lock.exclusive():
+            journal = self._journals.pop(session_name, None)
+            if journal is not None:
+                journal.close()
+            if not os.path.exists(compacting):
+                if not os.path.exists(self._journal_path(session_name)):
+                    return False
+                os.replace(self._journal_path(session_name), compacting)
+                # Other processes drop their handle on the moved journal
+                self.changes.record("compact", session_name)
+
+        with open(snapshot, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        records = SessionJournal.read(compacting)
+        self._merge_journal(data, records)
+
+        with self._journal_lock, self.lock.exclusive():
+            if not os.path.exists(compacting):
+                # The session was rewritten or deleted meanwhile
+                return False
+            self._write_snapshot(snapshot, data)
+            os.remove(compacting)
+        logger.debug(f"Compacted {len(records)} journal records into {snapshot}")
+        return True
+
+    def deduplicate_sessions(self, session_names: List[str]) -> int:
+        """Rewrite JSON sessions so their large message bodies move into the blob store"""
+        if self.store is not None:
+            return 0
+        rewritten = 0
+        for session_name in session_names:
+            snapshot = self._snapshot_path(session_name)
+            if not os.path.exists(snapshot):
+                continue
+            self.compact_session(session_name)
+            with self._journal_lock, self.lock.exclusive():
+                with open(snapshot, "r", encoding="utf-8") as f:
+                    self._write_snapshot(snapshot, json.load(f))
+                self.changes.record("save", session_name)
+            rewritten += 1
+        return rewritten
+
+    def wait_for_compaction(self):
+        """Block until scheduled compactions have finished"""
+        self._compact_queue.join()
+
+    def close(self):
+        """Sync open journals and stop the compaction thread"""
+        with self._journal_lock:
+            for journal in self._journals.values():
+                journal.close()
+            self._journals.clear()
+        self.blobs.close()
+        self.lock.close()
+        if self._compactor is not None:
+            self._compact_queue.put(None)
+            self._compactor = None
+
+    def _index_for_search(self, session_name: str, messages: List[Dict], metadata: Optional[Dict] = None):
+        if self.search is None:
+            return
+        try:
+            self.search.index_session(session_name, messages, (metadata or {}).get("model"))
+        except Exception as e:
+            logger.error(f"Failed to index session {session_name} for search: {e}")
+
+    def _read_metadata(self, session_name: str) -> Dict:
+        """Metadata of a session snapshot from its header line, or {} if there is none"""
+        try:
+            with open(self._snapshot_path(session_name), "rb") as f:
+                header = f.readline()
+            if header.endswith(MESSAGES_OPENER):
+                return json.loads(header.rstrip() + b"]}").get("metadata", {})
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def _snapshot_path(self, session_name: str) -> str:
+        return os.path.join(self.storage_dir, f"chat_{session_name}.json")
+
+    def _journal_path(self, session_name: str) -> str:
+        return os.path.join(self.storage_dir, f"chat_{session_name}.journal")
+
+    def _compacting_path(self, session_name: str) -> str:
+        return os.path.join(self.storage_dir, f"chat_{session_name}.journal.compacting")
+
+    def _write_snapshot(self, filename: str, data: Dict):
+        """Atomically replace a snapshot file (temp file + rename)"""
+        session_name = os.path.basename(filename)[len("chat_"):-len(".json")]
+        encoded = encode_snapshot({**data, "messages": self.blobs.store(session_name, data.get("messages", []))})
+        fd, temp_path = tempfile.mkstemp(prefix=".chat_", suffix=".tmp", dir=self.storage_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(encoded)
+                if self.fsync_policy != "none":
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(temp_path, filename)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        self.bytes_written += len(encoded)
+        self.manifest.update(os.path.basename(filename), data)
+
+    def _append_to_journal(self, session_name: str, messages: Optional[List[Dict]] = None) -> bool:
+        """Append messages not yet on disk to the session's journal.
+
+        Returns False when the session has to be written as a full snapshot
+        instead (it is new, or the conversation no longer extends what was saved).
+        """
+        if messages is None:
+            messages = self.current_session
+        with self._journal_lock, self.lock.exclusive():
+            # Another process may have written this session since we last did
+            self._drain_changes()
+            persisted = self._persisted.get(session_name)
+            if persisted is None:
+                data = self.read_session(session_name) if os.path.exists(self._snapshot_path(session_name)) else None
+                if data is None:
+                    return False
+                persisted = len(data.get("messages", []))
+            if persisted == 0 or persisted > len(messages):
+                return False
+
+            new_messages = messages[persisted:]
+            self._persisted[session_name] = len(messages)
+            if not new_messages:
+                return True
+
+            journal = self._journals.get(session_name)
+            if journal is None:
+                journal = SessionJournal(self._journal_path(session_name), self.fsync_policy)
+                self._journals[session_name] = journal
+            self.bytes_written += journal.append(self.blobs.store(session_name, new_messages, append=True))
+            self.changes.record("append", session_name)
+
+            snapshot_records = len(messages) - journal.records
+            if journal.records >= max(COMPACT_MIN_RECORDS, snapshot_records):
+                self._schedule_compaction(session_name)
+            return True
+
+    def _discard_journal(self, session_name: str):
+        journal = self._journals.pop(session_name, None)
+        if journal is not None:
+            journal.close()
+        for path in (self._journal_path(session_name), self._compacting_path(session_name)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _session_segments(self, session_name: str) -> List[Segment]:
+        """Snapshot and journal segments of a session, oldest first"""
+        with self._journal_lock, self.lock.shared():
+            segments = [Segment(self._snapshot_path(session_name), snapshot=True)]
+            for path in (self._compacting_path(session_name), self._journal_path(session_name)):
+                if os.path.exists(path):
+                    segments.append(Segment(path, snapshot=False))
+            return segments
+
+    def _merge_journal(self, data: Dict, records: List[Dict]):
+        data.setdefault("messages", []).extend(records)
+        metadata = data.setdefault("metadata", {})
+        metadata["message_count"] = len(data["messages"])
+        if records:
+            metadata["last_modified"] = records[-1].get("timestamp") or metadata.get("last_modified")
+
+    def _apply_journals(self, sessions: List[Dict], session_names: Optional[List[str]] = None):
+        """Update listing entries with messages that are still only in journals"""
+        journaled = {}
+        with self._journal_lock, self.lock.shared():
+            if session_names is None:
+                paths = [
+                    entry.path for entry in os.scandir(self.storage_dir)
+                    if entry.name.startswith("chat_") and entry.name.endswith((".journal", ".journal.compacting"))
+                ]
+            else:
+                paths = [
+                    path for name in session_names
+                    for path in (self._compacting_path(name), self._journal_path(name)) if os.path.exists(path)
+                ]
+            # Records being compacted are older than the live journal
+            for path in sorted(paths, key=lambda path: not path.endswith(".compacting")):
+                session_name = os.path.basename(path)[len("chat_"):].split(".journal")[0]
+                journaled.setdefault(session_name, []).extend(SessionJournal.read(path))
+        if not journaled:
+            return
+        for session in sessions:
+            records = journaled.get(session["name"])
+            if records:
+                session["message_count"] = (session.get("message_count") or 0) + len(records)
+                session["last_modified"] = records[-1].get("timestamp") or session.get("last_modified")
+
+    def _list_entry(self, session_name: str) -> Optional[Dict]:
+        """Current listing entry of one session, or None if it no longer exists"""
+        entry = self.manifest.entry(f"chat_{session_name}.json")
+        if entry is None:
+            return self.archive.entry(session_name)
+        if self.journal:
+            self._apply_journals([entry], [session_name])
+        return entry
+
+    def _drain_changes(self):
+        """Read new change log records and drop state other processes' changes made stale"""
+        with self._changes_lock:
+            changes, self._change_cursor = self.changes.read_since(self._change_cursor)
+            if changes is None:
+                # The log was started afresh and changes may have been missed
+                self._listing = None
+                self._foreign_changes.append({"op": "reset", "session": None})
+                changes = []
+                stale = None
+            else:
+                stale = set()
+            for change in changes:
+                self._listing_stale.add(change["session"])
+                if change.get("writer") != self.changes.writer:
+                    self._foreign_changes.append(change)
+                    if stale is not None:
+                        stale.add(change["session"])
+
+        if stale is None or stale:
+            with self._journal_lock:
+                for session_name in list(self._persisted if stale is None else stale):
+                    self._persisted.pop(session_name, None)
+                for session_name in list(self._journals if stale is None else stale):
+                    journal = self._journals.pop(session_name, None)
+                    if journal is not None:
+                        journal.close()
+
+    def _schedule_compaction(self, session_name: str):
+        if session_name in self._compact_pending:
+            return
+        self._compact_pending.add(session_name)
+        if self._compactor is None:
+            self._compactor = threading.Thread(target=self._compact_loop, name="history-compactor", daemon=True)
+            self._compactor.start()
+        self._compact_queue.put(session_name)
+
+    def _compact_loop(self):
+        while True:
+            session_name = self._compact_queue.get()
+            try:
+                if session_name is None:
+                    return
+                with self._journal_lock:
+                    self._compact_pending.discard(session_name)
+                self.compact_session(session_name)
+            except Exception as e:
+                logger.error(f"Failed to compact session {session_name}: {e}")
+            finally:
+                self._compact_queue.task_done()
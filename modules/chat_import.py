@@ -0,0 +1,351 @@
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import codecs
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+import zipfile
+
+logger = logging.getLogger("main.history.import")
+
+CHUNK_SIZE = 1024 * 1024
+BATCH_SESSIONS = 500
+# A batch is also committed once its messages hold this many characters
+BATCH_CHARS = 32 * 1024 * 1024
+
+# Larger records are treated as a corrupt file rather than read into memory
+MAX_RECORD_CHARS = 512 * 1024 * 1024
+
+# Member holding the conversations in an OpenAI data export archive
+OPENAI_MEMBER = "conversations.json"
+
+
+def iter_json_array(f, offset: int = 0, chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[object, int]]:
+    """Yield ``(element, end_offset)`` for each element of a top-level JSON array in a binary file.
+
+    Only one element is held in memory at a time. ``end_offset`` is the
+    byte offset just past the element, so a later call with that
+    ``offset`` continues with the next one.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")()
+    f.seek(offset)
+    buffer = ""
+    index = 0
+    position = offset
+    started = offset > 0
+    read_size = chunk_size
+    eof = False
+
+    def fill() -> bool:
+        # Drop what has been consumed, then append the next chunk
+        nonlocal buffer, index, eof
+        if eof:
+            return False
+        data = f.read(read_size)
+        eof = not data
+        buffer = buffer[index:] + text.decode(data, final=eof)
+        index = 0
+        return bool(data)
+
+    while True:
+        # Skip whitespace, the opening bracket and separators
+        skipped = index
+        while True:
+            while index < len(buffer) and buffer[index] in " \t\r\n,\ufeff" + ("" if started else "["):
+                if buffer[index] == "[":
+                    started = True
+                index += 1
+            position += len(buffer[skipped:index].encode("utf-8"))
+            if index < len(buffer) or not fill():
+                break
+            skipped = index
+        if index >= len(buffer) or buffer[index] == "]":
+            return
+        if not started:
+            raise ValueError("Expected a JSON array of conversations")
+
+        try:
+            element, end = decoder.raw_decode(buffer, index)
+        except json.JSONDecodeError:
+            # Incomplete element: read more, doubling so large elements are parsed a bounded number of times
+            if len(buffer) - index > MAX_RECORD_CHARS or not fill():
+                raise
+            read_size = min(read_size * 2, 256 * chunk_size)
+            continue
+        read_size = chunk_size
+        position += len(buffer[index:end].encode("utf-8"))
+        index = end
+        yield element, position
+
+
+def _iso(value) -> Optional[str]:
+    """ISO timestamp from epoch seconds (or milliseconds) or an ISO string"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        return value
+    if value > 1e11:
+        value /= 1000
+    return datetime.fromtimestamp(value).isoformat()
+
+
+def convert_openai(conversation: Dict) -> Optional[Dict]:
+    """Session from an OpenAI (ChatGPT) export conversation, following the displayed branch"""
+    mapping = conversation.get("mapping") or {}
+    node_id = conversation.get("current_node")
+    if node_id not in mapping:
+        # No current node recorded: follow the last child from the root
+        roots = [key for key, node in mapping.items() if not node.get("parent")]
+        node_id = roots[0] if roots else None
+        while node_id in mapping and mapping[node_id].get("children"):
+            node_id = mapping[node_id]["children"][-1]
+
+    chain = []
+    seen = set()
+    while node_id in mapping and node_id not in seen:
+        seen.add(node_id)
+        chain.append(mapping[node_id])
+        node_id = mapping[node_id].get("parent")
+
+    messages = []
+    model = conversation.get("default_model_slug")
+    for node in reversed(chain):
+        message = node.get("message") or {}
+        role = (message.get("author") or {}).get("role")
+        content = message.get("content") or {}
+        parts = [part for part in content.get("parts") or [] if isinstance(part, str)]
+        text = "\n".join(parts).strip() or (content.get("text") or "").strip()
+        if role not in ("user", "assistant") or not text:
+            continue
+        entry = {"role": role, "content": text, "timestamp": _iso(message.get("create_time"))}
+        slug = (message.get("metadata") or {}).get("model_slug")
+        if role == "assistant" and slug:
+            entry["model"] = slug
+            model = model or slug
+        messages.append(entry)
+
+    conversation_id = conversation.get("conversation_id") or conversation.get("id")
+    return _session("openai", conversation_id, conversation.get("title"), model, messages,
+                    conversation.get("create_time"), conversation.get("update_time"))
+
+
+def convert_openwebui(chat: Dict) -> Optional[Dict]:
+    """Session from an Open WebUI (formerly Ollama WebUI) chat export, following the displayed branch"""
+    body = chat.get("chat") or {}
+    history = body.get("history") or {}
+    nodes = history.get("messages") or {}
+    raw = []
+    node_id = history.get("currentId")
+    seen = set()
+    while node_id in nodes and node_id not in seen:
+        seen.add(node_id)
+        raw.append(nodes[node_id])
+        node_id = nodes[node_id].get("parentId")
+    raw = list(reversed(raw)) or body.get("messages") or []
+
+    messages = []
+    for message in raw:
+        role = message.get("role")
+        content = message.get("content")
+        if role not in ("user", "assistant") or not isinstance(content, str) or not content.strip():
+            continue
+        entry = {"role": role, "content": content, "timestamp": _iso(message.get("timestamp"))}
+        if role == "assistant" and message.get("model"):
+            entry["model"] = message["model"]
+        messages.append(entry)
+
+    models = body.get("models") or [message.get("model") for message in messages if message.get("model")]
+    return _session("openwebui", chat.get("id") or body.get("id"), chat.get("title") or body.get("title"),
+                    models[0] if models else None, messages,
+                    chat.get("created_at") or body.get("timestamp"), chat.get("updated_at"))
+
+
+def _session(source: str, conversation_id: Optional[str], title: Optional[str], model: Optional[str],
+             messages: List[Dict], created, updated) -> Optional[Dict]:
+    if not messages:
+        return None
+    created_at = _iso(created) or messages[0].get("timestamp") or datetime.now().isoformat()
+    if conversation_id is None:
+        conversation_id = hashlib.sha256(json.dumps(messages[:2]).encode("utf-8")).hexdigest()
+    # Stable names, so importing the same conversation again replaces it
+    stamp = created_at[:19].replace("-", "").replace(":", "").replace("T", "_")
+    metadata = {
+        "created_at": created_at,
+        "last_modified": _iso(updated) or messages[-1].get("timestamp") or created_at,
+        "title": title,
+        "source": source,
+        "imported_at": datetime.now().isoformat(),
+    }
+    if model:
+        metadata["model"] = model
+    return {
+        "session_name": f"{source}_{stamp}_{str(conversation_id).replace('-', '')[:8]}",
+        "messages": messages,
+        "metadata": metadata,
+    }
+
+
+def convert(record: Dict) -> Optional[Dict]:
+    """Session from one exported conversation of any supported format, or None to skip it"""
+    if not isinstance(record, dict):
+        return None
+    if "mapping" in record:
+        return convert_openai(record)
+    if "chat" in record or "history" in record:
+        return convert_openwebui(record)
+    if isinstance(record.get("messages"), list):
+        return convert_openwebui({"chat": record, "id": record.get("id"), "title": record.get("title")})
+    return None
+
+
+class ChatImporter:
+    """Streams a conversation export (a JSON array, possibly multi-GB) into a ``ChatHistory``.
+
+    Conversations are parsed one at a time and saved in batches of
+    ``batch_size`` sessions (or ``BATCH_CHARS`` of text) through
+    ``ChatHistory.save_sessions``. After each batch the byte offset reached
+    is written to a checkpoint in ``<storage>/imports``, so an interrupted
+    import resumes after the last saved batch; the checkpoint is removed
+    once the file has been imported completely.
+    """
+
+    def __init__(self, chat_history, batch_size: int = BATCH_SESSIONS):
+        self.chat_history = chat_history
+        self.batch_size = batch_size
+        self.checkpoint_dir = os.path.join(chat_history.storage_dir, "imports")
+
+    def run(self, path: str, progress: Optional[Callable[[Dict], None]] = None, restart: bool = False) -> Dict:
+        """Import ``path`` (a JSON export, or an OpenAI export .zip); returns a report"""
+        checkpoint_path, identity = self._checkpoint_for(path)
+        checkpoint = None if restart else self._load_checkpoint(checkpoint_path, identity)
+        report = {
+            "records": 0, "sessions": 0, "messages": 0, "skipped": 0,
+            "resumed_from": checkpoint["offset"] if checkpoint else 0,
+            "bytes": identity["size"], "offset": 0, "seconds": 0.0, "records_per_second": 0.0,
+        }
+        if checkpoint:
+            logger.info(f"Resuming import of {path} at byte {checkpoint['offset']} "
+                        f"({checkpoint['records']} records already imported)")
+
+        start = time.perf_counter()
+        batch: List[Dict] = []
+        batch_chars = 0
+        offset = report["resumed_from"]
+
+        def commit():
+            nonlocal batch, batch_chars
+            self.chat_history.save_sessions(batch)
+            report["sessions"] += len(batch)
+            report["offset"] = offset
+            self._save_checkpoint(checkpoint_path, {**identity, "offset": offset,
+                                                    "records": (checkpoint or {}).get("records", 0) + report["records"]})
+            batch = []
+            batch_chars = 0
+            report["seconds"] = time.perf_counter() - start
+            report["records_per_second"] = report["records"] / report["seconds"] if report["seconds"] else 0.0
+            if progress:
+                progress(dict(report))
+
+        with self._open(path) as f:
+            for record, offset in iter_json_array(f, report["resumed_from"]):
+                report["records"] += 1
+                try:
+                    session = convert(record)
+                except Exception as e:
+                    logger.warning(f"Skipping unreadable conversation #{report['records']}: {e}")
+                    session = None
+                if session is None:
+                    report["skipped"] += 1
+                else:
+                    batch.append(session)
+                    report["messages"] += len(session["messages"])
+                    batch_chars += sum(len(message["content"]) for message in session["messages"])
+                if len(batch) >= self.batch_size or batch_chars >= BATCH_CHARS:
+                    commit()
+            commit()
+
+        os.remove(checkpoint_path)
+        logger.info(
+            f"Imported {report['sessions']} sessions ({report['messages']} messages) from {path} "
+            f"in {report['seconds']:.1f}s, {report['records_per_second']:.0f} records/s"
+        )
+        return report
+
+    def _open(self, path: str):
+        if zipfile.is_zipfile(path):
+            archive = zipfile.ZipFile(path)
+            names = [name for name in archive.namelist() if os.path.basename(name) == OPENAI_MEMBER]
+            if not names:
+                archive.close()
+                raise ValueError(f"{path} has no {OPENAI_MEMBER}")
+            return archive.open(names[0])
+        return open(path, "rb")
+
+    def _checkpoint_for(self, path: str) -> Tuple[str, Dict]:
+        stat = os.stat(path)
+        source = os.path.abspath(path)
+        identity = {"source": source, "size": stat.st_size, "mtime": stat.st_mtime}
+        digest = hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.checkpoint_dir, f"import_{digest}.json"), identity
+
+    def _load_checkpoint(self, checkpoint_path: str, identity: Dict) -> Optional[Dict]:
+        try:
+            with open(checkpoint_path, "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable import checkpoint {checkpoint_path}: {e}")
+            return None
+        if any(checkpoint.get(key) != value for key, value in identity.items()):
+            logger.info("Export file changed since the interrupted import; starting over")
+            return None
+        return checkpoint
+
+    def _save_checkpoint(self, checkpoint_path: str, checkpoint: Dict):
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix=".import_", suffix=".tmp", dir=self.checkpoint_dir)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f)
+        os.replace(temp_path, checkpoint_path)
+
+
+def main():
+    import argparse
+    from .chat_history import ChatHistory
+
+    parser = argparse.ArgumentParser(description="Import conversations exported from ChatGPT or Open WebUI")
+    parser.add_argument("export", help="conversations.json, an OpenAI export .zip, or an Open WebUI chat export")
+    parser.add_argument("--storage", default="chat_history/chat_history", help="chat history directory")
+    parser.add_argument("--backend", choices=["json", "sqlite"], default="json")
+    parser.add_argument("--batch", type=int, default=BATCH_SESSIONS, help="sessions saved per batch")
+    parser.add_argument("--restart", action="store_true", help="ignore a checkpoint from an interrupted import")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    history = ChatHistory(args.storage, backend=args.backend)
+    mb = 1024 * 1024
+
+    def progress(report):
+        print(f"  {report['records']} records, {report['sessions']} sessions, "
+              f"{report['offset'] / mb:.0f} / {report['bytes'] / mb:.0f} MB, "
+              f"{report['records_per_second']:.0f} records/s", flush=True)
+
+    try:
+        report = ChatImporter(history, args.batch).run(args.export, progress, args.restart)
+    except KeyboardInterrupt:
+        print("Interrupted; run the same command again to resume")
+        return
+    finally:
+        history.close()
+    print(f"Imported {report['sessions']} sessions ({report['messages']} messages, {report['skipped']} skipped) "
+          f"in {report['seconds']:.1f}s: {report['records_per_second']:.0f} records/s")
+
+
+if __name__ == "__main__":
+    # python -m modules.chat_import ~/Downloads/conversations.json
+    main()
@@ -0,0 +1,333 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, Optional
+import glob
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+import uuid
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger("main.history.columnar")
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+STATE_FILE = "_export_state.json"
+STATE_VERSION = 1
+# Rows (or characters of content) buffered per partition before they are written out as a row group
+ROW_GROUP_ROWS = 64 * 1024
+ROW_GROUP_CHARS = 16 * 1024 * 1024
+
+
+def _schema():
+    return pa.schema([
+        ("session", pa.string()),
+        ("index", pa.int32()),
+        ("role", pa.dictionary(pa.int8(), pa.string())),
+        ("content", pa.large_string()),
+        ("timestamp", pa.timestamp("us")),
+        ("length", pa.int32()),
+        ("latency_ms", pa.float32()),
+        ("title", pa.string()),
+        ("source", pa.string()),
+        ("session_created", pa.timestamp("us")),
+    ])
+
+
+def _timestamp(value) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).replace(tzinfo=None)
+    except (TypeError, ValueError):
+        return None
+
+
+def partition_value(value: str) -> str:
+    """A model name or month made safe for a ``key=value`` directory name"""
+    return re.sub(r"[^A-Za-z0-9._-]+", "-", value) or "unknown"
+
+
+class _Partition:
+    """Rows of one model/month partition, written to a single part file"""
+
+    def __init__(self, path: str, format: str, schema):
+        self.path = path
+        self.temp_path = f"{path}.tmp"
+        self.format = format
+        self.schema = schema
+        self.columns: Dict[str, list] = {name: [] for name in schema.names}
+        self._chars = 0
+        self._writer = None
+
+    def add(self, row: Dict):
+        for name, column in self.columns.items():
+            column.append(row[name])
+        self._chars += row["length"]
+        if len(self.columns["session"]) >= ROW_GROUP_ROWS or self._chars >= ROW_GROUP_CHARS:
+            self.flush()
+
+    def flush(self):
+        if not self.columns["session"]:
+            return
+        table = pa.Table.from_pydict(self.columns, schema=self.schema)
+        if self._writer is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            if self.format == "parquet":
+                self._writer = pq.ParquetWriter(self.temp_path, self.schema, compression="zstd")
+            else:
+                self._writer = pa.ipc.new_file(
+                    self.temp_path, self.schema, options=pa.ipc.IpcWriteOptions(compression="zstd")
+                )
+        self._writer.write_table(table)
+        self.columns = {name: [] for name in self.schema.names}
+        self._chars = 0
+
+    def close(self):
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class ColumnarExporter:
+    """Exports every saved message to a Parquet or Arrow IPC dataset.
+
+    Rows (one per message, with its session's title, source and creation
+    time) are partitioned Hive-style into ``model=<model>/month=<YYYY-MM>``
+    directories by the session's model and the message's month, so
+    pyarrow, pandas, DuckDB or Spark can read the directory as one table
+    and prune partitions. ``_export_state.json`` remembers the
+    ``last_modified`` of every exported session and the part files holding
+    it; later runs append a new part file per partition with only the
+    sessions added or changed since, and drop the old rows of changed and
+    deleted sessions from earlier parts, so the dataset always holds each
+    message once. New part files are written under a temporary name and
+    only renamed once complete.
+    """
+
+    def __init__(self, chat_history, destination: str, format: str = "parquet"):
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError("Columnar export needs pyarrow (pip install pyarrow)")
+        if format not in FORMATS:
+            raise ValueError(f"Unsupported columnar format: {format}")
+        self.chat_history = chat_history
+        self.destination = destination
+        self.format = format
+        self.schema = _schema()
+        self.state_path = os.path.join(destination, STATE_FILE)
+
+    def export(self, full: bool = False, progress: Optional[Callable[[int], None]] = None) -> Dict:
+        """Export sessions changed since the last run (all of them with ``full``); returns a report"""
+        start = time.perf_counter()
+        state = None if full else self._load_state()
+        if state is None:
+            self._remove_dataset()
+            state = {"version": STATE_VERSION, "format": self.format, "sessions": {}}
+        exported: Dict[str, Dict] = state["sessions"]
+
+        listing = {session["name"]: session for session in self.chat_history.list_sessions()}
+        changed = [
+            name for name, session in listing.items()
+            if exported.get(name, {}).get("last_modified") != session.get("last_modified")
+        ]
+        deleted = [name for name in exported if name not in listing]
+        report = {
+            "sessions": 0, "messages": 0, "removed": len(deleted), "unchanged": len(listing) - len(changed),
+            "files": 0, "rewritten": 0, "destination": self.destination, "format": self.format,
+        }
+
+        run = f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+        partitions: Dict[tuple, _Partition] = {}
+        written: Dict[str, Dict] = {}
+        try:
+            for name in changed:
+                data = self.chat_history.read_session(name)
+                if data is None:
+                    logger.warning(f"Skipping session {name}, which could not be read")
+                    continue
+                parts = set()
+                for key, row in self._rows(name, data):
+                    partition = partitions.get(key)
+                    if partition is None:
+                        partition = partitions[key] = _Partition(self._part_path(key, run), self.format, self.schema)
+                    partition.add(row)
+                    parts.add(os.path.relpath(partition.path, self.destination))
+                    report["messages"] += 1
+                written[name] = {"last_modified": listing[name].get("last_modified"), "parts": sorted(parts)}
+                report["sessions"] += 1
+                if progress:
+                    progress(report["sessions"])
+            for partition in partitions.values():
+                partition.close()
+        except BaseException:
+            for partition in partitions.values():
+                partition.close()
+                if os.path.exists(partition.temp_path):
+                    os.remove(partition.temp_path)
+            raise
+
+        for partition in partitions.values():
+            os.replace(partition.temp_path, partition.path)
+        report["files"] = len(partitions)
+
+        # Earlier rows of re-exported and deleted sessions
+        stale = set(deleted) | {name for name in written if name in exported}
+        report["rewritten"] = self._drop_sessions(stale, exported)
+        for name in deleted:
+            exported.pop(name, None)
+        exported.update(written)
+        self._save_state(state)
+
+        report["seconds"] = time.perf_counter() - start
+        logger.info(
+            f"Exported {report['sessions']} changed sessions ({report['messages']} messages) to "
+            f"{report['files']} {self.format} files in {report['seconds']:.2f}s; "
+            f"{report['unchanged']} unchanged, {report['removed']} removed"
+        )
+        return report
+
+    def _rows(self, session_name: str, data: Dict):
+        """(partition key, row) for every message of a session"""
+        metadata = data.get("metadata", {})
+        model = metadata.get("model") or session_name.rsplit("_", 2)[0]
+        title = metadata.get("title")
+        source = metadata.get("source")
+        created = _timestamp(metadata.get("created_at"))
+        fallback = created or _timestamp(metadata.get("last_modified"))
+        for index, message in enumerate(data.get("messages", [])):
+            content = message.get("content") or ""
+            timestamp = _timestamp(message.get("timestamp")) or fallback
+            month = f"{timestamp:%Y-%m}" if timestamp else "unknown"
+            latency = message.get("latency_ms")
+            yield (partition_value(model), month), {
+                "session": session_name,
+                "index": index,
+                "role": message.get("role"),
+                "content": content,
+                "timestamp": timestamp,
+                "length": len(content),
+                "latency_ms": float(latency) if latency is not None else None,
+                "title": title,
+                "source": source,
+                "session_created": created,
+            }
+
+    def _part_path(self, key: tuple, run: str) -> str:
+        model, month = key
+        return os.path.join(self.destination, f"model={model}", f"month={month}", f"part-{run}{FORMATS[self.format]}")
+
+    def _drop_sessions(self, stale: set, exported: Dict[str, Dict]) -> int:
+        """Rewrite earlier part files without the rows of ``stale`` sessions; returns files rewritten"""
+        files = defaultdict(set)
+        for name in stale:
+            for part in exported.get(name, {}).get("parts", []):
+                files[part].add(name)
+
+        for part, names in files.items():
+            path = os.path.join(self.destination, part)
+            if not os.path.exists(path):
+                continue
+            table = self._read_part(path)
+            keep = table.filter(pc.invert(pc.is_in(table["session"], pa.array(sorted(names)))))
+            if keep.num_rows == 0:
+                os.remove(path)
+                self._remove_empty_dirs(os.path.dirname(path))
+                continue
+            self._write_part(path, keep)
+        return len(files)
+
+    def _read_part(self, path: str):
+        if self.format == "parquet":
+            return pq.read_table(path, schema=self.schema, partitioning=None)
+        with pa.memory_map(path) as source:
+            return pa.ipc.open_file(source).read_all()
+
+    def _write_part(self, path: str, table):
+        fd, temp_path = tempfile.mkstemp(prefix=".part-", suffix=".tmp", dir=os.path.dirname(path))
+        os.close(fd)
+        try:
+            if self.format == "parquet":
+                pq.write_table(table, temp_path, compression="zstd", row_group_size=ROW_GROUP_ROWS)
+            else:
+                with pa.ipc.new_file(temp_path, self.schema,
+                                     options=pa.ipc.IpcWriteOptions(compression="zstd")) as writer:
+                    writer.write_table(table)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def _remove_empty_dirs(self, directory: str):
+        root = os.path.abspath(self.destination)
+        while os.path.abspath(directory) != root:
+            try:
+                os.rmdir(directory)
+            except OSError:
+                break
+            directory = os.path.dirname(directory)
+
+    def _remove_dataset(self):
+        """Remove part files of a previous export before starting a full one"""
+        suffix = FORMATS[self.format]
+        for path in glob.glob(os.path.join(self.destination, "model=*", "month=*", f"part-*{suffix}*")):
+            os.remove(path)
+            self._remove_empty_dirs(os.path.dirname(path))
+
+    def _load_state(self) -> Optional[Dict]:
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable export state {self.state_path}, exporting everything: {e}")
+            return None
+        if state.get("version") != STATE_VERSION or state.get("format") != self.format:
+            logger.info(f"Export state in {self.destination} is from another version or format; exporting everything")
+            return None
+        return state
+
+    def _save_state(self, state: Dict):
+        os.makedirs(self.destination, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix=".export_state_", suffix=".tmp", dir=self.destination)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.state_path)
+
+
+def main():
+    import argparse
+    from .chat_history import ChatHistory
+
+    parser = argparse.ArgumentParser(description="Export the saved history as a partitioned Parquet or Arrow dataset")
+    parser.add_argument("destination", help="dataset directory")
+    parser.add_argument("--format", choices=list(FORMATS), default="parquet")
+    parser.add_argument("--full", action="store_true", help="export everything instead of only changed sessions")
+    parser.add_argument("--storage", default="chat_history/chat_history", help="chat history directory")
+    parser.add_argument("--backend", choices=["json", "sqlite"], default="json")
+    args = parser.parse_args()
+
+    history = ChatHistory(args.storage, backend=args.backend)
+    try:
+        report = ColumnarExporter(history, args.destination, args.format).export(full=args.full)
+    finally:
+        history.close()
+    print(f"Exported {report['sessions']} sessions ({report['messages']} messages) into {report['files']} files, "
+          f"rewrote {report['rewritten']}, removed {report['removed']} deleted sessions, "
+          f"{report['unchanged']} unchanged, in {report['seconds']:.2f}s -> {report['destination']}")
+
+
+if __name__ == "__main__":
+    # python -m modules.columnar_export exports/history_dataset --format parquet
+    main()
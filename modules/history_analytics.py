@@ -0,0 +1,331 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from .message_store import message_digests
+
+logger = logging.getLogger("main.history.analytics")
+
+CACHE_VERSION = 1
+ROLES = ("user", "assistant", "other")
+PERCENTILES = (50, 90, 95, 99)
+
+# Per-message columns kept for every saved session
+COLUMNS = {
+    "session": np.int32,    # index into the session table
+    "role": np.int8,        # index into ROLES
+    "timestamp": np.int64,  # seconds since the epoch (naive local time), -1 if unknown
+    "length": np.int32,     # characters
+    "latency": np.float32,  # response latency in ms, NaN if not recorded
+}
+
+
+def message_columns(messages: Sequence[Dict], session_index: int) -> Dict[str, np.ndarray]:
+    """Column arrays for a run of messages of one session"""
+    count = len(messages)
+    roles = [message.get("role") for message in messages]
+    timestamps = np.array(
+        [message.get("timestamp") or "NaT" for message in messages], dtype="datetime64[s]"
+    ).astype(np.int64)
+    timestamps[timestamps == np.iinfo(np.int64).min] = -1
+    return {
+        "session": np.full(count, session_index, dtype=np.int32),
+        "role": np.array([ROLES.index(role) if role in ROLES[:2] else 2 for role in roles], dtype=np.int8),
+        "timestamp": timestamps,
+        "length": np.fromiter((len(message.get("content", "")) for message in messages), np.int32, count),
+        "latency": np.array(
+            [message.get("latency_ms", np.nan) for message in messages], dtype=np.float32
+        ),
+    }
+
+
+def group_percentiles(groups: np.ndarray, values: np.ndarray, group_count: int,
+                      percentiles: Sequence[float] = PERCENTILES) -> np.ndarray:
+    """Percentiles of ``values`` for every group, ignoring NaN (linear interpolation).
+
+    Returns a ``(group_count, len(percentiles))`` array with NaN for empty groups.
+    """
+    valid = ~np.isnan(values)
+    groups = groups[valid]
+    values = values[valid]
+    order = np.lexsort((values, groups))
+    groups = groups[order]
+    values = values[order]
+
+    counts = np.bincount(groups, minlength=group_count)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    result = np.full((group_count, len(percentiles)), np.nan)
+    present = counts > 0
+    for column, q in enumerate(percentiles):
+        position = starts[present] + (counts[present] - 1) * (q / 100.0)
+        low = np.floor(position).astype(np.int64)
+        high = np.ceil(position).astype(np.int64)
+        fraction = position - low
+        result[present, column] = values[low] * (1 - fraction) + values[high] * fraction
+    return result
+
+
+class HistoryAnalytics:
+    """Corpus-wide message statistics computed on NumPy column arrays.
+
+    Each saved message contributes one row: its session, role, timestamp,
+    length and (for assistant replies) response latency. Rows are cached in
+    ``analytics.npz`` next to the history together with the message count,
+    modification time and content hash of every session. ``refresh`` skips
+    unchanged sessions; for one that grew it checks the prefix hash and
+    only converts the new messages if the cached rows are still their
+    prefix, and rebuilds the rows of sessions that changed in any other
+    way. Aggregates are grouped with ``bincount`` and sorted
+    splits instead of Python loops over messages.
+    """
+
+    def __init__(self, chat_history, cache_path: Optional[str] = None):
+        self.chat_history = chat_history
+        self.cache_path = cache_path or os.path.join(chat_history.storage_dir, "analytics.npz")
+        self._lock = threading.Lock()
+        self.sessions: List[Dict] = []
+        self.columns: Dict[str, np.ndarray] = {name: np.empty(0, dtype) for name, dtype in COLUMNS.items()}
+        self._load_cache()
+
+    def refresh(self) -> Dict:
+        """Bring the columns up to date with the saved history"""
+        with self._lock:
+            start = time.perf_counter()
+            cached = {session["name"]: (index, session) for index, session in enumerate(self.sessions)}
+            current = [session for session in self.chat_history.list_sessions() if session.get("name")]
+
+            chunks: List[Dict[str, np.ndarray]] = []
+            sessions: List[Dict] = []
+            read = 0
+            for session in current:
+                name = session["name"]
+                count = session.get("message_count", 0)
+                index = len(sessions)
+                previous = cached.get(name)
+                rows = self._session_rows(previous[0]) if previous else None
+                known = previous[1]["message_count"] if previous else 0
+                if previous and (known > count or (known == count and previous[1]["last_modified"] != session.get("last_modified"))):
+                    rows, known = None, 0
+                if rows is not None:
+                    rows = {key: value.copy() for key, value in rows.items()}
+                    rows["session"][:] = index
+
+                model = previous[1]["model"] if previous and rows is not None else None
+                content_hash = previous[1].get("content_hash") if previous and rows is not None else None
+                if known < count or rows is None:
+                    data = self.chat_history.read_session(name)
+                    if data is None:
+                        continue
+                    messages = data.get("messages", [])
+                    model = (data.get("metadata") or {}).get("model") or name.rsplit("_", 2)[0]
+                    prefix, content_hash = message_digests(messages, known)
+                    if rows is not None and prefix != previous[1].get("content_hash"):
+                        # Rewritten as well as extended: the cached rows are not a prefix of it any more
+                        rows, known = None, 0
+                    new_rows = message_columns(messages[known:], index)
+                    read += len(new_rows["session"])
+                    rows = new_rows if rows is None else {
+                        key: np.concatenate((rows[key], new_rows[key])) for key in COLUMNS
+                    }
+                chunks.append(rows)
+                sessions.append({
+                    "name": name,
+                    "model": model,
+                    "message_count": len(rows["session"]),
+                    "last_modified": session.get("last_modified"),
+                    "content_hash": content_hash,
+                })
+
+            self.sessions = sessions
+            self.columns = {
+                key: np.concatenate([chunk[key] for chunk in chunks]) if chunks else np.empty(0, dtype)
+                for key, dtype in COLUMNS.items()
+            }
+            if read or len(sessions) != len(cached):
+                self._save_cache()
+            elapsed = (time.perf_counter() - start) * 1000
+            logger.info(f"Analytics refreshed: read {read} new messages, {len(self)} total in {elapsed:.0f} ms")
+            return {"sessions": len(sessions), "messages": len(self), "read": read, "ms": elapsed}
+
+    def __len__(self) -> int:
+        return len(self.columns["session"])
+
+    def summary(self) -> Dict:
+        """Totals over the whole history"""
+        columns = self.columns
+        roles = np.bincount(columns["role"], minlength=len(ROLES))
+        stamps = columns["timestamp"][columns["timestamp"] >= 0]
+        latency = columns["latency"]
+        return {
+            "sessions": len(self.sessions),
+            "messages": len(self),
+            "user_messages": int(roles[0]),
+            "ai_messages": int(roles[1]),
+            "characters": int(columns["length"].sum(dtype=np.int64)),
+            "average_message_length": float(columns["length"].mean()) if len(self) else 0.0,
+            "first": self._format_time(stamps.min()) if len(stamps) else None,
+            "last": self._format_time(stamps.max()) if len(stamps) else None,
+            "latency_ms": dict(zip(PERCENTILES, np.nanpercentile(latency, PERCENTILES).tolist()))
+            if np.any(~np.isnan(latency)) else {},
+        }
+
+    def per_model(self) -> List[Dict]:
+        """Message counts, reply lengths and latency percentiles for every model"""
+        models, session_model = np.unique(
+            np.array([session["model"] or "unknown" for session in self.sessions], dtype=object).astype(str),
+            return_inverse=True,
+        ) if self.sessions else (np.empty(0, dtype=str), np.empty(0, dtype=np.int64))
+        group = session_model[self.columns["session"]] if len(self) else np.empty(0, dtype=np.int64)
+        return self._aggregate(group, [str(model) for model in models], np.bincount(session_model, minlength=len(models)))
+
+    def per_day(self, days: Optional[int] = None) -> List[Dict]:
+        """The same aggregates per calendar day, newest last (optionally only the last ``days``)"""
+        stamps = self.columns["timestamp"]
+        known = stamps >= 0
+        day = stamps[known] // 86400
+        if not len(day):
+            return []
+        first = day.min() if days is None else max(day.min(), day.max() - days + 1)
+        keep = day >= first
+        group = (day[keep] - first).astype(np.int64)
+        group_count = int(day.max() - first + 1)
+
+        # Sessions active on each day: unique (day, session) pairs
+        sessions = self.columns["session"][known][keep]
+        pairs = np.unique(group * (len(self.sessions) + 1) + sessions)
+        active = np.bincount(pairs // (len(self.sessions) + 1), minlength=group_count)
+
+        labels = [str(np.datetime64(int(first + offset) * 86400, "s").astype("datetime64[D]")) for offset in range(group_count)]
+        mask = np.flatnonzero(known)[keep]
+        return self._aggregate(group, labels, active, rows=mask)
+
+    def _aggregate(self, group: np.ndarray, labels: List[str], sessions: np.ndarray,
+                   rows: Optional[np.ndarray] = None) -> List[Dict]:
+        columns = self.columns if rows is None else {key: value[rows] for key, value in self.columns.items()}
+        count = len(labels)
+        role = columns["role"]
+        length = columns["length"].astype(np.float64)
+        messages = np.bincount(group, minlength=count)
+        user = np.bincount(group, weights=role == 0, minlength=count)
+        assistant_mask = role == 1
+        assistant = np.bincount(group, weights=assistant_mask, minlength=count)
+        characters = np.bincount(group, weights=length, minlength=count)
+        reply_length = group_percentiles(group[assistant_mask], length[assistant_mask], count, (50, 95))
+        latency = group_percentiles(group, columns["latency"].astype(np.float64), count)
+
+        result = []
+        for i, label in enumerate(labels):
+            if not messages[i]:
+                continue
+            result.append({
+                "name": label,
+                "sessions": int(sessions[i]),
+                "messages": int(messages[i]),
+                "user_messages": int(user[i]),
+                "ai_messages": int(assistant[i]),
+                "characters": int(characters[i]),
+                "reply_length_p50": self._number(reply_length[i, 0]),
+                "reply_length_p95": self._number(reply_length[i, 1]),
+                **{f"latency_p{q}": self._number(latency[i, j]) for j, q in enumerate(PERCENTILES)},
+            })
+        return result
+
+    def _session_rows(self, index: int) -> Dict[str, np.ndarray]:
+        offsets = np.cumsum([0] + [session["message_count"] for session in self.sessions])
+        return {key: value[offsets[index]:offsets[index + 1]] for key, value in self.columns.items()}
+
+    def _load_cache(self):
+        try:
+            with np.load(self.cache_path, allow_pickle=False) as data:
+                meta = json.loads(str(data["meta"]))
+                if meta.get("version") != CACHE_VERSION:
+                    return
+                columns = {key: data[key].astype(dtype) for key, dtype in COLUMNS.items()}
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable analytics cache {self.cache_path}: {e}")
+            return
+        if sum(session["message_count"] for session in meta["sessions"]) == len(columns["session"]):
+            self.sessions = meta["sessions"]
+            self.columns = columns
+
+    def _save_cache(self):
+        directory = os.path.dirname(os.path.abspath(self.cache_path))
+        meta = json.dumps({"version": CACHE_VERSION, "sessions": self.sessions})
+        try:
+            fd, temp_path = tempfile.mkstemp(prefix=".analytics_", suffix=".npz", dir=directory)
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, meta=np.array(meta), **self.columns)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Failed to write analytics cache: {e}")
+
+    @staticmethod
+    def _number(value: float) -> Optional[float]:
+        return None if np.isnan(value) else round(float(value), 1)
+
+    @staticmethod
+    def _format_time(seconds: int) -> str:
+        return str(np.datetime64(int(seconds), "s"))
+
+
+def format_table(rows: List[Dict], columns: List[Tuple[str, str]]) -> str:
+    """Plain-text table of aggregate rows"""
+    cells = [[title for _, title in columns]]
+    for row in rows:
+        cells.append(["-" if row.get(key) is None else str(row[key]) for key, _ in columns])
+    widths = [max(len(line[i]) for line in cells) for i in range(len(columns))]
+    return "\n".join(
+        "  ".join(cell.ljust(width) if i == 0 else cell.rjust(width) for i, (cell, width) in enumerate(zip(line, widths)))
+        for line in cells
+    )
+
+
+TABLE_COLUMNS = [
+    ("name", ""), ("sessions", "sessions"), ("messages", "messages"), ("ai_messages", "replies"),
+    ("reply_length_p50", "reply p50"), ("reply_length_p95", "reply p95"),
+    ("latency_p50", "latency p50 ms"), ("latency_p95", "latency p95 ms"), ("latency_p99", "latency p99 ms"),
+]
+
+
+def main():
+    import argparse
+    from .chat_history import ChatHistory
+
+    parser = argparse.ArgumentParser(description="Corpus-wide statistics over the saved chat history")
+    parser.add_argument("--storage", default="chat_history/chat_history", help="chat history directory")
+    parser.add_argument("--backend", choices=["json", "sqlite"], default="json")
+    parser.add_argument("--days", type=int, default=14, help="number of days in the per-day table")
+    parser.add_argument("--json", action="store_true", help="print the aggregates as JSON")
+    args = parser.parse_args()
+
+    history = ChatHistory(args.storage, backend=args.backend)
+    analytics = HistoryAnalytics(history)
+    refresh = analytics.refresh()
+    start = time.perf_counter()
+    report = {"summary": analytics.summary(), "models": analytics.per_model(), "days": analytics.per_day(args.days)}
+    elapsed = (time.perf_counter() - start) * 1000
+    history.close()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    summary = report["summary"]
+    print(f"{summary['sessions']} sessions, {summary['messages']} messages "
+          f"({summary['user_messages']} user / {summary['ai_messages']} assistant) from {summary['first']} to {summary['last']}")
+    print(f"Refresh read {refresh['read']} messages in {refresh['ms']:.0f} ms; aggregates took {elapsed:.1f} ms\n")
+    print(format_table(report["models"], TABLE_COLUMNS))
+    print()
+    print(format_table(report["days"], TABLE_COLUMNS))
+
+
+if __name__ == "__main__":
+    # python -m modules.history_analytics --days 30
+    main()
@@ -0,0 +1,385 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+import os
+import re
+import sqlite3
+import threading
+
+from .message_store import message_digests
+
+logger = logging.getLogger("main.history.search")
+
+
+def _fts5_available() -> bool:
+    try:
+        sqlite3.connect(":memory:").execute("CREATE VIRTUAL TABLE probe USING fts5(content)")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+FTS5_AVAILABLE = _fts5_available()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS indexed_sessions (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    model TEXT,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    content_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_indexed_sessions_model ON indexed_sessions(model);
+
+CREATE TABLE IF NOT EXISTS indexed_messages (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    timestamp TEXT,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_indexed_messages_session ON indexed_messages(session_id, position);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS message_fts USING fts5(
+    content, content='indexed_messages', content_rowid='id', tokenize='unicode61'
+);
+"""
+
+# Suggested ``window`` for latency-bound searches: scoring every match of
+# a common word grows with the corpus, while finding the newest matches is
+# a cheap walk down the doclist
+CANDIDATE_WINDOW = 2000
+
+# Snippet match markers; replaced by the caller's markers after escaping
+MATCH_START = "\x02"
+MATCH_END = "\x03"
+
+QUERY_TERM_RE = re.compile(r'"([^"]*)"|(\S+)')
+WORD_RE = re.compile(r"\w+")
+
+
+def build_match_query(query: str) -> str:
+    """Translate the search bar syntax (words, word*, "phrases") into an FTS5 query"""
+    terms = []
+    for phrase, word in QUERY_TERM_RE.findall(query):
+        if phrase:
+            words = WORD_RE.findall(phrase)
+            if words:
+                terms.append('"' + " ".join(words) + '"')
+            continue
+        prefix = word.endswith("*")
+        for token in WORD_RE.findall(word):
+            terms.append(f'"{token}"')
+        if prefix and terms:
+            terms[-1] += "*"
+    return " ".join(terms)
+
+
+def make_snippet(content: str, match: str, tokens: int = 16) -> str:
+    """Excerpt of ``content`` around the first match, with matches wrapped in the match markers"""
+    terms = [(term.lower(), prefix == "*") for phrase, prefix in re.findall(r'"([^"]*)"(\*?)', match)
+             for term in phrase.split()]
+
+    def matches(word: str) -> bool:
+        word = word.lower()
+        return any(word.startswith(term) if prefix else word == term for term, prefix in terms)
+
+    words = list(WORD_RE.finditer(content))
+    first = next((i for i, word in enumerate(words) if matches(word.group())), 0)
+    start = max(0, min(first - tokens // 4, len(words) - tokens))
+    window = words[start:start + tokens]
+    if not window:
+        return content[:200]
+
+    parts = ["…" if start > 0 else ""]
+    position = window[0].start()
+    for word in window:
+        parts.append(content[position:word.start()])
+        text = word.group()
+        parts.append(f"{MATCH_START}{text}{MATCH_END}" if matches(text) else text)
+        position = word.end()
+    if start + tokens < len(words):
+        parts.append("…")
+    return "".join(parts)
+
+
+class HistoryHits(list):
+    """Search results; ``truncated`` is set when only the newest matches were ranked"""
+
+    truncated = False
+
+
+@dataclass
+class HistoryHit:
+    session_name: str
+    message_index: int
+    role: str
+    model: Optional[str]
+    timestamp: Optional[str]
+    snippet: str
+    score: float
+
+    def format_snippet(self, start: str = "[", end: str = "]", escape=None) -> str:
+        """Snippet with matches wrapped in ``start``/``end``; ``escape`` is applied to the text first"""
+        text = escape(self.snippet) if escape else self.snippet
+        return text.replace(MATCH_START, start).replace(MATCH_END, end)
+
+
+class HistorySearch:
+    """Full-text index over every stored message, backed by SQLite FTS5.
+
+    Sessions are indexed incrementally: only messages past the number
+    already indexed for a session are added, and a session is re-indexed
+    from scratch if the hash of its indexed messages no longer matches. Results are ranked by BM25 and can be filtered by
+    role, model and a timestamp range. A search can be given a
+    ``window`` to rank only that many of the newest matches, which keeps
+    query latency flat as the history grows; the results report whether
+    older matches were left out.
+    """
+
+    def __init__(self, db_path: str):
+        if not FTS5_AVAILABLE:
+            raise RuntimeError("SQLite was built without FTS5")
+        self.db_path = db_path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = self.connection
+        conn.executescript(SCHEMA)
+        if "content_hash" not in {row[1] for row in conn.execute("PRAGMA table_info(indexed_sessions)")}:
+            # Indexes built before sessions kept a content hash; each session is re-indexed once
+            conn.execute("ALTER TABLE indexed_sessions ADD COLUMN content_hash TEXT")
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Connection for the calling thread"""
+        conn = getattr(self._local, "connection", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = conn
+        return conn
+
+    def close(self):
+        """Close the calling thread's connection"""
+        conn = getattr(self._local, "connection", None)
+        if conn is not None:
+            conn.close()
+            self._local.connection = None
+
+    def index_session(self, session_name: str, messages: List[Dict], model: Optional[str] = None) -> int:
+        """Index messages not yet indexed for a session; returns how many were added"""
+        with self.connection as conn:
+            return self._index(conn, session_name, messages, model)
+
+    def index_sessions(self, sessions: Iterable[Tuple[str, List[Dict], Optional[str]]], batch_size: int = 500) -> int:
+        """Index many ``(session_name, messages, model)`` tuples in batched transactions"""
+        conn = self.connection
+        added = 0
+        pending = 0
+        conn.execute("BEGIN")
+        try:
+            for session_name, messages, model in sessions:
+                added += self._index(conn, session_name, messages, model)
+                pending += 1
+                if pending >= batch_size:
+                    conn.execute("COMMIT")
+                    conn.execute("BEGIN")
+                    pending = 0
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def remove_session(self, session_name: str):
+        """Drop a session from the index"""
+        with self.connection as conn:
+            row = conn.execute("SELECT id FROM indexed_sessions WHERE name = ?", (session_name,)).fetchone()
+            if row:
+                self._clear_messages(conn, row[0])
+                conn.execute("DELETE FROM indexed_sessions WHERE id = ?", (row[0],))
+
+    def indexed_count(self, session_name: str) -> int:
+        """Number of messages indexed for a session"""
+        row = self.connection.execute(
+            "SELECT message_count FROM indexed_sessions WHERE name = ?", (session_name,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def message_count(self) -> int:
+        """Number of indexed messages"""
+        return self.connection.execute("SELECT COUNT(*) FROM indexed_messages").fetchone()[0]
+
+    def models(self) -> List[str]:
+        """Models that appear in the index"""
+        return [
+            row[0] for row in self.connection.execute(
+                "SELECT DISTINCT model FROM indexed_sessions WHERE model IS NOT NULL ORDER BY model"
+            )
+        ]
+
+    def search(self, query: str, role: Optional[str] = None, model: Optional[str] = None,
+               since: Optional[str] = None, until: Optional[str] = None, limit: int = 50,
+               window: Optional[int] = None) -> HistoryHits:
+        """Best matching messages by BM25; ``since``/``until`` are ISO timestamps (until is exclusive).
+
+        With ``window`` only the newest ``window`` matches are ranked, and
+        the results are marked ``truncated`` if there were more.
+        """
+        hits = HistoryHits()
+        match = build_match_query(query)
+        if not match:
+            return hits
+
+        joins = ""
+        filters = ""
+        filter_params: List = []
+        for clause, value in (
+            (" AND m.role = ?", role),
+            (" AND s.model = ?", model),
+            (" AND m.timestamp >= ?", since),
+            (" AND m.timestamp < ?", until),
+        ):
+            if value:
+                filters += clause
+                filter_params.append(value)
+        if filters:
+            joins = (
+                "JOIN indexed_messages m ON m.id = message_fts.rowid "
+                "JOIN indexed_sessions s ON s.id = m.session_id "
+            )
+
+        # With a window, find the oldest message of the newest matches and
+        # rank only those; then fetch details and build snippets for the top hits
+        conn = self.connection
+        try:
+            floor = 0
+            if window:
+                newest = conn.execute(
+                    f"SELECT message_fts.rowid FROM message_fts {joins}WHERE message_fts MATCH ?{filters} "
+                    "ORDER BY message_fts.rowid DESC LIMIT ?",
+                    [match] + filter_params + [window + 1],
+                ).fetchall()
+                if not newest:
+                    return hits
+                hits.truncated = len(newest) > window
+                floor = newest[min(window, len(newest)) - 1][0]
+            ranked = conn.execute(
+                f"SELECT message_fts.rowid, rank FROM message_fts {joins}"
+                f"WHERE message_fts MATCH ? AND message_fts.rowid >= ?{filters} ORDER BY rank LIMIT ?",
+                [match, floor] + filter_params + [limit],
+            ).fetchall()
+            if not ranked:
+                return hits
+            placeholders = ",".join("?" * len(ranked))
+            details = {
+                row[0]: row[1:]
+                for row in conn.execute(
+                    "SELECT m.id, s.name, m.position, m.role, s.model, m.timestamp, m.content "
+                    "FROM indexed_messages m JOIN indexed_sessions s ON s.id = m.session_id "
+                    f"WHERE m.id IN ({placeholders})",
+                    [row[0] for row in ranked],
+                )
+            }
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Invalid history search query {query!r}: {e}")
+            return hits
+        hits.extend(
+            HistoryHit(*details[rowid][:5], make_snippet(details[rowid][5], match), -rank)
+            for rowid, rank in ranked if rowid in details
+        )
+        return hits
+
+    def _index(self, conn: sqlite3.Connection, session_name: str, messages: List[Dict], model: Optional[str]) -> int:
+        row = conn.execute(
+            "SELECT id, message_count, content_hash FROM indexed_sessions WHERE name = ?", (session_name,)
+        ).fetchone()
+        indexed_prefix, content_hash = message_digests(messages, row[1] if row else 0)
+        if row is None:
+            session_id = conn.execute(
+                "INSERT INTO indexed_sessions (name, model) VALUES (?, ?)", (session_name, model)
+            ).lastrowid
+            indexed = 0
+        else:
+            session_id, indexed, indexed_hash = row
+            if indexed and indexed_prefix != indexed_hash:
+                # The session shrank or was rewritten since it was indexed
+                self._clear_messages(conn, session_id)
+                indexed = 0
+        if indexed == len(messages):
+            return 0
+
+        for position, message in enumerate(messages[indexed:], indexed):
+            message_id = conn.execute(
+                "INSERT INTO indexed_messages (session_id, position, role, timestamp, content) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (session_id, position, message["role"], message.get("timestamp"), message["content"]),
+            ).lastrowid
+            conn.execute("INSERT INTO message_fts (rowid, content) VALUES (?, ?)", (message_id, message["content"]))
+        conn.execute(
+            "UPDATE indexed_sessions SET message_count = ?, content_hash = ?, model = COALESCE(?, model) WHERE id = ?",
+            (len(messages), content_hash, model, session_id),
+        )
+        return len(messages) - indexed
+
+    def _clear_messages(self, conn: sqlite3.Connection, session_id: int):
+        conn.execute(
+            "INSERT INTO message_fts (message_fts, rowid, content) "
+            "SELECT 'delete', id, content FROM indexed_messages WHERE session_id = ?",
+            (session_id,),
+        )
+        conn.execute("DELETE FROM indexed_messages WHERE session_id = ?", (session_id,))
+        conn.execute("UPDATE indexed_sessions SET message_count = 0 WHERE id = ?", (session_id,))
+
+
+def main():
+    import argparse
+    import time
+    from datetime import datetime, timedelta
+    from .chat_history import ChatHistory
+
+    parser = argparse.ArgumentParser(description="Search the saved chat history")
+    parser.add_argument("query", nargs="?", help='words, word* for prefixes, "quotes" for phrases')
+    parser.add_argument("--storage", default="chat_history/chat_history", help="chat history directory")
+    parser.add_argument("--backend", default="json", choices=("json", "sqlite"))
+    parser.add_argument("--role", choices=("user", "assistant"))
+    parser.add_argument("--model")
+    parser.add_argument("--since", help="ISO date, e.g. 2025-01-01")
+    parser.add_argument("--until", help="ISO date (exclusive)")
+    parser.add_argument("--days", type=int, help="only messages from the last N days")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--window", type=int, help=f"rank only the newest N matches (e.g. {CANDIDATE_WINDOW}) "
+                                                   "for faster searches of common words")
+    parser.add_argument("--update", action="store_true", help="index new messages before searching")
+    args = parser.parse_args()
+
+    history = ChatHistory(args.storage, backend=args.backend)
+    if history.search is None:
+        parser.error("full-text search needs SQLite with FTS5")
+    if args.update:
+        start = time.perf_counter()
+        added = history.update_search_index()
+        print(f"Indexed {added} new messages in {time.perf_counter() - start:.1f}s")
+    if not args.query:
+        return
+
+    since = args.since
+    if args.days:
+        since = (datetime.now() - timedelta(days=args.days)).isoformat()
+    start = time.perf_counter()
+    hits = history.search.search(args.query, args.role, args.model, since, args.until, args.limit, args.window)
+    elapsed = (time.perf_counter() - start) * 1000
+    for hit in hits:
+        print(f"{hit.score:7.2f}  {hit.session_name} #{hit.message_index} "
+              f"[{hit.role}, {hit.model or '?'}, {(hit.timestamp or '')[:16]}]")
+        print(f"         {hit.format_snippet()}")
+    print(f"{len(hits)} results in {elapsed:.1f} ms")
+    if hits.truncated:
+        print(f"Only the newest {args.window} matches were ranked; drop --window to rank them all")
+
+
+if __name__ == "__main__":
+    # python -m modules.history_search "query" --update --role user --days 30
+    main()
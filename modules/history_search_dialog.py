@@ -0,0 +1,115 @@
+from PyQt6.QtCore import QTimer, QUrl
+from PyQt6.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLineEdit,
+    QComboBox,
+    QCheckBox,
+    QLabel,
+    QTextBrowser,
+)
+from datetime import datetime, timedelta
+from typing import List
+import html
+import logging
+import time
+
+from .history_search import CANDIDATE_WINDOW, HistoryHit
+
+logger = logging.getLogger("main.search.history")
+
+PERIODS = [("Any time", None), ("Last 24 hours", 1), ("Last 7 days", 7), ("Last 30 days", 30), ("Last year", 365)]
+
+
+class HistorySearchDialog(QDialog):
+    """Full-text search over the whole saved history with role, model and date filters"""
+
+    def __init__(self, tab_manager, parent=None):
+        super().__init__(parent)
+        self.tab_manager = tab_manager
+        self.search = tab_manager.chat_history.search
+        self.hits: List[HistoryHit] = []
+        self.setWindowTitle("Search History")
+        self.setMinimumSize(700, 450)
+
+        layout = QVBoxLayout(self)
+        self.query_field = QLineEdit()
+        self.query_field.setPlaceholderText('Search all saved chats (word* for prefix, "quotes" for phrases)')
+        self.query_field.setClearButtonEnabled(True)
+        layout.addWidget(self.query_field)
+
+        filters = QHBoxLayout()
+        self.role_filter = QComboBox()
+        self.role_filter.addItem("Any role", None)
+        self.role_filter.addItem("User", "user")
+        self.role_filter.addItem("Assistant", "assistant")
+        self.model_filter = QComboBox()
+        self.model_filter.addItem("Any model", None)
+        for model in self.search.models():
+            self.model_filter.addItem(model, model)
+        self.period_filter = QComboBox()
+        for label, days in PERIODS:
+            self.period_filter.addItem(label, days)
+        for combo in (self.role_filter, self.model_filter, self.period_filter):
+            filters.addWidget(combo)
+            combo.currentIndexChanged.connect(self.run_search)
+        self.newest_only = QCheckBox("Newest matches only")
+        self.newest_only.setToolTip(f"Rank only the {CANDIDATE_WINDOW} newest matches; faster for common words")
+        self.newest_only.toggled.connect(self.run_search)
+        filters.addWidget(self.newest_only)
+        layout.addLayout(filters)
+
+        self.results = QTextBrowser()
+        self.results.setOpenLinks(False)
+        self.results.anchorClicked.connect(self.open_hit)
+        layout.addWidget(self.results)
+
+        self.status_label = QLabel(f"{self.search.message_count()} messages indexed")
+        self.status_label.setStyleSheet("color: gray;")
+        layout.addWidget(self.status_label)
+
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(250)
+        self.search_timer.timeout.connect(self.run_search)
+        self.query_field.textChanged.connect(lambda: self.search_timer.start())
+        self.query_field.returnPressed.connect(self.run_search)
+
+    def run_search(self):
+        """Query the full-text index with the current filters"""
+        query = self.query_field.text().strip()
+        if not query:
+            self.hits = []
+            self.results.clear()
+            return
+
+        days = self.period_filter.currentData()
+        since = (datetime.now() - timedelta(days=days)).isoformat() if days else None
+        start = time.perf_counter()
+        self.hits = self.search.search(
+            query, role=self.role_filter.currentData(), model=self.model_filter.currentData(), since=since,
+            window=CANDIDATE_WINDOW if self.newest_only.isChecked() else None,
+        )
+        elapsed = (time.perf_counter() - start) * 1000
+        logger.debug(f"History search for {query!r} returned {len(self.hits)} results in {elapsed:.1f} ms")
+
+        rows = []
+        for i, hit in enumerate(self.hits):
+            snippet = hit.format_snippet("<b>", "</b>", escape=html.escape)
+            rows.append(
+                f'<p><a href="hit:{i}">{html.escape(hit.session_name)}</a> '
+                f'<span style="color: gray;">#{hit.message_index} {hit.role} · {(hit.timestamp or "")[:16]}</span>'
+                f"<br>{snippet}</p>"
+            )
+        self.results.setHtml("".join(rows) or "<p>No matches</p>")
+        status = f"{len(self.hits)} results in {elapsed:.0f} ms"
+        if self.hits.truncated:
+            status += f" (best of the {CANDIDATE_WINDOW} newest matches)"
+        self.status_label.setText(status)
+
+    def open_hit(self, url: QUrl):
+        """Open the session of a result and scroll to the message"""
+        index = int(url.toString().split(":", 1)[1])
+        hit = self.hits[index]
+        self.tab_manager.open_session(hit.session_name, hit.message_index)
@@ -0,0 +1,183 @@
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+    import msvcrt
+
+logger = logging.getLogger("main.history.sync")
+
+# The change log is started afresh once it grows past this size
+CHANGE_LOG_MAX_BYTES = 1024 * 1024
+
+
+class HistoryLock:
+    """Reader/writer lock on a history directory shared by several processes.
+
+    Backed by ``flock`` on ``.lock`` in the directory (``msvcrt.locking``
+    on Windows, where shared locks are taken exclusively). Within a process
+    the lock is reentrant and held by one thread at a time; a thread
+    holding it shared that asks for it exclusively upgrades it, which is
+    not atomic, so state read under the shared lock must be re-checked.
+    """
+
+    def __init__(self, storage_dir: str, timeout: float = 30):
+        self.path = os.path.join(storage_dir, ".lock")
+        self.timeout = timeout
+        self._thread_lock = threading.RLock()
+        self._fd: Optional[int] = None
+        self._depth = 0
+        self._mode: Optional[str] = None
+
+    @contextmanager
+    def shared(self):
+        """Hold the lock for reading"""
+        with self._hold("shared"):
+            yield
+
+    @contextmanager
+    def exclusive(self):
+        """Hold the lock for writing"""
+        with self._hold("exclusive"):
+            yield
+
+    @contextmanager
+    def _hold(self, mode: str):
+        with self._thread_lock:
+            previous = self._mode
+            if previous != "exclusive" and previous != mode:
+                self._acquire(mode)
+                self._mode = mode
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                # An upgrade stays in place until the outermost holder releases
+                if self._depth == 0:
+                    self._release()
+                    self._mode = None
+
+    def _acquire(self, mode: str):
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                if FCNTL_AVAILABLE:
+                    fcntl.flock(self._fd, (fcntl.LOCK_SH if mode == "shared" else fcntl.LOCK_EX) | fcntl.LOCK_NB)
+                else:
+                    os.lseek(self._fd, 0, os.SEEK_SET)
+                    msvcrt.locking(self._fd, msvcrt.LK_NBLCK, 1)
+                return
+            except OSError:
+                if not FCNTL_AVAILABLE and self._mode is not None:
+                    # msvcrt has no shared mode; an upgrade already holds the byte
+                    return
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Timed out waiting for {mode} lock on {self.path}")
+                time.sleep(0.01)
+
+    def _release(self):
+        if self._fd is None:
+            return
+        try:
+            if FCNTL_AVAILABLE:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        except OSError as e:
+            logger.warning(f"Failed to release {self.path}: {e}")
+
+    def close(self):
+        """Release the lock file descriptor"""
+        with self._thread_lock:
+            if self._fd is not None and self._depth == 0:
+                os.close(self._fd)
+                self._fd = None
+
+
+class ChangeLog:
+    """Append-only log of session changes, shared by every process using a history.
+
+    Writers append one JSON line per change (``op``, ``session`` and a
+    ``writer`` id unique to each ``ChangeLog``) while holding the history lock. Readers keep a cursor (the log's inode
+    and the offset they have read up to); finding out whether anything
+    changed costs one ``stat``. When the log grows past ``max_bytes`` it is
+    replaced by an empty one, and readers whose cursor points at the old
+    file get None from ``read_since`` and must rescan.
+    """
+
+    def __init__(self, storage_dir: str, max_bytes: int = CHANGE_LOG_MAX_BYTES):
+        self.path = os.path.join(storage_dir, "changes.log")
+        self.max_bytes = max_bytes
+        self.writer = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+    def record(self, op: str, session_name: str):
+        """Append a change; the caller holds the history lock exclusively"""
+        line = json.dumps({"op": op, "session": session_name, "writer": self.writer, "time": time.time()}) + "\n"
+        try:
+            if os.path.exists(self.path) and os.path.getsize(self.path) > self.max_bytes:
+                # Readers see a new inode and rescan
+                os.replace(self._new_log(), self.path)
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line.encode("utf-8"))
+            finally:
+                os.close(fd)
+        except OSError as e:
+            logger.warning(f"Failed to record change to {session_name}: {e}")
+
+    def cursor(self) -> Tuple[int, int]:
+        """A cursor at the current end of the log"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return (0, 0)
+        return (stat.st_ino, stat.st_size)
+
+    def changed(self, cursor: Tuple[int, int]) -> bool:
+        """Whether anything was recorded after ``cursor``"""
+        return self.cursor() != cursor
+
+    def read_since(self, cursor: Tuple[int, int]) -> Tuple[Optional[List[Dict]], Tuple[int, int]]:
+        """Changes recorded after ``cursor`` and the new cursor; None if the log was started afresh"""
+        try:
+            with open(self.path, "rb") as f:
+                stat = os.fstat(f.fileno())
+                if cursor[0] and (stat.st_ino != cursor[0] or stat.st_size < cursor[1]):
+                    return None, self._end_of(f, stat)
+                f.seek(cursor[1])
+                data = f.read()
+        except FileNotFoundError:
+            return ([] if cursor == (0, 0) else None), (0, 0)
+
+        # Only complete lines; a write in progress is picked up next time
+        complete = data[:data.rfind(b"\n") + 1]
+        changes = []
+        for line in complete.splitlines():
+            try:
+                changes.append(json.loads(line))
+            except ValueError:
+                logger.warning(f"Skipping unreadable change record in {self.path}")
+        return changes, (stat.st_ino, cursor[1] + len(complete))
+
+    def _end_of(self, f, stat: os.stat_result) -> Tuple[int, int]:
+        data = f.read()
+        return (stat.st_ino, data.rfind(b"\n") + 1)
+
+    def _new_log(self) -> str:
+        path = f"{self.path}.{self.writer}.tmp"
+        with open(path, "wb"):
+            pass
+        return path
@@ -0,0 +1,224 @@
+import hashlib
+import html
+import logging
+import re
+from typing import List, Optional
+
+logger = logging.getLogger("main.markdown")
+
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.*)$")
+RULE_RE = re.compile(r"^(-{3,}|\*{3,}|_{3,})$")
+LIST_RE = re.compile(r"^\s*([-*+]|\d+[.)])\s+(.*)$")
+BOLD_RE = re.compile(r"\*\*(.+?)\*\*|__(.+?)__")
+ITALIC_RE = re.compile(r"(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?![\w*])")
+
+
+def content_digest(code: str, lang: str) -> str:
+    """Return the cache key for a code block"""
+    return hashlib.sha1(f"{lang}\0{code}".encode("utf-8")).hexdigest()
+
+
+def render_inline(text: str) -> str:
+    """Render inline Markdown (code spans, bold, italic) to HTML"""
+    parts = text.split("`")
+    if len(parts) % 2 == 0:
+        # Unmatched backtick, keep it literal
+        parts[-2:] = [parts[-2] + "`" + parts[-1]]
+
+    out = []
+    for i, part in enumerate(parts):
+        escaped = html.escape(part, quote=False)
+        if i % 2:
+            out.append(f"<code>{escaped}</code>")
+        else:
+            escaped = BOLD_RE.sub(lambda m: f"<b>{m.group(1) or m.group(2)}</b>", escaped)
+            escaped = ITALIC_RE.sub(r"<i>\1</i>", escaped)
+            out.append(escaped)
+    return "".join(out)
+
+
+def _ordered(line: str) -> bool:
+    """Whether a list item line is numbered"""
+    return LIST_RE.match(line).group(1)[0].isdigit()
+
+
+def render_plain(text: str) -> str:
+    """Render text verbatim, preserving line breaks"""
+    return html.escape(text, quote=False).replace("\n", "<br>")
+
+
+class Block:
+    """A completed Markdown block"""
+
+    __slots__ = ("kind", "text", "lang", "digest")
+
+    def __init__(self, kind: str, text: str, lang: str = ""):
+        self.kind = kind
+        self.text = text
+        self.lang = lang
+        self.digest = content_digest(text, lang) if kind == "code" else None
+
+
+class MarkdownRenderer:
+    """Incrementally renders streamed Markdown into HTML.
+
+    Completed blocks are rendered once and cached; each ``feed`` only
+    re-parses the trailing open block, so streaming a response costs
+    O(chunk + open block) instead of O(response).
+    """
+
+    def __init__(self, highlighter=None):
+        self.highlighter = highlighter
+        self.blocks: List[Block] = []
+        self._html: List[str] = []
+        self._lines: List[str] = []
+        self._open_kind: Optional[str] = None
+        self._partial = ""
+        self._fence: Optional[str] = None
+        self.finished = False
+
+    def feed(self, chunk: str):
+        """Append a chunk of streamed text"""
+        lines = (self._partial + chunk).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self._consume_line(line)
+
+    def finish(self):
+        """Close any open block once the response is complete"""
+        if self._partial:
+            self._consume_line(self._partial)
+            self._partial = ""
+        if self._fence is not None:
+            self._close_block("code", "\n".join(self._lines), self._fence)
+            self._fence = None
+        self._close_open_block()
+        self.finished = True
+
+    def html(self) -> str:
+        """Return the HTML for everything fed so far"""
+        return "".join(self._html) + self._render_open()
+
+    def refresh(self, digest: str) -> bool:
+        """Re-render completed code blocks whose highlight became available"""
+        changed = False
+        for i, block in enumerate(self.blocks):
+            if block.digest == digest:
+                self._html[i] = self._render_block(block)
+                changed = True
+        return changed
+
+    def rerender(self):
+        """Re-render all completed blocks from cache (e.g. after a theme change)"""
+        self._html = [self._render_block(block) for block in self.blocks]
+
+    def _consume_line(self, line: str):
+        stripped = line.strip()
+
+        if self._fence is not None:
+            if stripped.startswith("```"):
+                self._close_block("code", "\n".join(self._lines), self._fence)
+                self._fence = None
+            else:
+                self._lines.append(line)
+            return
+
+        if stripped.startswith("```"):
+            self._close_open_block()
+            self._fence = stripped[3:].strip().lower()
+            return
+
+        if not stripped:
+            self._close_open_block()
+            return
+
+        heading = HEADING_RE.match(stripped)
+        if heading:
+            self._close_open_block()
+            self._close_block("heading", heading.group(2), str(len(heading.group(1))))
+            return
+
+        if RULE_RE.match(stripped):
+            self._close_open_block()
+            self._close_block("rule", "")
+            return
+
+        if LIST_RE.match(line):
+            kind = "list"
+        elif self._open_kind == "list" and line[:1].isspace():
+            # Indented continuation of the previous list item
+            self._lines[-1] += " " + stripped
+            return
+        else:
+            kind = "paragraph"
+
+        if self._open_kind and (
+            kind != self._open_kind or (kind == "list" and _ordered(line) != _ordered(self._lines[0]))
+        ):
+            # A change of list marker type starts a new list
+            self._close_open_block()
+        self._open_kind = kind
+        self._lines.append(line)
+
+    def _close_open_block(self):
+        if self._open_kind and self._lines:
+            self._close_block(self._open_kind, "\n".join(self._lines))
+        self._open_kind = None
+        self._lines = []
+
+    def _close_block(self, kind: str, text: str, lang: str = ""):
+        block = Block(kind, text, lang)
+        self.blocks.append(block)
+        self._html.append(self._render_block(block))
+        self._lines = []
+        self._open_kind = None
+
+    def _render_open(self) -> str:
+        if self._fence is not None:
+            # Unterminated fence: show raw code, highlight once it closes
+            lines = self._lines + ([self._partial] if self._partial else [])
+            return self._render_code_plain("\n".join(lines))
+
+        lines = list(self._lines)
+        if self._partial.strip():
+            lines.append(self._partial)
+        if not lines:
+            return ""
+        kind = self._open_kind or ("list" if LIST_RE.match(lines[0]) else "paragraph")
+        return self._render_block(Block(kind, "\n".join(lines)))
+
+    def _render_block(self, block: Block) -> str:
+        if block.kind == "code":
+            if self.highlighter is not None:
+                highlighted = self.highlighter.lookup(block.text, block.lang, block.digest)
+                if highlighted is not None:
+                    return f'<pre class="code">{highlighted}</pre>'
+            return self._render_code_plain(block.text)
+
+        if block.kind == "heading":
+            level = min(int(block.lang) + 2, 6)
+            return f"<h{level}>{render_inline(block.text)}</h{level}>"
+
+        if block.kind == "rule":
+            return "<hr>"
+
+        if block.kind == "list":
+            items = []
+            ordered = False
+            for line in block.text.split("\n"):
+                match = LIST_RE.match(line)
+                if match:
+                    ordered = match.group(1)[0].isdigit()
+                    items.append(match.group(2))
+                elif items:
+                    items[-1] += " " + line.strip()
+            tag = "ol" if ordered else "ul"
+            body = "".join(f"<li>{render_inline(item)}</li>" for item in items)
+            return f"<{tag}>{body}</{tag}>"
+
+        lines = block.text.split("\n")
+        return "<p>" + "<br>".join(render_inline(line) for line in lines) + "</p>"
+
+    @staticmethod
+    def _render_code_plain(code: str) -> str:
+        return f'<pre class="code">{html.escape(code, quote=False)}</pre>'
@@ -0,0 +1,349 @@
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import uuid
+
+from .session_pager import PagedMessages
+
+logger = logging.getLogger("main.messages")
+
+# Rough characters-per-token ratio used to fit context into a model's window
+CHARS_PER_TOKEN = 4
+
+# Approximate per-message overhead (dict, timestamp, keys) for memory estimates
+MESSAGE_OVERHEAD = 400
+
+# Keys hashed by ``message_digests`` besides the remaining ones, which are hashed as JSON
+DIGEST_KEYS = frozenset(("role", "content", "timestamp"))
+
+
+def message_digests(messages: Iterable[Dict], prefix: int) -> Tuple[Optional[str], str]:
+    """Content hashes of the first ``prefix`` messages and of all of them.
+
+    The first is None if there are fewer than ``prefix`` messages. Storage
+    that keeps the hash of what it wrote can compare it with the prefix
+    hash of a new list to tell whether the list only appends to it. A
+    missing timestamp hashes like ``None``, as it reads back from storage.
+    """
+    digest = hashlib.sha1()
+    prefix_digest = digest.hexdigest() if prefix == 0 else None
+    for count, message in enumerate(messages, 1):
+        text = f"{message['role']}\0{message['content']}\0{message.get('timestamp') or ''}\0"
+        if not DIGEST_KEYS.issuperset(message):
+            extra = {key: value for key, value in message.items() if key not in DIGEST_KEYS}
+            text += json.dumps(extra, sort_keys=True, ensure_ascii=False)
+        digest.update(f"{text}\1".encode("utf-8", "surrogatepass"))
+        if count == prefix:
+            prefix_digest = digest.hexdigest()
+    return prefix_digest, digest.hexdigest()
+
+
+class MessageStore:
+    """In-memory message list owned by a chat tab.
+
+    This is the single source of truth for a tab's conversation: the display
+    renders from it, saves persist it, and prompts and stats are built from
+    it, so nothing has to be recovered from the rendered transcript.
+
+    With a scrollback window configured, only the newest messages stay in
+    memory; older ones are spilled to an append-only JSONL segment on disk
+    and read back by offset on demand. ``messages`` always returns the
+    complete conversation.
+
+    A store can also start from ``base``, a paged view of a saved session
+    (see ``ChatHistory.open_paged``); those messages are only read when a
+    range that covers them is requested.
+    """
+
+    def __init__(self, model_name: str, messages: Optional[List[Dict]] = None, base: Optional[Sequence] = None):
+        self.model_name = model_name
+        self.session_name: Optional[str] = None
+        self._base: Sequence = base if base is not None else []
+        # Fixed when the store is created; a paged base may see its session grow or be rewritten later
+        self._base_count = len(self._base)
+        self._base_stats: Optional[Dict] = None
+        self._messages: List[Dict] = []
+        self._unload_path: Optional[str] = None
+        self._listeners: List[Callable] = []
+
+        # Scrollback window and spilled segment
+        self.max_messages: Optional[int] = None
+        self.max_bytes: Optional[int] = None
+        self.spill_dir: Optional[str] = None
+        self._segment_path: Optional[str] = None
+        self._segment_offsets: List[int] = []
+        self._segment_size = 0
+
+        self._reset_counters()
+        self._count = self._base_count
+        for message in messages or []:
+            self._append(message)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.messages)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._count)
+            return self.get_range(start, stop) if step == 1 else [self[i] for i in range(start, stop, step)]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("message index out of range")
+        return self.get_range(index, index + 1)[0]
+
+    @property
+    def messages(self) -> List[Dict]:
+        """All messages, including spilled and unloaded ones"""
+        return self.get_range(0, self._count)
+
+    @property
+    def is_unloaded(self) -> bool:
+        return self._unload_path is not None
+
+    @property
+    def base_count(self) -> int:
+        """Number of saved messages read on demand from the paged base"""
+        return self._base_count
+
+    @property
+    def spilled_count(self) -> int:
+        """Number of older messages held in the on-disk segment"""
+        return len(self._segment_offsets)
+
+    def subscribe(self, callback: Callable):
+        """Register ``callback(store, message)``; ``message`` is None when the store is cleared"""
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback: Callable):
+        """Remove a previously registered callback"""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def set_scrollback(self, max_messages: int, max_bytes: int, spill_dir: str):
+        """Keep at most ``max_messages`` / ``max_bytes`` in memory, spilling older messages to disk"""
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self._enforce_window()
+
+    def add_message(self, role: str, content: str, **metadata) -> Dict:
+        """Append a message and notify subscribers"""
+        message = {
+            "role": role,
+            "content": content,
+            "timestamp": datetime.now().isoformat(),
+        }
+        message.update(metadata)
+        self.reload()
+        self._append(message)
+        self._enforce_window()
+        logger.debug(f"Added {role} message to {self.model_name} store")
+        self._notify(message)
+        return message
+
+    def get_range(self, start: int, end: int) -> List[Dict]:
+        """Return messages ``start`` to ``end`` (exclusive), reading spilled ones from disk"""
+        start = max(start, 0)
+        end = min(end, self._count)
+        if start >= end:
+            return []
+
+        base = self._base_count
+        spilled = len(self._segment_offsets)
+        result = []
+        if start < base:
+            result.extend(self._base[start:min(end, base)])
+        if end > base and start < base + spilled:
+            result.extend(self._read_segment(max(start, base) - base, min(end, base + spilled) - base))
+        if end > base + spilled:
+            tail = self._read_unloaded() if self._unload_path is not None else self._messages
+            result.extend(tail[max(start - base - spilled, 0):end - base - spilled])
+        return result
+
+    def snapshot(self) -> PagedMessages:
+        """The conversation as it is now; saved base messages stay on disk until read"""
+        base, base_count = self._base, self._base_count
+        live = self.get_range(base_count, self._count)
+
+        def fetch(start: int, end: int) -> List[Dict]:
+            messages = list(base[start:min(end, base_count)]) if start < base_count else []
+            messages.extend(live[max(start - base_count, 0):end - base_count])
+            return messages
+
+        return PagedMessages(self._count, fetch)
+
+    def clear(self):
+        """Remove all messages and start a new session"""
+        self.discard_unloaded()
+        self._discard_segment()
+        self._messages = []
+        self._base = []
+        self._base_count = 0
+        self._base_stats = None
+        self.session_name = None
+        self._reset_counters()
+        self._notify(None)
+
+    def unload(self, path: str):
+        """Persist in-memory messages to ``path`` and release them from memory"""
+        if self._unload_path is not None:
+            return
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"session_name": self.session_name, "messages": self._messages}, f)
+        self._messages = []
+        self._unload_path = path
+        logger.debug(f"Unloaded {self._count} messages of {self.model_name} to {path}")
+
+    def reload(self):
+        """Bring unloaded messages back into memory"""
+        if self._unload_path is None:
+            return
+        self._messages = self._read_unloaded()
+        self.discard_unloaded()
+        logger.debug(f"Reloaded {self._count} messages of {self.model_name}")
+
+    def discard_unloaded(self):
+        """Remove the on-disk copy of unloaded messages"""
+        if self._unload_path is not None:
+            try:
+                os.remove(self._unload_path)
+            except OSError as e:
+                logger.warning(f"Failed to remove {self._unload_path}: {e}")
+            self._unload_path = None
+
+    def release(self):
+        """Remove every on-disk file owned by the store"""
+        self.discard_unloaded()
+        self._discard_segment()
+
+    def memory_usage(self) -> int:
+        """Estimated bytes held in memory by the messages"""
+        if self._unload_path is not None:
+            return 0
+        return self._tail_length + len(self._messages) * MESSAGE_OVERHEAD
+
+    def get_stats(self) -> Dict:
+        """Get statistics about the conversation (kept incrementally)"""
+        count = self._count
+        if self._base_stats is None:
+            # Saved messages in the base are counted once, on first request
+            self._base_stats = {"user": 0, "assistant": 0, "length": 0}
+            for message in self._base[:self._base_count]:
+                if message["role"] in ("user", "assistant"):
+                    self._base_stats[message["role"]] += 1
+                self._base_stats["length"] += len(message["content"])
+        return {
+            "message_count": count,
+            "user_messages": self._user_count + self._base_stats["user"],
+            "ai_messages": self._ai_count + self._base_stats["assistant"],
+            "average_message_length": (self._total_length + self._base_stats["length"]) / count if count else 0,
+        }
+
+    def build_prompt(self, context_length: int = 4096) -> str:
+        """Build the prompt for the latest user message, including as much
+        earlier conversation as fits in the model's context window"""
+        if not self._count:
+            return ""
+        if self._count == 1:
+            return self[0]["content"]
+
+        budget = context_length * CHARS_PER_TOKEN
+        lines: List[str] = []
+        end = self._count
+        while end > 0 and budget > 0:
+            # Walk backwards a page at a time so spilled history is only read if it fits
+            start = max(end - 20, 0)
+            for message in reversed(self.get_range(start, end)):
+                label = "User" if message["role"] == "user" else "Assistant"
+                line = f"{label}: {message['content']}"
+                if lines and len(line) > budget:
+                    budget = 0
+                    break
+                lines.append(line)
+                budget -= len(line)
+            end = start
+
+        lines.reverse()
+        lines.append("Assistant:")
+        return "\n\n".join(lines)
+
+    def _append(self, message: Dict):
+        self._messages.append(message)
+        self._count += 1
+        if message["role"] == "user":
+            self._user_count += 1
+        elif message["role"] == "assistant":
+            self._ai_count += 1
+        self._total_length += len(message["content"])
+        self._tail_length += len(message["content"])
+
+    def _enforce_window(self):
+        if self.spill_dir is None or self._unload_path is not None:
+            return
+        spill = 0
+        tail_length = self._tail_length
+        while len(self._messages) - spill > 1 and (
+            len(self._messages) - spill > self.max_messages or tail_length > self.max_bytes
+        ):
+            tail_length -= len(self._messages[spill]["content"])
+            spill += 1
+        if spill:
+            self._spill(spill)
+
+    def _spill(self, count: int):
+        if self._segment_path is None:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            self._segment_path = os.path.join(self.spill_dir, f"segment_{uuid.uuid4().hex}.jsonl")
+
+        spilled = self._messages[:count]
+        with open(self._segment_path, "ab") as f:
+            for message in spilled:
+                line = (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
+                self._segment_offsets.append(self._segment_size)
+                f.write(line)
+                self._segment_size += len(line)
+
+        del self._messages[:count]
+        self._tail_length -= sum(len(message["content"]) for message in spilled)
+        logger.debug(f"Spilled {count} messages of {self.model_name} to {self._segment_path}")
+
+    def _read_segment(self, start: int, end: int) -> List[Dict]:
+        with open(self._segment_path, "rb") as f:
+            f.seek(self._segment_offsets[start])
+            return [json.loads(f.readline()) for _ in range(end - start)]
+
+    def _discard_segment(self):
+        if self._segment_path is not None:
+            try:
+                os.remove(self._segment_path)
+            except OSError as e:
+                logger.warning(f"Failed to remove {self._segment_path}: {e}")
+        self._segment_path = None
+        self._segment_offsets = []
+        self._segment_size = 0
+
+    def _reset_counters(self):
+        self._count = 0
+        self._user_count = 0
+        self._ai_count = 0
+        self._total_length = 0
+        self._tail_length = 0
+
+    def _read_unloaded(self) -> List[Dict]:
+        with open(self._unload_path, "r", encoding="utf-8") as f:
+            return json.load(f).get("messages", [])
+
+    def _notify(self, message: Optional[Dict]):
+        for callback in list(self._listeners):
+            try:
+                callback(self, message)
+            except Exception as e:
+                logger.error(f"Message store listener failed: {e}")
@@ -1,11 +1,31 @@
+import copy
 import json
+import logging
 import os
-from typing import Dict, List, Optional
+import tempfile
+import threading
+from typing import Callable, Dict, List, Optional
+
+from PyQt6.QtCore import QFileSystemWatcher, QObject, QTimer
+
+logger = logging.getLogger("main.config")
+
+# Seconds to wait for further edits before writing the config file
+WRITE_DELAY = 0.5
 
 
 class ModelConfig:
-    def __init__(self):
-        self.config_file = "model_config.json"
+    """Model configuration backed by ``model_config.json``.
+
+    Use ``get_model_config()`` to share one instance across the process.
+    Edits are applied in memory immediately and written to disk after a short
+    debounce, atomically via a temporary file and rename. Changes made to the
+    file by another process are picked up by ``check_for_changes`` (driven by
+    a ``ConfigWatcher``), and subscribers are told which model keys changed.
+    """
+
+    def __init__(self, config_file: str = "model_config.json"):
+        self.config_file = config_file
         self.default_models = {
             "deepseek-coder": {
                 "name": "deepseek-coder",
@@ -32,28 +52,97 @@ class ModelConfig:
                 "parameters": {"temperature": 0.7, "top_p": 0.95},
             },
         }
+        self.models: Dict[str, Dict] = {}
+        self._lock = threading.RLock()
+        self._listeners: List[Callable] = []
+        self._signature: Optional[tuple] = None
+        self._write_timer: Optional[threading.Timer] = None
         self.load_config()
 
-    def load_config(self):
-        """Load model configuration from file or create with defaults"""
-        if os.path.exists(self.config_file):
+    def subscribe(self, callback: Callable):
+        """Register ``callback(config, changed_keys)``, called when models change"""
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback: Callable):
+        """Remove a previously registered callback"""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def load_config(self) -> List[str]:
+        """Load model configuration from file or create with defaults; returns changed keys"""
+        with self._lock:
+            old = self.models
+            if os.path.exists(self.config_file):
+                try:
+                    signature = self._file_signature()
+                    with open(self.config_file, "r") as f:
+                        self.models = json.load(f)
+                    self._signature = signature
+                except (OSError, ValueError) as e:
+                    logger.error(f"Failed to load {self.config_file}: {e}")
+                    if not self.models:
+                        self.models = copy.deepcopy(self.default_models)
+            else:
+                self.models = copy.deepcopy(self.default_models)
+                self.flush(force=True)
+            return self._changed_keys(old, self.models)
+
+    def save_config(self) -> bool:
+        """Schedule a debounced write of the current configuration"""
+        with self._lock:
+            if self._write_timer is not None:
+                self._write_timer.cancel()
+            self._write_timer = threading.Timer(WRITE_DELAY, self.flush)
+            self._write_timer.daemon = True
+            self._write_timer.start()
+        return True
+
+    def flush(self, force: bool = False) -> bool:
+        """Write a pending configuration change to disk now (temp file + rename)"""
+        with self._lock:
+            if self._write_timer is None and not force:
+                return True
+            if self._write_timer is not None:
+                self._write_timer.cancel()
+                self._write_timer = None
+
+            directory = os.path.dirname(os.path.abspath(self.config_file))
             try:
-                with open(self.config_file, "r") as f:
-                    self.models = json.load(f)
-            except:
-                self.models = self.default_models
-        else:
-            self.models = self.default_models
-            self.save_config()
-
-    def save_config(self):
-        """Save current model configuration to file"""
-        try:
-            with open(self.config_file, "w") as f:
-                json.dump(self.models, f, indent=4)
-            return True
-        except:
-            return False
+                fd, temp_path = tempfile.mkstemp(prefix=".model_config_", suffix=".tmp", dir=directory)
+                try:
+                    with os.fdopen(fd, "w") as f:
+                        json.dump(self.models, f, indent=4)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(temp_path, self.config_file)
+                except BaseException:
+                    os.remove(temp_path)
+                    raise
+                self._signature = self._file_signature()
+                logger.debug(f"Wrote {self.config_file}")
+                return True
+            except OSError as e:
+                logger.error(f"Failed to save {self.config_file}: {e}")
+                return False
+
+    def check_for_changes(self) -> List[str]:
+        """Reload the file if another writer changed it and notify subscribers"""
+        with self._lock:
+            if self._write_timer is not None:
+                # Our own pending write wins; it will overwrite the file shortly
+                return []
+            try:
+                signature = self._file_signature()
+            except OSError:
+                return []
+            if signature == self._signature:
+                return []
+            changed = self.load_config()
+
+        if changed:
+            logger.info(f"Reloaded {self.config_file}; changed models: {', '.join(changed)}")
+            self._notify(changed)
+        return changed
 
     def list_available_models(self) -> List[str]:
         """Return list of available model names"""
@@ -72,28 +161,93 @@ class ModelConfig:
 
     def update_model_parameters(self, model_name: str, parameters: Dict) -> bool:
         """Update parameters for a specific model"""
-        if model_name in self.models:
+        with self._lock:
+            if model_name not in self.models:
+                return False
             self.models[model_name]["parameters"].update(parameters)
-            return self.save_config()
-        return False
+        self._notify([model_name])
+        return self.save_config()
 
     def add_model(
         self, name: str, description: str, context_length: int, parameters: Dict
     ) -> bool:
         """Add a new model configuration"""
-        if name not in self.models:
+        with self._lock:
+            if name in self.models:
+                return False
             self.models[name] = {
                 "name": name,
                 "description": description,
                 "context_length": context_length,
                 "parameters": parameters,
             }
-            return self.save_config()
-        return False
+        self._notify([name])
+        return self.save_config()
 
     def remove_model(self, name: str) -> bool:
         """Remove a model configuration"""
-        if name in self.models:
+        with self._lock:
+            if name not in self.models:
+                return False
             del self.models[name]
-            return self.save_config()
-        return False
+        self._notify([name])
+        return self.save_config()
+
+    def _file_signature(self) -> tuple:
+        """Modification time and size, used to detect writes by other processes"""
+        stat = os.stat(self.config_file)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _changed_keys(self, old: Dict, new: Dict) -> List[str]:
+        return [key for key in list(old) + [k for k in new if k not in old] if old.get(key) != new.get(key)]
+
+    def _notify(self, changed: List[str]):
+        for callback in list(self._listeners):
+            try:
+                callback(self, changed)
+            except Exception as e:
+                logger.error(f"Model config listener failed: {e}")
+
+
+class ConfigWatcher(QObject):
+    """Hot-reloads a ModelConfig when its file changes on disk.
+
+    Both the file and its directory are watched, since an atomic rename by
+    another writer replaces the file the watcher was attached to. Bursts of
+    events are coalesced before the mtime is checked.
+    """
+
+    def __init__(self, config: ModelConfig, parent=None, delay_ms: int = 200):
+        super().__init__(parent)
+        self.config = config
+        self.path = os.path.abspath(config.config_file)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay_ms)
+        self.timer.timeout.connect(self._check)
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.addPath(os.path.dirname(self.path))
+        if os.path.exists(self.path):
+            self.watcher.addPath(self.path)
+        self.watcher.fileChanged.connect(lambda _: self.timer.start())
+        self.watcher.directoryChanged.connect(lambda _: self.timer.start())
+
+    def _check(self):
+        if os.path.exists(self.path) and self.path not in self.watcher.files():
+            self.watcher.addPath(self.path)
+        self.config.check_for_changes()
+
+
+_shared_config: Optional[ModelConfig] = None
+_shared_lock = threading.Lock()
+
+
+def get_model_config() -> ModelConfig:
+    """Return the process-wide ModelConfig, creating it on first use"""
+    global _shared_config
+    with _shared_lock:
+        if _shared_config is None:
+            _shared_config = ModelConfig()
+        return _shared_config
@@ -0,0 +1,173 @@
+from bisect import bisect_left, insort
+import heapq
+from typing import Dict, Hashable, List, Optional, Tuple
+import logging
+import re
+
+logger = logging.getLogger("main.search")
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+QUERY_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+# Characters of message text kept for result previews
+SNIPPET_LENGTH = 160
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lower-case index terms"""
+    return TOKEN_RE.findall(text.lower())
+
+
+class SearchResult:
+    """A message matching a search query"""
+
+    __slots__ = ("source", "message_index", "role", "snippet", "score")
+
+    def __init__(self, source: Hashable, message_index: int, role: str, snippet: str, score: int):
+        self.source = source
+        self.message_index = message_index
+        self.role = role
+        self.snippet = snippet
+        self.score = score
+
+
+class SearchIndex:
+    """Incrementally maintained inverted index over chat messages.
+
+    Messages are added one at a time as they arrive, so the index is never
+    rebuilt. Each message is a document identified by its source (an open
+    tab or a saved session) and its position within that source. Queries
+    are ANDed clauses: ``word`` matches exactly, ``word*`` matches any term
+    with that prefix and ``"two words"`` matches the phrase.
+    """
+
+    def __init__(self):
+        # term -> {doc_id: [positions]}
+        self._postings: Dict[str, Dict[int, List[int]]] = {}
+        # Sorted vocabulary for prefix lookups
+        self._terms: List[str] = []
+        # doc_id -> (source, message_index, role, snippet)
+        self._docs: Dict[int, Tuple[Hashable, int, str, str]] = {}
+        self._doc_terms: Dict[int, List[str]] = {}
+        self._source_docs: Dict[Hashable, List[int]] = {}
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def source_size(self, source: Hashable) -> int:
+        """Number of indexed messages for a source"""
+        return len(self._source_docs.get(source, []))
+
+    def add(self, source: Hashable, message_index: int, message: Dict) -> int:
+        """Index a single message"""
+        doc_id = self._next_id
+        self._next_id += 1
+
+        content = message.get("content", "")
+        positions: Dict[str, List[int]] = {}
+        for position, term in enumerate(tokenize(content)):
+            positions.setdefault(term, []).append(position)
+
+        for term, term_positions in positions.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                insort(self._terms, term)
+            postings[doc_id] = term_positions
+
+        snippet = " ".join(content.split())[:SNIPPET_LENGTH]
+        self._docs[doc_id] = (source, message_index, message.get("role", ""), snippet)
+        self._doc_terms[doc_id] = list(positions)
+        self._source_docs.setdefault(source, []).append(doc_id)
+        return doc_id
+
+    def remove_source(self, source: Hashable):
+        """Remove every message of a source from the index"""
+        for doc_id in self._source_docs.pop(source, []):
+            for term in self._doc_terms.pop(doc_id, []):
+                postings = self._postings.get(term)
+                if postings is None:
+                    continue
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+                    index = bisect_left(self._terms, term)
+                    if index < len(self._terms) and self._terms[index] == term:
+                        del self._terms[index]
+            self._docs.pop(doc_id, None)
+
+    def search(self, query: str, limit: int = 50) -> List[SearchResult]:
+        """Return messages matching all clauses of the query, best first"""
+        scores: Optional[Dict[int, int]] = None
+        for phrase, word in QUERY_RE.findall(query):
+            if phrase:
+                matches = self._match_phrase(tokenize(phrase))
+            elif word.endswith("*"):
+                matches = self._match_prefix(word[:-1].lower())
+            else:
+                terms = tokenize(word)
+                matches = self._match_phrase(terms) if len(terms) > 1 else self._match_term(terms)
+            if matches is None:
+                continue
+
+            if scores is None:
+                scores = matches
+            else:
+                scores = {doc_id: scores[doc_id] + hits for doc_id, hits in matches.items() if doc_id in scores}
+            if not scores:
+                return []
+
+        if not scores:
+            return []
+
+        # Most hits first, newest first among equals
+        ranked = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], -item[0]))
+        results = []
+        for doc_id, score in ranked:
+            source, message_index, role, snippet = self._docs[doc_id]
+            results.append(SearchResult(source, message_index, role, snippet, score))
+        return results
+
+    def _match_term(self, terms: List[str]) -> Optional[Dict[int, int]]:
+        if not terms:
+            return None
+        postings = self._postings.get(terms[0], {})
+        return {doc_id: len(positions) for doc_id, positions in postings.items()}
+
+    def _match_prefix(self, prefix: str) -> Optional[Dict[int, int]]:
+        if not prefix:
+            return None
+        matches: Dict[int, int] = {}
+        index = bisect_left(self._terms, prefix)
+        while index < len(self._terms) and self._terms[index].startswith(prefix):
+            for doc_id, positions in self._postings[self._terms[index]].items():
+                matches[doc_id] = matches.get(doc_id, 0) + len(positions)
+            index += 1
+        return matches
+
+    def _match_phrase(self, terms: List[str]) -> Optional[Dict[int, int]]:
+        if not terms:
+            return None
+        if len(terms) == 1:
+            return self._match_term(terms)
+
+        postings = [self._postings.get(term) for term in terms]
+        if not all(postings):
+            return {}
+
+        # Intersect starting from the rarest term
+        candidates = set(min(postings, key=len))
+        for term_postings in postings:
+            candidates &= term_postings.keys()
+
+        matches: Dict[int, int] = {}
+        for doc_id in candidates:
+            starts = set(postings[0][doc_id])
+            for offset, term_postings in enumerate(postings[1:], start=1):
+                starts &= {position - offset for position in term_postings[doc_id]}
+                if not starts:
+                    break
+            if starts:
+                matches[doc_id] = len(starts)
+        return matches
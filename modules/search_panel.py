@@ -0,0 +1,113 @@
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtWidgets import (
+    QWidget,
+    QVBoxLayout,
+    QLineEdit,
+    QListWidget,
+    QListWidgetItem,
+)
+import logging
+import time
+
+from .history_search import CANDIDATE_WINDOW, HistoryHits
+from .search_index import SearchResult
+
+logger = logging.getLogger("main.search.panel")
+
+
+class SearchPanel(QWidget):
+    """Search bar over the messages of open tabs and saved sessions"""
+
+    def __init__(self, tab_manager, parent=None):
+        super().__init__(parent)
+        self.tab_manager = tab_manager
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.search_field = QLineEdit()
+        self.search_field.setPlaceholderText('Search chats (word* for prefix, "quotes" for phrases)')
+        self.search_field.setClearButtonEnabled(True)
+        layout.addWidget(self.search_field)
+
+        self.results = QListWidget()
+        self.results.setMaximumHeight(180)
+        self.results.hide()
+        layout.addWidget(self.results)
+
+        # Run the query once typing pauses
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.run_search)
+
+        self.search_field.textChanged.connect(lambda: self.search_timer.start())
+        self.search_field.returnPressed.connect(self.run_search)
+        self.results.itemActivated.connect(self.open_result)
+
+    def focus(self):
+        """Focus the search field"""
+        self.search_field.setFocus()
+        self.search_field.selectAll()
+
+    def run_search(self):
+        """Query the index and list matching messages"""
+        query = self.search_field.text().strip()
+        self.results.clear()
+        if not query:
+            self.results.hide()
+            return
+
+        start = time.perf_counter()
+        results = self.tab_manager.search_index.search(query)
+        # With FTS5 saved sessions are searched in the history's persistent index;
+        # as-you-type searches rank only the newest matches to stay responsive
+        history_search = self.tab_manager.chat_history.search
+        hits = history_search.search(query, window=CANDIDATE_WINDOW) if history_search is not None else HistoryHits()
+        elapsed = (time.perf_counter() - start) * 1000
+        logger.debug(f"Search for {query!r} returned {len(results) + len(hits)} results in {elapsed:.1f} ms")
+
+        results.extend(
+            SearchResult(("session", hit.session_name), hit.message_index, hit.role, hit.format_snippet("", ""), 0)
+            for hit in hits
+        )
+        for result in results:
+            kind, key = result.source
+            if kind == "session":
+                tab = self.tab_manager.find_session_tab(key)
+                if tab is not None:
+                    # The tab indexes only the messages after its saved base;
+                    # later session hits are already covered by the tab's results
+                    if result.message_index >= tab.messages.base_count:
+                        continue
+                    kind, key = "tab", tab.tab_id
+            if kind == "tab":
+                tab = self.tab_manager.find_tab(key)
+                if tab is None:
+                    continue
+                label = self.tab_manager.tabText(self.tab_manager.indexOf(tab))
+            else:
+                label = f"saved: {key}"
+
+            item = QListWidgetItem(f"[{label}] {result.role.title()}: {result.snippet}")
+            item.setData(Qt.ItemDataRole.UserRole, (kind, key, result.message_index))
+            self.results.addItem(item)
+
+        if not self.results.count():
+            self.results.addItem("No matches")
+        if hits.truncated:
+            self.results.addItem(f"Saved chats: best of the {CANDIDATE_WINDOW} newest matches (Search History ranks all)")
+        self.results.show()
+
+    def open_result(self, item: QListWidgetItem):
+        """Jump to the message behind a result"""
+        target = item.data(Qt.ItemDataRole.UserRole)
+        if not target:
+            return
+        kind, key, message_index = target
+        if kind == "tab":
+            tab = self.tab_manager.find_tab(key)
+            if tab is not None:
+                self.tab_manager.show_message(tab, message_index)
+        else:
+            self.tab_manager.open_session(key, message_index)
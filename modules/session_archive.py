@@ -0,0 +1,204 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+import gzip
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from .session_manifest import session_entry
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+logger = logging.getLogger("main.history.archive")
+
+CODEC_SUFFIXES = {"zstd": ".json.zst", "gzip": ".json.gz"}
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+class SessionArchive:
+    """Cold tier for session files that have not been touched for a while.
+
+    Each archived session is stored compressed (zstd when ``zstandard`` is
+    installed, gzip otherwise) in ``archive/`` and described in
+    ``archive/index.json`` together with its listing fields and sizes, so
+    sessions can be listed without decompressing anything.
+    """
+
+    def __init__(self, storage_dir: str):
+        self.directory = os.path.join(storage_dir, "archive")
+        self.index_path = os.path.join(self.directory, "index.json")
+        self.codec = "zstd" if ZSTD_AVAILABLE else "gzip"
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, Dict]] = None
+        self._signature = None
+
+    def __contains__(self, session_name: str) -> bool:
+        with self._lock:
+            return session_name in self._load()
+
+    def list_entries(self) -> List[Dict]:
+        """Listing entries of all archived sessions"""
+        with self._lock:
+            return [dict(item["entry"]) for item in self._load().values()]
+
+    def entry(self, session_name: str) -> Optional[Dict]:
+        """Listing entry of an archived session, or None"""
+        with self._lock:
+            item = self._load().get(session_name)
+        return dict(item["entry"]) if item else None
+
+    def details(self, session_name: str) -> Optional[Dict]:
+        """File, codec, sizes and ``archived_at`` of an archived session, or None"""
+        with self._lock:
+            item = self._load().get(session_name)
+        return {key: value for key, value in item.items() if key != "entry"} if item else None
+
+    def sizes(self) -> Dict[str, int]:
+        """Compressed size of every archived session"""
+        with self._lock:
+            return {name: item["compressed_size"] for name, item in self._load().items()}
+
+    def add(self, session_name: str, raw: bytes, data: Dict) -> Dict:
+        """Store the raw JSON of a session compressed and record it in the index"""
+        compressed = compress(raw, self.codec)
+        filename = f"chat_{session_name}{CODEC_SUFFIXES[self.codec]}"
+        os.makedirs(self.directory, exist_ok=True)
+        self._atomic_write(os.path.join(self.directory, filename), compressed)
+        item = {
+            "file": filename,
+            "codec": self.codec,
+            "original_size": len(raw),
+            "compressed_size": len(compressed),
+            "archived_at": datetime.now().isoformat(),
+            "entry": session_entry(data),
+        }
+        with self._lock:
+            self._load()[session_name] = item
+            self._save()
+        return item
+
+    def read(self, session_name: str) -> Optional[Dict]:
+        """Decompress and parse an archived session"""
+        with self._lock:
+            item = self._load().get(session_name)
+        if item is None:
+            return None
+        with open(os.path.join(self.directory, item["file"]), "rb") as f:
+            return json.loads(decompress(f.read(), item["codec"]))
+
+    def remove(self, session_name: str) -> bool:
+        """Drop a session from the archive"""
+        with self._lock:
+            item = self._load().pop(session_name, None)
+            if item is None:
+                return False
+            self._save()
+        try:
+            os.remove(os.path.join(self.directory, item["file"]))
+        except OSError as e:
+            logger.warning(f"Failed to remove archived session {session_name}: {e}")
+        return True
+
+    def stats(self) -> Dict:
+        """Archived session count and sizes"""
+        with self._lock:
+            items = list(self._load().values())
+        original = sum(item["original_size"] for item in items)
+        compressed = sum(item["compressed_size"] for item in items)
+        return {
+            "sessions": len(items),
+            "original_bytes": original,
+            "compressed_bytes": compressed,
+            "saved_bytes": original - compressed,
+        }
+
+    def _load(self) -> Dict[str, Dict]:
+        # Another process may have replaced the index since it was read
+        try:
+            stat = os.stat(self.index_path)
+            signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            signature = None
+        if self._index is None or signature != self._signature:
+            self._index = {}
+            self._signature = signature
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    self._index = json.load(f)
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to read archive index {self.index_path}: {e}")
+        return self._index
+
+    def _save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._atomic_write(self.index_path, json.dumps(self._index, separators=(",", ":")).encode("utf-8"))
+        stat = os.stat(self.index_path)
+        self._signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _atomic_write(self, path: str, data: bytes):
+        fd, temp_path = tempfile.mkstemp(prefix=".archive_", suffix=".tmp", dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+
+def main():
+    import argparse
+    from .chat_history import ChatHistory
+
+    parser = argparse.ArgumentParser(description="Archive sessions that have not been touched for a while")
+    parser.add_argument("--storage", default="chat_history/chat_history", help="chat history directory")
+    parser.add_argument("--days", type=float, default=30, help="archive sessions untouched for this many days")
+    args = parser.parse_args()
+
+    history = ChatHistory(args.storage)
+    report = history.archive_old_sessions(args.days)
+    stats = history.archive.stats()
+    print(f"Archived {report['sessions']} sessions ({history.archive.codec}): "
+          f"{report['original_bytes'] / 1024:.0f} KB -> {report['compressed_bytes'] / 1024:.0f} KB")
+    print(f"Archive holds {stats['sessions']} sessions, saving {stats['saved_bytes'] / 1024 / 1024:.1f} MB "
+          f"({stats['compressed_bytes'] / max(stats['original_bytes'], 1):.0%} of original size)")
+
+    # Load-time overhead: archived reads against reading the same JSON uncompressed
+    names = [entry["name"] for entry in history.archive.list_entries()][:50]
+    if names:
+        start = time.perf_counter()
+        payloads = [json.dumps(history.read_session(name)) for name in names]
+        archived = (time.perf_counter() - start) / len(names)
+        start = time.perf_counter()
+        for payload in payloads:
+            json.loads(payload)
+        plain = (time.perf_counter() - start) / len(names)
+        print(f"Average load: {archived * 1000:.2f} ms archived vs {plain * 1000:.2f} ms parse-only "
+              f"(+{(archived - plain) * 1000:.2f} ms per session)")
+
+
+if __name__ == "__main__":
+    # python -m modules.session_archive --days 30
+    main()
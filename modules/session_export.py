@@ -0,0 +1,225 @@
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+import io
+import json
+import logging
+import os
+import tarfile
+import time
+import zipfile
+
+logger = logging.getLogger("main.history.export")
+
+# Formats written as one file per session into a directory
+FILE_FORMATS = {"txt": ".txt", "markdown": ".md", "json": ".json"}
+# Formats written as a single file for the whole selection
+STREAM_FORMATS = ("jsonl", "tar", "zip")
+FORMATS = tuple(FILE_FORMATS) + STREAM_FORMATS
+
+
+def render_lines(data: Dict, format: str) -> Iterator[str]:
+    """Render a parsed session piece by piece in one of the file formats"""
+    session_name = data.get("session_name", "")
+    messages = data.get("messages", [])
+    if format == "txt":
+        for msg in messages:
+            yield f"{msg['role'].upper()}: {msg['content']}\n\n"
+    elif format == "markdown":
+        yield f"# Chat Session: {session_name}\n\n"
+        for msg in messages:
+            yield f"### {msg['role'].title()}\n"
+            yield f"{msg['content']}\n\n"
+    elif format == "json":
+        yield json.dumps(data, indent=2, ensure_ascii=False)
+    elif format == "jsonl":
+        model = data.get("metadata", {}).get("model")
+        for index, msg in enumerate(messages):
+            yield json.dumps(
+                {"session": session_name, "model": model, "index": index, **msg}, ensure_ascii=False
+            ) + "\n"
+    else:
+        raise ValueError(f"Unsupported export format: {format}")
+
+
+class BulkExporter:
+    """Exports any selection of saved sessions, streaming them one at a time.
+
+    Sessions are read and rendered by a thread pool, but at most
+    ``max_pending`` rendered sessions are held at once: new sessions are
+    only handed to the pool as finished ones are written out. Memory use
+    therefore follows the largest few sessions rather than the size of
+    the history. ``txt``, ``markdown`` and ``json`` write one file per
+    session into a directory; ``jsonl`` writes one line per message and
+    ``tar``/``zip`` write a single archive with one member per session.
+    """
+
+    def __init__(self, chat_history, workers: int = 4, max_pending: Optional[int] = None):
+        self.chat_history = chat_history
+        self.workers = max(1, workers)
+        self.max_pending = max_pending or self.workers * 2
+
+    def export(
+        self,
+        session_names: Iterable[str],
+        format: str,
+        destination: str,
+        member_format: str = "markdown",
+        progress: Optional[Callable[[int], None]] = None,
+    ) -> Dict:
+        """Export sessions to ``destination`` and return a report of what was written"""
+        if format not in FORMATS:
+            raise ValueError(f"Unsupported export format: {format}")
+        if format in ("tar", "zip") and member_format not in FILE_FORMATS:
+            raise ValueError(f"Unsupported archive member format: {member_format}")
+
+        report = {"sessions": 0, "messages": 0, "bytes": 0, "skipped": [], "destination": destination}
+        start = time.perf_counter()
+
+        if format in FILE_FORMATS:
+            os.makedirs(destination, exist_ok=True)
+            render = lambda name: self._write_file(name, format, destination)
+            sink = None
+        else:
+            parent = os.path.dirname(destination)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            render_format = "jsonl" if format == "jsonl" else member_format
+            render = lambda name: self._render(name, render_format)
+            sink = self._open_sink(format, destination, member_format)
+
+        try:
+            for name, result in self._run(session_names, render):
+                if result is None:
+                    report["skipped"].append(name)
+                    continue
+                message_count, payload = result
+                if sink is not None:
+                    sink(name, payload)
+                    payload = len(payload)
+                report["sessions"] += 1
+                report["messages"] += message_count
+                report["bytes"] += payload
+                if progress:
+                    progress(report["sessions"])
+        finally:
+            if sink is not None:
+                sink(None, None)
+
+        report["seconds"] = time.perf_counter() - start
+        logger.info(
+            f"Exported {report['sessions']} sessions ({report['messages']} messages, "
+            f"{report['bytes'] / 1024:.0f} KB) as {format} in {report['seconds']:.2f}s"
+        )
+        if report["skipped"]:
+            logger.warning(f"Skipped {len(report['skipped'])} sessions that could not be read")
+        return report
+
+    def _run(self, session_names: Iterable[str], render: Callable) -> Iterator:
+        """Yield (name, result) in selection order with a bounded number of sessions in flight"""
+        names = iter(session_names)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="export") as pool:
+            pending = deque()
+            for name in names:
+                pending.append((name, pool.submit(render, name)))
+                if len(pending) >= self.max_pending:
+                    break
+            while pending:
+                name, future = pending.popleft()
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Failed to export session {name}: {e}")
+                    result = None
+                next_name = next(names, None)
+                if next_name is not None:
+                    pending.append((next_name, pool.submit(render, next_name)))
+                yield name, result
+
+    def _read(self, session_name: str) -> Optional[Dict]:
+        return self.chat_history.read_session(session_name)
+
+    def _render(self, session_name: str, format: str):
+        data = self._read(session_name)
+        if data is None:
+            return None
+        payload = "".join(render_lines(data, format)).encode("utf-8")
+        return len(data.get("messages", [])), payload
+
+    def _write_file(self, session_name: str, format: str, directory: str):
+        data = self._read(session_name)
+        if data is None:
+            return None
+        path = os.path.join(directory, f"chat_{session_name}{FILE_FORMATS[format]}")
+        with open(path, "w", encoding="utf-8") as f:
+            for chunk in render_lines(data, format):
+                f.write(chunk)
+        return len(data.get("messages", [])), os.path.getsize(path)
+
+    def _open_sink(self, format: str, destination: str, member_format: str) -> Callable:
+        """A writer taking (session_name, payload) and closing on (None, None)"""
+        suffix = FILE_FORMATS.get(member_format, "")
+        if format == "jsonl":
+            handle = open(destination, "wb")
+
+            def sink(name, payload):
+                if name is None:
+                    handle.close()
+                else:
+                    handle.write(payload)
+
+        elif format == "tar":
+            mode = "w:gz" if destination.endswith((".tar.gz", ".tgz")) else "w"
+            archive = tarfile.open(destination, mode)
+            now = time.time()
+
+            def sink(name, payload):
+                if name is None:
+                    archive.close()
+                    return
+                info = tarfile.TarInfo(f"chat_{name}{suffix}")
+                info.size = len(payload)
+                info.mtime = now
+                archive.addfile(info, io.BytesIO(payload))
+
+        else:
+            archive = zipfile.ZipFile(destination, "w", compression=zipfile.ZIP_DEFLATED)
+
+            def sink(name, payload):
+                if name is None:
+                    archive.close()
+                else:
+                    archive.writestr(f"chat_{name}{suffix}", payload)
+
+        return sink
+
+
+def main():
+    import argparse
+    from .chat_history import ChatHistory
+
+    parser = argparse.ArgumentParser(description="Export saved chat sessions")
+    parser.add_argument("destination", help="output directory (txt/markdown/json) or file (jsonl/tar/zip)")
+    parser.add_argument("--format", choices=FORMATS, default="zip")
+    parser.add_argument("--member-format", choices=list(FILE_FORMATS), default="markdown",
+                        help="format of each session inside a tar or zip archive")
+    parser.add_argument("--storage", default="chat_history/chat_history", help="chat history directory")
+    parser.add_argument("--backend", choices=["json", "sqlite"], default="json")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("sessions", nargs="*", help="session names (default: all)")
+    args = parser.parse_args()
+
+    history = ChatHistory(args.storage, backend=args.backend)
+    names: List[str] = args.sessions or [session["name"] for session in history.list_sessions()]
+    exporter = BulkExporter(history, workers=args.workers)
+    report = exporter.export(names, args.format, args.destination, member_format=args.member_format)
+    history.close()
+    print(f"Exported {report['sessions']} sessions, {report['messages']} messages, "
+          f"{report['bytes'] / 1024 / 1024:.1f} MB in {report['seconds']:.2f}s -> {report['destination']}")
+    if report["skipped"]:
+        print(f"Skipped: {', '.join(report['skipped'])}")
+
+
+if __name__ == "__main__":
+    # python -m modules.session_export exports/history.zip --format zip
+    main()
@@ -0,0 +1,81 @@
+from typing import Dict, List
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger("main.history.journal")
+
+# How appended records are made durable:
+#   always - fsync after every append
+#   batch  - fsync once BATCH_RECORDS records or BATCH_SECONDS have accumulated
+#   none   - leave it to the operating system
+FSYNC_POLICIES = ("always", "batch", "none")
+BATCH_RECORDS = 32
+BATCH_SECONDS = 1.0
+
+
+class SessionJournal:
+    """Append-only JSONL journal of messages added to a saved session"""
+
+    def __init__(self, path: str, fsync_policy: str = "batch"):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync_policy}")
+        self.path = path
+        self.fsync_policy = fsync_policy
+        self.records = len(self.read(path)) if os.path.exists(path) else 0
+        self._file = open(path, "ab")
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    @staticmethod
+    def read(path: str) -> List[Dict]:
+        """Messages recorded in a journal file, ignoring a torn final line"""
+        messages = []
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    messages.append(json.loads(line))
+                except ValueError:
+                    logger.warning(f"Skipping incomplete journal record in {path}")
+        return messages
+
+    def append(self, messages: List[Dict]) -> int:
+        """Append messages and return the number of bytes written"""
+        data = b"".join((json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8") for message in messages)
+        self._reopen_if_moved()
+        self._file.write(data)
+        self._file.flush()
+        self.records += len(messages)
+        self._unsynced += len(messages)
+
+        if self.fsync_policy == "always" or (
+            self.fsync_policy == "batch"
+            and (self._unsynced >= BATCH_RECORDS or time.monotonic() - self._last_sync >= BATCH_SECONDS)
+        ):
+            self.sync()
+        return len(data)
+
+    def sync(self):
+        """fsync records appended since the last sync"""
+        if self._unsynced and self.fsync_policy != "none":
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _reopen_if_moved(self):
+        """Start writing to a new journal if this one was moved aside (e.g. by another process compacting it)"""
+        try:
+            moved = os.stat(self.path).st_ino != os.fstat(self._file.fileno()).st_ino
+        except FileNotFoundError:
+            moved = True
+        if moved:
+            self.close()
+            self.records = len(self.read(self.path)) if os.path.exists(self.path) else 0
+            self._file = open(self.path, "ab")
+
+    def close(self):
+        """Sync and close the journal file"""
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
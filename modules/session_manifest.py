@@ -0,0 +1,145 @@
+from typing import Dict, List, Optional
+import json
+import logging
+import os
+import tempfile
+import threading
+
+logger = logging.getLogger("main.history.manifest")
+
+MANIFEST_VERSION = 2
+
+
+def session_entry(data: Dict) -> Dict:
+    """The listing fields of a parsed session file"""
+    metadata = data.get("metadata", {})
+    return {
+        "name": data.get("session_name"),
+        "created_at": metadata.get("created_at"),
+        "message_count": metadata.get("message_count", 0),
+        "last_modified": metadata.get("last_modified"),
+        "model": metadata.get("model"),
+        "starred": bool(metadata.get("starred")),
+    }
+
+
+class SessionManifest:
+    """Compact index of session listing metadata for a directory of JSON sessions.
+
+    Each ``chat_*.json`` file has an entry keyed by file name together with
+    the file's mtime and size when it was read. Listing stats every file and
+    only parses the ones whose mtime or size no longer match, so its cost
+    follows the number of changed files rather than the size of the history.
+    Saves and deletes update the in-memory manifest; it is written back
+    (atomically) after the next listing, so saving a session never rewrites
+    the whole manifest.
+    """
+
+    def __init__(self, storage_dir: str, filename: str = "manifest.json"):
+        self.storage_dir = storage_dir
+        self.path = os.path.join(storage_dir, filename)
+        self._lock = threading.Lock()
+        self._files: Optional[Dict[str, list]] = None
+        self._dirty = False
+
+    def list_entries(self) -> List[Dict]:
+        """Listing entries for every session file, refreshing stale ones"""
+        with self._lock:
+            files = self._load()
+            seen = set()
+            parsed = 0
+            changed = self._dirty
+            for dir_entry in os.scandir(self.storage_dir):
+                name = dir_entry.name
+                if not (name.startswith("chat_") and name.endswith(".json")):
+                    continue
+                seen.add(name)
+                try:
+                    stat = dir_entry.stat()
+                except OSError:
+                    continue
+                cached = files.get(name)
+                if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                    continue
+                try:
+                    with open(dir_entry.path, "r", encoding="utf-8") as f:
+                        files[name] = [stat.st_mtime_ns, stat.st_size, session_entry(json.load(f))]
+                    parsed += 1
+                    changed = True
+                except Exception as e:
+                    logger.error(f"Error reading session file {name}: {e}")
+
+            for name in list(files):
+                if name not in seen:
+                    del files[name]
+                    changed = True
+
+            if changed:
+                logger.debug(f"Manifest refreshed: parsed {parsed} of {len(files)} session files")
+                self._save()
+            return [dict(cached[2]) for cached in files.values()]
+
+    def entry(self, filename: str) -> Optional[Dict]:
+        """Listing entry of one session file, re-reading it if it changed; None if it is gone"""
+        with self._lock:
+            files = self._load()
+            path = os.path.join(self.storage_dir, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                if files.pop(filename, None) is not None:
+                    self._dirty = True
+                return None
+            cached = files.get(filename)
+            if not (cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size):
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        cached = [stat.st_mtime_ns, stat.st_size, session_entry(json.load(f))]
+                except Exception as e:
+                    logger.error(f"Error reading session file {filename}: {e}")
+                    return None
+                files[filename] = cached
+                self._dirty = True
+            return dict(cached[2])
+
+    def update(self, filename: str, data: Dict):
+        """Record a session file that was just written"""
+        with self._lock:
+            files = self._load()
+            try:
+                stat = os.stat(os.path.join(self.storage_dir, filename))
+            except OSError:
+                files.pop(filename, None)
+            else:
+                files[filename] = [stat.st_mtime_ns, stat.st_size, session_entry(data)]
+            self._dirty = True
+
+    def remove(self, filename: str):
+        """Drop the entry of a deleted session file"""
+        with self._lock:
+            if self._load().pop(filename, None) is not None:
+                self._dirty = True
+
+    def _load(self) -> Dict[str, list]:
+        if self._files is None:
+            self._files = {}
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == MANIFEST_VERSION:
+                    self._files = data.get("files", {})
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable session manifest {self.path}: {e}")
+        return self._files
+
+    def _save(self):
+        try:
+            fd, temp_path = tempfile.mkstemp(prefix=".manifest_", suffix=".tmp", dir=self.storage_dir)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": MANIFEST_VERSION, "files": self._files}, f, separators=(",", ":"))
+            os.replace(temp_path, self.path)
+            self._dirty = False
+        except OSError as e:
+            logger.warning(f"Failed to write session manifest: {e}")
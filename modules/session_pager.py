@@ -0,0 +1,207 @@
+from collections.abc import Sequence
+from typing import Callable, Dict, List, Optional, Tuple
+import json
+import logging
+import mmap
+import os
+
+logger = logging.getLogger("main.history.pager")
+
+PAGE_SIZE = 100
+
+# Snapshot files put every message on its own line after this header suffix
+MESSAGES_OPENER = b'"messages": [\n'
+
+
+def encode_snapshot(data: Dict) -> bytes:
+    """Encode a session as JSON with one message per line.
+
+    The result is ordinary JSON, but the header (everything except the
+    messages) comes first and each message sits on its own line, so an
+    offset index over the file can be built by scanning for newlines.
+    """
+    header = {key: value for key, value in data.items() if key != "messages"}
+    head = json.dumps(header)[:-1] + (", " if header else "")
+    lines = [json.dumps(message) for message in data.get("messages", [])]
+    body = ",\n".join(lines) + "\n" if lines else ""
+    return (head + '"messages": [\n' + body + "]}\n").encode("utf-8")
+
+
+def line_offsets(path: str) -> Tuple[List[int], int]:
+    """Start offsets of every complete line in a file, and the offset after the last one"""
+    offsets = []
+    end = 0
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return offsets, end
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            position = mm.find(b"\n")
+            while position != -1:
+                offsets.append(end)
+                end = position + 1
+                position = mm.find(b"\n", end)
+    return offsets, end
+
+
+class PagedMessages(Sequence):
+    """Read-only message list that fetches ranges on demand.
+
+    ``fetch(start, end)`` returns the messages in that range; slicing and
+    indexing go through it, so callers that only look at a page (or at the
+    messages after a known count) never load the rest. ``resolve`` is
+    applied to every fetched range (e.g. to fill in deduplicated bodies).
+    """
+
+    def __init__(self, count: int, fetch: Callable[[int, int], List[Dict]], metadata: Optional[Dict] = None,
+                 resolve: Optional[Callable[[List[Dict]], List[Dict]]] = None):
+        self._count = count
+        self._fetch = fetch
+        self._resolve = resolve
+        self.metadata = metadata or {}
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._count)
+            messages = self.get_range(start, stop) if step == 1 else [self[i] for i in range(start, stop, step)]
+            return messages
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("message index out of range")
+        return self.get_range(index, index + 1)[0]
+
+    def __iter__(self):
+        for start in range(0, self._count, PAGE_SIZE):
+            yield from self.get_range(start, start + PAGE_SIZE)
+
+    def get_range(self, start: int, end: int) -> List[Dict]:
+        """Messages ``start`` to ``end`` (exclusive)"""
+        start = max(start, 0)
+        end = min(end, self._count)
+        if start >= end:
+            return []
+        messages = self._fetch(start, end)
+        return self._resolve(messages) if self._resolve else messages
+
+    def page(self, number: int, page_size: int = PAGE_SIZE) -> List[Dict]:
+        """Page ``number`` counted back from the newest (page 0 holds the newest messages)"""
+        end = self._count - number * page_size
+        return self.get_range(end - page_size, end)
+
+
+class Segment:
+    """Byte ranges of the messages in one file, and the file identity they were taken from"""
+
+    def __init__(self, path: str, snapshot: bool):
+        self.path = path
+        self.snapshot = snapshot
+        # Session metadata from a snapshot's header line
+        self.metadata: Dict = {}
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            header = f.readline() if snapshot else b""
+        self.signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if header.endswith(MESSAGES_OPENER):
+            self.metadata = json.loads(header.rstrip() + b"]}").get("metadata", {})
+        offsets, end = line_offsets(path)
+        if snapshot:
+            # Drop the header line; the closing "]}" line marks the end of the last message
+            self.bounds = offsets[1:] if len(offsets) > 1 else [end]
+        else:
+            self.bounds = offsets + [end]
+
+    def __len__(self) -> int:
+        return len(self.bounds) - 1
+
+    def is_current(self, stat: os.stat_result) -> bool:
+        if stat.st_ino != self.signature[0]:
+            return False
+        if self.snapshot:
+            return (stat.st_mtime_ns, stat.st_size) == self.signature[1:]
+        # Journals only grow while they are in place
+        return stat.st_size >= self.bounds[-1]
+
+    def read(self, start: int, end: int) -> Optional[List[Dict]]:
+        """Parse messages ``start`` to ``end``, or None if the file has been replaced"""
+        try:
+            with open(self.path, "rb") as f:
+                if not self.is_current(os.fstat(f.fileno())):
+                    return None
+                f.seek(self.bounds[start])
+                data = f.read(self.bounds[end] - self.bounds[start])
+        except FileNotFoundError:
+            return None
+        base = self.bounds[start]
+        return [
+            json.loads(data[self.bounds[i] - base:self.bounds[i + 1] - base].rstrip(b",\r\n"))
+            for i in range(start, end)
+        ]
+
+
+class SessionPager(PagedMessages):
+    """Paged access to a JSON session: its snapshot followed by its journals.
+
+    ``build()`` returns the segments of the session and is run again when a
+    file has been replaced underneath (by compaction or a full rewrite).
+    Compaction keeps message indexes valid, but a rewrite (e.g. a retention
+    merge) may not: when a rebuild finds fewer messages or a different
+    ``last_modified`` than the pager last saw, it takes the count and
+    metadata of the session as it is now and bumps ``revision``, so holders
+    can drop what they derived from earlier reads.
+    """
+
+    def __init__(self, build: Callable[[], List[Segment]], metadata: Optional[Dict] = None,
+                 resolve: Optional[Callable[[List[Dict]], List[Dict]]] = None):
+        self._build = build
+        self._segments = build()
+        self._last_modified = self._session_last_modified()
+        self.revision = 0
+        super().__init__(sum(len(segment) for segment in self._segments), self._read, metadata, resolve)
+
+    def _read(self, start: int, end: int) -> List[Dict]:
+        for _ in range(3):
+            messages = self._read_segments(start, end)
+            if messages is not None:
+                return messages
+            logger.debug("Session files changed while paging; rebuilding offset index")
+            self._rebuild()
+        raise IOError("Session files keep changing while paging")
+
+    def _rebuild(self):
+        self._segments = self._build()
+        count = sum(len(segment) for segment in self._segments)
+        last_modified = self._session_last_modified()
+        if count < self._count or last_modified != self._last_modified:
+            logger.debug(f"Session was rewritten while paging ({self._count} -> {count} messages)")
+            self._count = count
+            self._last_modified = last_modified
+            self.metadata = {
+                **self.metadata, **self._segments[0].metadata,
+                "message_count": count, "last_modified": last_modified,
+            }
+            self.revision += 1
+
+    def _session_last_modified(self) -> Optional[str]:
+        """``last_modified`` as a full read reports it: the newest journal record's timestamp, else the snapshot's"""
+        last_modified = self._segments[0].metadata.get("last_modified") if self._segments else None
+        for segment in self._segments[1:]:
+            records = segment.read(len(segment) - 1, len(segment)) if len(segment) else None
+            if records:
+                last_modified = records[0].get("timestamp") or last_modified
+        return last_modified
+
+    def _read_segments(self, start: int, end: int) -> Optional[List[Dict]]:
+        messages = []
+        first = 0
+        for segment in self._segments:
+            last = first + len(segment)
+            if start < last and end > first:
+                part = segment.read(max(start, first) - first, min(end, last) - first)
+                if part is None:
+                    return None
+                messages.extend(part)
+            first = last
+        return messages
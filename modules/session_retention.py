@@ -0,0 +1,280 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Collection, Dict, List, Optional
+import logging
+import re
+import threading
+import time
+
+logger = logging.getLogger("main.history.retention")
+
+# Seconds to wait before checking again while interactive work is going on
+YIELD_INTERVAL = 0.5
+
+
+@dataclass
+class RetentionPolicy:
+    """What the retention job keeps.
+
+    A limit of 0 disables it. Empty and tiny sessions are only touched once
+    they have been left alone for ``grace_days``.
+    """
+    max_age_days: float = 0
+    max_total_mb: float = 0
+    keep_starred: bool = True
+    empty_messages: int = 1
+    merge_below: int = 3
+    grace_days: float = 7
+
+
+@dataclass
+class RetentionAction:
+    kind: str                  # "delete" or "merge"
+    sessions: List[str]
+    reason: str
+    bytes: int
+    target: Optional[str] = None
+    # last_modified of every session when the plan was made; changed sessions are skipped
+    modified: Dict[str, Optional[str]] = field(default_factory=dict)
+
+
+def merge_target(model: Optional[str], month: str) -> str:
+    """Name of the session tiny sessions of a model and month are merged into"""
+    return f"merged_{re.sub(r'[^A-Za-z0-9.-]+', '-', model or 'unknown')}_{month}"
+
+
+def plan_retention(sessions: List[Dict], sizes: Dict[str, int], policy: RetentionPolicy,
+                   protected: Collection[str] = (), now: Optional[datetime] = None) -> List[RetentionAction]:
+    """The deletes and merges ``policy`` calls for, given the session listing.
+
+    ``protected`` sessions (e.g. open in a tab) are never touched; starred
+    ones are kept when the policy says so. Merges group tiny sessions by
+    model and month into one ``merged_*`` session, and the size budget is
+    enforced last by deleting the oldest remaining sessions.
+    """
+    now = now or datetime.now()
+    grace = (now - timedelta(days=policy.grace_days)).isoformat()
+    expired = (now - timedelta(days=policy.max_age_days)).isoformat() if policy.max_age_days > 0 else None
+    actions: List[RetentionAction] = []
+    remaining: List[Dict] = []
+    groups: Dict[tuple, List[Dict]] = defaultdict(list)
+
+    for session in sessions:
+        name = session.get("name")
+        if not name or name in protected or (policy.keep_starred and session.get("starred")):
+            continue
+        modified = session.get("last_modified") or ""
+        count = session.get("message_count") or 0
+        if count <= policy.empty_messages and modified < grace:
+            actions.append(RetentionAction("delete", [name], "empty", sizes.get(name, 0), modified={name: modified}))
+        elif expired and modified < expired:
+            actions.append(RetentionAction(
+                "delete", [name], f"older than {policy.max_age_days:g} days", sizes.get(name, 0), modified={name: modified}
+            ))
+        elif count < policy.merge_below and modified < grace and not name.startswith("merged_"):
+            groups[(session.get("model"), modified[:7])].append(session)
+        else:
+            remaining.append(session)
+
+    existing = {session.get("name") for session in sessions}
+    for (model, month), group in groups.items():
+        target = merge_target(model, month)
+        if len(group) < 2 and target not in existing:
+            remaining.extend(group)
+            continue
+        names = [session["name"] for session in sorted(group, key=lambda s: s.get("last_modified") or "")]
+        actions.append(RetentionAction(
+            "merge", names, "tiny", sum(sizes.get(name, 0) for name in names), target,
+            {session["name"]: session.get("last_modified") for session in group},
+        ))
+
+    if policy.max_total_mb > 0:
+        budget = policy.max_total_mb * 1024 * 1024
+        # Merged sessions keep roughly the size of their parts
+        total = sum(sizes.get(session["name"], 0) for session in remaining) + sum(
+            action.bytes for action in actions if action.kind == "merge"
+        )
+        for session in sorted(remaining, key=lambda s: s.get("last_modified") or ""):
+            if total <= budget:
+                break
+            name = session["name"]
+            total -= sizes.get(name, 0)
+            actions.append(RetentionAction(
+                "delete", [name], "over size budget", sizes.get(name, 0), modified={name: session.get("last_modified")}
+            ))
+    return actions
+
+
+def summarize(actions: List[RetentionAction]) -> Dict:
+    """Sessions and bytes per reason, and the totals"""
+    reasons: Dict[str, Dict] = {}
+    for action in actions:
+        entry = reasons.setdefault(f"{action.kind}: {action.reason}", {"sessions": 0, "bytes": 0})
+        entry["sessions"] += len(action.sessions)
+        entry["bytes"] += action.bytes
+    return {
+        "actions": len(actions),
+        "deleted": sum(len(action.sessions) for action in actions if action.kind == "delete"),
+        "merged": sum(len(action.sessions) for action in actions if action.kind == "merge"),
+        "bytes": sum(action.bytes for action in actions if action.kind == "delete"),
+        "reasons": reasons,
+    }
+
+
+class RetentionJob:
+    """Applies a retention policy to a ``ChatHistory`` one action at a time.
+
+    Each action re-checks that its sessions have not changed since the plan
+    was made, and between actions the job sleeps for ``throttle`` seconds
+    and waits for as long as ``should_yield()`` reports interactive work,
+    so it can run in the background without competing with the GUI. With
+    ``dry_run`` it only reports what it would do.
+    """
+
+    def __init__(self, chat_history, policy: RetentionPolicy, protected: Collection[str] = (),
+                 should_yield: Callable[[], bool] = lambda: False, throttle: float = 0.05):
+        self.chat_history = chat_history
+        self.policy = policy
+        self.protected = set(protected)
+        self.should_yield = should_yield
+        self.throttle = throttle
+        self._stop = threading.Event()
+
+    def plan(self) -> List[RetentionAction]:
+        """The actions the policy calls for right now"""
+        return plan_retention(
+            self.chat_history.list_sessions(), self.chat_history.session_sizes(), self.policy, self.protected
+        )
+
+    def run(self, dry_run: bool = False) -> Dict:
+        """Plan and (unless ``dry_run``) apply; returns a summary of the plan and what was done.
+
+        ``removed_sessions`` and ``merge_targets`` name the sessions that
+        applied actions deleted and wrote, so callers can update indexes.
+        """
+        start = time.perf_counter()
+        actions = self.plan()
+        report = summarize(actions)
+        report.update({
+            "dry_run": dry_run, "applied": 0, "skipped": 0, "plan": actions,
+            "removed_sessions": [], "merge_targets": [],
+        })
+        if dry_run:
+            return report
+
+        for action in actions:
+            if self._stop.is_set():
+                break
+            self._wait()
+            try:
+                applied = self.apply(action)
+            except Exception as e:
+                logger.error(f"Retention {action.kind} of {', '.join(action.sessions)} failed: {e}")
+                applied = False
+            report["applied" if applied else "skipped"] += 1
+            if applied:
+                report["removed_sessions"].extend(action.sessions)
+                if action.target:
+                    report["merge_targets"].append(action.target)
+
+        report["seconds"] = time.perf_counter() - start
+        if report["applied"]:
+            logger.info(
+                f"Retention: deleted {report['deleted']} and merged {report['merged']} sessions "
+                f"({report['applied']} of {len(actions)} actions) in {report['seconds']:.1f}s"
+            )
+        return report
+
+    def stop(self):
+        """Stop after the current action"""
+        self._stop.set()
+
+    def apply(self, action: RetentionAction) -> bool:
+        """Carry out one action; returns False if its sessions changed since planning"""
+        current = {session["name"]: session for session in self.chat_history.list_sessions()}
+        for name, modified in action.modified.items():
+            session = current.get(name)
+            if session is None or session.get("last_modified") != modified or name in self.protected:
+                logger.debug(f"Skipping retention {action.kind}: {name} changed since planning")
+                return False
+
+        if action.kind == "delete":
+            return self.chat_history.delete_session(action.sessions[0])
+
+        target = self.chat_history.read_session(action.target) if action.target in current else None
+        merged = []
+        model = None
+        for name in action.sessions:
+            data = self.chat_history.read_session(name)
+            if data is None:
+                return False
+            model = model or data.get("metadata", {}).get("model")
+            merged.extend({**message, "source_session": name} for message in data.get("messages", []))
+        # New messages go after the target's, so its saved and indexed prefix stays valid
+        merged.sort(key=lambda message: message.get("timestamp") or "")
+        messages = list(target.get("messages", [])) + merged if target else merged
+        metadata = {"model": model} if model else {}
+        if not self.chat_history.save_session(action.target, metadata, messages=messages):
+            return False
+        for name in action.sessions:
+            self.chat_history.delete_session(name)
+        logger.debug(f"Merged {len(action.sessions)} tiny sessions into {action.target}")
+        return True
+
+    def _wait(self):
+        while self.should_yield() and not self._stop.is_set():
+            time.sleep(YIELD_INTERVAL)
+        if self.throttle:
+            self._stop.wait(self.throttle)
+
+
+def format_report(report: Dict) -> str:
+    """Human-readable summary of a retention run"""
+    lines = [
+        f"{'Would delete' if report['dry_run'] else 'Deleted'} {report['deleted']} sessions "
+        f"({report['bytes'] / 1024:.0f} KB) and {'merge' if report['dry_run'] else 'merged'} "
+        f"{report['merged']} tiny sessions"
+    ]
+    for reason, entry in report["reasons"].items():
+        lines.append(f"  {reason}: {entry['sessions']} sessions, {entry['bytes'] / 1024:.0f} KB")
+    if not report["dry_run"] and report["skipped"]:
+        lines.append(f"  skipped {report['skipped']} actions whose sessions changed meanwhile")
+    return "\n".join(lines)
+
+
+def main():
+    import argparse
+    from .chat_history import ChatHistory
+
+    defaults = RetentionPolicy()
+    parser = argparse.ArgumentParser(description="Apply retention and compaction policies to the saved history")
+    parser.add_argument("--storage", default="chat_history/chat_history", help="chat history directory")
+    parser.add_argument("--backend", choices=["json", "sqlite"], default="json")
+    parser.add_argument("--max-age-days", type=float, default=defaults.max_age_days)
+    parser.add_argument("--max-mb", type=float, default=defaults.max_total_mb, help="total history size budget")
+    parser.add_argument("--empty", type=int, default=defaults.empty_messages,
+                        help="sessions with at most this many messages are deleted")
+    parser.add_argument("--merge-below", type=int, default=defaults.merge_below,
+                        help="sessions with fewer messages are merged per model and month")
+    parser.add_argument("--grace-days", type=float, default=defaults.grace_days)
+    parser.add_argument("--include-starred", action="store_true", help="let starred sessions go too")
+    parser.add_argument("--apply", action="store_true", help="apply the plan (default is a dry run)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="list every action")
+    args = parser.parse_args()
+
+    policy = RetentionPolicy(args.max_age_days, args.max_mb, not args.include_starred, args.empty,
+                             args.merge_below, args.grace_days)
+    history = ChatHistory(args.storage, backend=args.backend)
+    report = RetentionJob(history, policy, throttle=0).run(dry_run=not args.apply)
+    history.close()
+    print(format_report(report))
+    if args.verbose:
+        for action in report["plan"]:
+            target = f" -> {action.target}" if action.target else ""
+            print(f"  {action.kind:<6} {', '.join(action.sessions)}{target} ({action.reason})")
+
+
+if __name__ == "__main__":
+    # Dry run: python -m modules.session_retention --max-age-days 365 -v
+    main()
@@ -34,6 +34,8 @@ class ShortcutManager:
             "stop_tts": "Ctrl+.",
             "toggle_tts": "Ctrl+Alt+T",
             "start_stt": "Ctrl+M",
+            "search": "Ctrl+F",
+            "search_history": "Ctrl+Shift+F",
         }
         self.load_shortcuts()
         logger.info("Shortcut manager initialized")
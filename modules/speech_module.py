@@ -1,9 +1,14 @@
-from PyQt6.QtCore import QTimer
+from PyQt6.QtCore import QSettings, QThread, pyqtSignal
+from importlib import metadata
+import importlib
+import importlib.util
+import queue
 import re
 import os
 import subprocess
+import threading
+import time
 import wave
-import numpy as np
 import logging
 import unicodedata
 import string
@@ -53,62 +58,468 @@ CHAR_REPLACEMENTS = {
     '\u00a0': ' ',   # Non-breaking space
 }
 
-# Optional imports with fallbacks
-try:
-    from TTS.api import TTS
-    import pkg_resources
-    tts_version = pkg_resources.get_distribution('TTS').version
-    COQUI_TTS_AVAILABLE = True
-    logger.info(f"Coqui TTS available (version {tts_version})")
-except ImportError:
-    COQUI_TTS_AVAILABLE = False
+# Optional backends are only probed here; importing them pulls in torch and
+# friends and takes seconds, so the real imports happen on first use.
+def _module_available(name):
+    """Check whether a module can be imported without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+COQUI_TTS_AVAILABLE = _module_available("TTS")
+if COQUI_TTS_AVAILABLE:
+    try:
+        logger.info(f"Coqui TTS available (version {metadata.version('TTS')})")
+    except metadata.PackageNotFoundError:
+        logger.info("Coqui TTS available")
+else:
     logger.warning("Coqui TTS not available")
 
-try:
-    import pyttsx3
-    PYTTSX3_AVAILABLE = True
+PYTTSX3_AVAILABLE = _module_available("pyttsx3")
+if PYTTSX3_AVAILABLE:
     logger.info("System TTS (pyttsx3) available")
-except ImportError:
-    PYTTSX3_AVAILABLE = False
+else:
     logger.warning("System TTS (pyttsx3) not available")
 
-try:
-    import whisper  # Using the openai-whisper package
-    import sounddevice as sd
-    WHISPER_MODEL = None
-    STT_AVAILABLE = True
+STT_AVAILABLE = _module_available("whisper") and _module_available("sounddevice")
+if STT_AVAILABLE:
     logger.info("Speech-to-Text (Whisper) available")
-except ImportError:
-    STT_AVAILABLE = False
+else:
     logger.warning("Speech-to-Text (Whisper) not available")
 
+WHISPER_MODEL = None
+
+# Backend name -> module imported on first use
+BACKEND_MODULES = {
+    "coqui": "TTS.api",
+    "pyttsx3": "pyttsx3",
+    "whisper": "whisper",
+    "sounddevice": "sounddevice",
+}
+TTS_METHOD_BACKENDS = {
+    "pyttsx3 (System)": ["pyttsx3"],
+    "Coqui TTS (Local AI)": ["coqui"],
+}
+STT_BACKENDS = ["sounddevice", "whisper"]
+
+_backends = {}
+_backend_lock = threading.Lock()
+
+
+def load_backend(name):
+    """Import a speech backend on first use; safe to call from any thread"""
+    with _backend_lock:
+        if name not in _backends:
+            start = time.perf_counter()
+            _backends[name] = importlib.import_module(BACKEND_MODULES[name])
+            logger.info(f"Loaded speech backend {name} in {(time.perf_counter() - start) * 1000:.0f} ms")
+        return _backends[name]
+
+
+def preload_backends(names, callback=None):
+    """Import backends on a background thread; ``callback(error=None)`` runs on that thread"""
+    def run():
+        try:
+            for name in names:
+                load_backend(name)
+            if callback:
+                callback()
+        except Exception as e:
+            logger.error(f"Failed to preload speech backends {names}: {e}")
+            if callback:
+                callback(error=str(e))
+
+    thread = threading.Thread(target=run, name="speech-preload", daemon=True)
+    thread.start()
+    return thread
+
+
+SOUNDDEVICE_AVAILABLE = _module_available("sounddevice")
+
+# Sentences synthesized and waiting for playback; one more is synthesized
+# meanwhile, so synthesis runs at most two sentences ahead of playback
+READY_SENTENCES = 1
+# Fragments shorter than this are joined to the next sentence
+MIN_SENTENCE_CHARS = 20
+# Longer sentences are split at commas, semicolons and colons
+MAX_SENTENCE_CHARS = 250
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])[\"')\]]*\s+|\n\s*\n|\n(?=\s*(?:[-*+]|\d+[.)])\s)")
+_CLAUSE_END = re.compile(r"(?<=[,;:])\s+")
+
+
+def split_sentences(text):
+    """Split text into sentences to be synthesized one at a time"""
+    pieces = []
+    for sentence in _SENTENCE_END.split(text):
+        sentence = " ".join(sentence.split())
+        if len(sentence) <= MAX_SENTENCE_CHARS:
+            pieces.append(sentence)
+            continue
+        # Break an overlong sentence into clauses of up to MAX_SENTENCE_CHARS
+        part = ""
+        for clause in _CLAUSE_END.split(sentence):
+            if part and len(part) + len(clause) + 1 > MAX_SENTENCE_CHARS:
+                pieces.append(part)
+                part = clause
+            else:
+                part = f"{part} {clause}" if part else clause
+        pieces.append(part)
+
+    sentences = []
+    pending = ""
+    for piece in pieces:
+        if not piece:
+            continue
+        pending = f"{pending} {piece}" if pending else piece
+        if len(pending) >= MIN_SENTENCE_CHARS:
+            sentences.append(pending)
+            pending = ""
+    if pending:
+        if sentences and len(sentences[-1]) + len(pending) < MAX_SENTENCE_CHARS:
+            sentences[-1] = f"{sentences[-1]} {pending}"
+        else:
+            sentences.append(pending)
+    return sentences
+
+
+class SpeechWorker(QThread):
+    """Speaks queued text on its own thread.
+
+    The pyttsx3 engine and the Coqui model are created on this thread the
+    first time they are needed and kept for its lifetime. ``submit`` may be
+    called from any thread; ``stop`` drops every queued job and interrupts
+    the one being spoken, terminating the audio player right away.
+
+    With ``pipelined`` set, text is split into sentences: a synthesis thread
+    renders Coqui audio at most two sentences ahead while this thread plays
+    the previous one, so the first sentence is heard after synthesizing only
+    itself. Sentences are separated by ``sentence_pause`` seconds of silence.
+    The time from the start of a job to its first audio is reported through
+    ``first_audio``.
+    """
+
+    job_started = pyqtSignal(int)
+    progress = pyqtSignal(int, str)       # job id, status
+    first_audio = pyqtSignal(int, float)  # job id, seconds from job start to first audio
+    job_finished = pyqtSignal(int, str)   # job id, error ("" if it finished or was stopped)
+
+    def __init__(self, output_dir, pipelined=True, sentence_pause=0.25, parent=None):
+        super().__init__(parent)
+        self.output_dir = output_dir
+        self.pipelined = pipelined
+        self.sentence_pause = sentence_pause
+        self._jobs = queue.Queue()
+        self._lock = threading.Lock()
+        self._next_id = 0
+        # Jobs with an id up to this one were stopped
+        self._stopped_through = -1
+        self._current = None
+        self._player = None
+        self._engine = None
+        self._tts_model = None
+        self._job_started_at = 0.0
+        self._first_audio_pending = False
+
+    @property
+    def busy(self):
+        """Whether a job is being spoken or waiting"""
+        return self._current is not None or not self._jobs.empty()
+
+    def submit(self, text, method):
+        """Queue text to be spoken; returns the job id"""
+        with self._lock:
+            self._next_id += 1
+            job_id = self._next_id
+        self._jobs.put((job_id, text, method))
+        return job_id
+
+    def stop(self):
+        """Drop queued jobs and interrupt the current one"""
+        with self._lock:
+            self._stopped_through = self._next_id
+            player = self._player
+        if player is not None and player.poll() is None:
+            player.terminate()
+
+    def shutdown(self, timeout_ms=2000):
+        """Stop speaking and end the thread"""
+        self.stop()
+        self._jobs.put(None)
+        self.wait(timeout_ms)
+
+    def _stopped(self, job_id):
+        return job_id <= self._stopped_through
+
+    def run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            job_id, text, method = job
+            if self._stopped(job_id):
+                self.job_finished.emit(job_id, "")
+                continue
+            self._current = job_id
+            self._job_started_at = time.perf_counter()
+            self._first_audio_pending = True
+            self.job_started.emit(job_id)
+            error = ""
+            try:
+                if method == "pyttsx3 (System)" and PYTTSX3_AVAILABLE:
+                    self._speak_pyttsx3(job_id, text)
+                elif method == "Coqui TTS (Local AI)" and COQUI_TTS_AVAILABLE:
+                    self._speak_coqui(job_id, text)
+                else:
+                    raise Exception(f"Selected TTS method '{method}' is not available")
+            except Exception as e:
+                logger.error(f"TTS error: {e}")
+                error = str(e)
+            self._current = None
+            self.job_finished.emit(job_id, error)
+        self._close_engines()
+
+    def _pyttsx3_engine(self):
+        if self._engine is None:
+            start = time.perf_counter()
+            self._engine = load_backend("pyttsx3").init()
+            self._engine.connect("started-utterance", lambda name: self._audio_started())
+            logger.info(f"Initialized pyttsx3 engine in {(time.perf_counter() - start) * 1000:.0f} ms")
+        return self._engine
+
+    def _coqui_model(self):
+        if self._tts_model is None:
+            logger.info("Initializing Coqui TTS model...")
+            start = time.perf_counter()
+            TTS = load_backend("coqui").TTS
+            self._tts_model = TTS("tts_models/en/ljspeech/glow-tts")
+            self._tts_model.to("cpu")
+            logger.info(f"Coqui TTS model initialized in {time.perf_counter() - start:.1f}s")
+        return self._tts_model
+
+    def _sentences(self, text):
+        return split_sentences(text) if self.pipelined else [text]
+
+    def _audio_started(self):
+        """Report time-to-first-audio once per job"""
+        if self._first_audio_pending:
+            self._first_audio_pending = False
+            self.first_audio.emit(self._current or 0, time.perf_counter() - self._job_started_at)
+
+    def _pause(self, job_id):
+        """Silence between sentences; returns False if the job was stopped meanwhile"""
+        deadline = time.perf_counter() + self.sentence_pause
+        while time.perf_counter() < deadline:
+            if self._stopped(job_id):
+                return False
+            time.sleep(0.01)
+        return not self._stopped(job_id)
+
+    def _speak_pyttsx3(self, job_id, text):
+        engine = self._pyttsx3_engine()
+        self.progress.emit(job_id, "Speaking...")
+        for index, sentence in enumerate(self._sentences(text)):
+            if index and not self._pause(job_id):
+                break
+            engine.say(sentence)
+            # Drive the engine's loop ourselves so a stop is noticed between iterations
+            engine.startLoop(False)
+            try:
+                while engine.isBusy():
+                    if self._stopped(job_id):
+                        engine.stop()
+                        break
+                    engine.iterate()
+                    time.sleep(0.02)
+            finally:
+                engine.endLoop()
+            if self._stopped(job_id):
+                break
+
+    def _speak_coqui(self, job_id, text):
+        if self._tts_model is None:
+            self.progress.emit(job_id, "Loading voice model...")
+        model = self._coqui_model()
+        sentences = self._sentences(text)
+        ready = queue.Queue(maxsize=READY_SENTENCES)
+        # Set once playback ends for any reason, so synthesis never waits on a full queue
+        abort = threading.Event()
+
+        def put(item):
+            # Blocks while playback is behind; gives up once the job is stopped or playback ended
+            while not self._stopped(job_id) and not abort.is_set():
+                try:
+                    ready.put(item, timeout=0.05)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def synthesize():
+            try:
+                for sentence in sentences:
+                    if self._stopped(job_id) or abort.is_set():
+                        return
+                    start = time.perf_counter()
+                    audio = model.tts(sentence)
+                    logger.debug(f"Synthesized {len(sentence)} characters in {(time.perf_counter() - start) * 1000:.0f} ms")
+                    if not put(audio):
+                        return
+            except Exception as e:
+                put(e)
+            finally:
+                put(None)
+
+        self.progress.emit(job_id, "Synthesizing...")
+        synthesis = threading.Thread(target=synthesize, name="speech-synthesis", daemon=True)
+        synthesis.start()
+        sample_rate = model.synthesizer.output_sample_rate
+        played = 0
+        try:
+            while not self._stopped(job_id):
+                try:
+                    audio = ready.get(timeout=0.05)
+                except queue.Empty:
+                    continue
+                if audio is None:
+                    break
+                if isinstance(audio, Exception):
+                    raise Exception(f"Failed to use Coqui TTS: {audio}")
+                if played and not self._pause(job_id):
+                    break
+                if played == 0:
+                    self.progress.emit(job_id, "Speaking...")
+                self._play_audio(job_id, audio, sample_rate, played)
+                played += 1
+        finally:
+            abort.set()
+            synthesis.join()
+
+    def _play_audio(self, job_id, audio, sample_rate, index):
+        """Play synthesized samples with sounddevice, or through a WAV file and ffplay"""
+        import numpy as np
+        samples = np.asarray(audio, dtype=np.float32)
+        if SOUNDDEVICE_AVAILABLE:
+            sd = load_backend("sounddevice")
+            sd.play(samples, sample_rate)
+            self._audio_started()
+            try:
+                while sd.get_stream().active:
+                    if self._stopped(job_id):
+                        break
+                    time.sleep(0.01)
+            finally:
+                sd.stop()
+            return
+
+        file_path = os.path.join(self.output_dir, f"speech_{job_id}_{index}.wav")
+        try:
+            with wave.open(file_path, "wb") as wavefile:
+                wavefile.setnchannels(1)
+                wavefile.setsampwidth(2)
+                wavefile.setframerate(sample_rate)
+                wavefile.writeframes((np.clip(samples, -1, 1) * 32767).astype(np.int16).tobytes())
+            self._play(job_id, file_path)
+        finally:
+            if os.path.exists(file_path):
+                try:
+                    os.remove(file_path)
+                except OSError:
+                    logger.warning(f"Failed to remove temporary file: {file_path}")
+
+    def _play(self, job_id, file_path):
+        """Play a WAV file with ffplay until it ends or the job is stopped"""
+        player = subprocess.Popen(
+            ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet", file_path],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        with self._lock:
+            self._player = player
+        self._audio_started()
+        try:
+            while player.poll() is None:
+                if self._stopped(job_id):
+                    player.terminate()
+                    break
+                time.sleep(0.02)
+            player.wait()
+        finally:
+            with self._lock:
+                self._player = None
+        if player.returncode != 0 and not self._stopped(job_id):
+            raise Exception("Failed to play audio file")
+
+    def _close_engines(self):
+        if self._engine is not None:
+            try:
+                self._engine.stop()
+            except Exception:
+                pass
+            self._engine = None
+        self._tts_model = None
+
 
 class SpeechHandler:
     def __init__(self, parent=None):
         logger.debug("Initializing SpeechHandler")
         self.parent = parent
-        self.is_speaking = False
-        self.speech_queue = []
-        self.engine = None
-        self.tts_model = None
+        self.worker = None
+        self._callbacks = {}
+        # Seconds from the start of the last spoken response to its first audio
+        self.last_first_audio = None
+        settings = QSettings("AI-Chat-App", "Performance")
+        self.pipelined = settings.value("tts_pipelined", "true") in (True, "true")
+        self.sentence_pause = int(settings.value("tts_sentence_pause_ms", 250)) / 1000
         self.output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "temp")
         if not os.path.exists(self.output_dir):
             os.makedirs(self.output_dir)
             logger.debug(f"Created temporary directory: {self.output_dir}")
 
-    def _init_tts_model(self):
-        """Lazy initialization of TTS model"""
-        if not self.tts_model and COQUI_TTS_AVAILABLE:
-            try:
-                logger.info("Initializing Coqui TTS model...")
-                self.tts_model = TTS("tts_models/en/ljspeech/glow-tts")
-                self.tts_model.to("cpu")
-                logger.info("Coqui TTS model initialized successfully")
-                return True
-            except Exception as e:
-                logger.error(f"Failed to initialize Coqui TTS model: {str(e)}")
-                return False
-        return True
+    @property
+    def is_speaking(self):
+        """Whether a response is being spoken or waiting to be"""
+        return self.worker is not None and self.worker.busy
+
+    def _ensure_worker(self):
+        """Start the speech thread on first use"""
+        if self.worker is None:
+            self.worker = SpeechWorker(self.output_dir, self.pipelined, self.sentence_pause)
+            self.worker.job_started.connect(lambda job_id: self._set_indicator("🔊 AI is speaking...", True))
+            self.worker.progress.connect(self._on_progress)
+            self.worker.first_audio.connect(self._on_first_audio)
+            self.worker.job_finished.connect(self._on_finished)
+            self.worker.start()
+        return self.worker
+
+    def _set_indicator(self, text, speaking):
+        if self.parent and hasattr(self.parent, 'speaking_indicator'):
+            self.parent.speaking_indicator.setText(text)
+            self.parent.stop_button.setEnabled(speaking)
+
+    def _on_progress(self, job_id, status):
+        logger.debug(f"TTS job {job_id}: {status}")
+        self._set_indicator("🔊 AI is speaking..." if status == "Speaking..." else status, True)
+
+    def _on_first_audio(self, job_id, seconds):
+        self.last_first_audio = seconds
+        mode = "pipelined" if self.pipelined else "whole response"
+        logger.info(f"TTS job {job_id}: first audio after {seconds * 1000:.0f} ms ({mode})")
+        self._set_indicator(f"🔊 AI is speaking... (first audio in {seconds:.1f}s)", True)
+
+    def _on_finished(self, job_id, error):
+        callback = self._callbacks.pop(job_id, None)
+        if error:
+            self._set_indicator("TTS Error", False)
+        elif not self.is_speaking:
+            self._set_indicator("TTS Ready", False)
+        if callback:
+            if error:
+                callback(error=error)
+            else:
+                callback()
 
     def get_available_tts_methods(self):
         """Returns a list of available TTS methods"""
@@ -120,6 +531,22 @@ class SpeechHandler:
         logger.debug(f"Available TTS methods: {methods}")
         return methods
 
+    def preload_tts(self, method):
+        """Start importing the backend for a TTS method in the background"""
+        backends = [name for name in TTS_METHOD_BACKENDS.get(method, []) if name not in _backends]
+        if backends:
+            logger.debug(f"Preloading TTS backends in background: {backends}")
+            return preload_backends(backends)
+        return None
+
+    def preload_stt(self):
+        """Start importing the STT backends in the background"""
+        backends = [name for name in STT_BACKENDS if name not in _backends]
+        if STT_AVAILABLE and backends:
+            logger.debug(f"Preloading STT backends in background: {backends}")
+            return preload_backends(backends)
+        return None
+
     def is_tts_working(self):
         """Check if TTS is currently working and return status"""
         if self.is_speaking:
@@ -164,107 +591,29 @@ class SpeechHandler:
             return text
 
     def text_to_speech(self, text, method, callback=None):
-        """Enhanced TTS function with visual feedback and character encoding handling"""
+        """Queue a response for the speech thread; ``callback(error=None)`` runs on the GUI thread when it is done"""
         if not text or len(text.strip()) < 5:
             logger.warning("Text too short or empty for TTS")
             return False
-
-        self.is_speaking = True
-        logger.info(f"Starting TTS using method: {method}")
-
-        # Update UI indicator if parent exists
-        if self.parent and hasattr(self.parent, 'speaking_indicator'):
-            self.parent.speaking_indicator.setText("Speaking...")
-            self.parent.stop_button.setEnabled(True)
-
-        # Clean and sanitize the text
-        text = re.sub(r"<.*?>", "", text).strip()
-        original_text = text
-        text = self._sanitize_text(text)
-
-        try:
-            if method == "pyttsx3 (System)" and PYTTSX3_AVAILABLE:
-                logger.debug("Using pyttsx3 for TTS")
-                self.engine = pyttsx3.init()
-                self.engine.say(text)
-                self.engine.runAndWait()
-            elif method == "Coqui TTS (Local AI)" and COQUI_TTS_AVAILABLE:
-                logger.debug("Using Coqui TTS")
-                if not self._init_tts_model():
-                    raise Exception("Failed to initialize TTS model")
-                self._coqui_tts(text)
-            else:
-                logger.error(f"Selected TTS method '{method}' is not available")
-                raise Exception("Selected TTS method is not available")
-
-            # Process next in queue if any
-            if self.speech_queue and callback:
-                next_text = self.speech_queue.pop(0)
-                logger.debug("Processing next item in speech queue")
-                QTimer.singleShot(
-                    500, lambda: self.text_to_speech(next_text, method, callback)
-                )
-            else:
-                self.is_speaking = False
-                # Update UI indicator
-                if self.parent and hasattr(self.parent, 'speaking_indicator'):
-                    self.parent.speaking_indicator.setText("TTS Ready")
-                    self.parent.stop_button.setEnabled(False)
-                if callback:
-                    callback()
-                logger.info("TTS completed successfully")
-
-            return True
-
-        except Exception as e:
-            self.is_speaking = False
-            # Update UI indicator on error
-            if self.parent and hasattr(self.parent, 'speaking_indicator'):
-                self.parent.speaking_indicator.setText("TTS Error")
-                self.parent.stop_button.setEnabled(False)
-            
-            # Enhanced error logging for character encoding issues
-            if "charmap" in str(e):
-                logger.error(f"Character encoding error in TTS.")
-                logger.error(f"Original text: {repr(original_text)}")
-                logger.error(f"Sanitized text: {repr(text)}")
-                logger.error(f"Error details: {str(e)}")
-            else:
-                logger.error(f"TTS error: {str(e)}")
-            
+        if method not in self.get_available_tts_methods():
+            logger.error(f"Selected TTS method '{method}' is not available")
             if callback:
-                callback(error=str(e))
+                callback(error="Selected TTS method is not available")
             return False
 
-    def _coqui_tts(self, text):
-        """Internal method to handle Coqui TTS"""
-        file_path = os.path.join(self.output_dir, "output.wav")
-        logger.debug(f"Generating TTS audio file: {file_path}")
-        try:
-            if self.tts_model is None:
-                logger.error("TTS model not initialized")
-                raise Exception("TTS model not initialized")
-                
-            self.tts_model.tts_to_file(text, file_path=file_path)
-            logger.debug("Audio file generated, playing...")
-            subprocess.run(["ffplay", "-nodisp", "-autoexit", file_path], 
-                         check=True, 
-                         stderr=subprocess.DEVNULL, 
-                         stdout=subprocess.DEVNULL)
-        except subprocess.CalledProcessError:
-            logger.error("Failed to play audio file")
-            raise Exception("Failed to play audio file")
-        except Exception as e:
-            logger.error(f"Failed to use Coqui TTS: {str(e)}")
-            raise Exception(f"Failed to use Coqui TTS: {str(e)}")
-        finally:
-            if os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                    logger.debug("Cleaned up temporary audio file")
-                except:
-                    logger.warning(f"Failed to remove temporary file: {file_path}")
-                    pass
+        # Clean and sanitize the text
+        text = self._sanitize_text(re.sub(r"<.*?>", "", text).strip())
+        job_id = self._ensure_worker().submit(text, method)
+        if callback:
+            self._callbacks[job_id] = callback
+        logger.info(f"Queued TTS job {job_id} using method: {method}")
+        return True
+
+    def shutdown(self):
+        """Stop speaking and end the speech thread"""
+        if self.worker is not None:
+            self.worker.shutdown()
+            self.worker = None
 
     def __del__(self):
         """Cleanup resources"""
@@ -281,21 +630,11 @@ class SpeechHandler:
                 pass
 
     def stop_speaking(self):
-        """Stop current TTS output"""
+        """Stop current TTS output and drop queued responses"""
         logger.info("Stopping TTS output")
-        self.is_speaking = False
-        self.speech_queue.clear()
-        # Update UI indicator
-        if self.parent and hasattr(self.parent, 'speaking_indicator'):
-            self.parent.speaking_indicator.setText("TTS Stopped")
-            self.parent.stop_button.setEnabled(False)
-        if hasattr(self, "engine") and self.engine:
-            try:
-                self.engine.stop()
-                logger.debug("TTS engine stopped")
-            except:
-                logger.warning("Failed to stop TTS engine")
-                pass
+        if self.worker is not None:
+            self.worker.stop()
+        self._set_indicator("TTS Stopped", False)
 
     def start_listening(self, duration=5, callback=None):
         """Records audio and converts it to text using the Whisper model"""
@@ -317,11 +656,12 @@ class SpeechHandler:
 
             # Record audio
             logger.debug("Recording audio...")
+            sd = load_backend("sounddevice")
             audio_data = sd.rec(
                 int(samplerate * duration),
                 samplerate=samplerate,
                 channels=1,
-                dtype=np.int16,
+                dtype="int16",
             )
             sd.wait()
 
@@ -342,7 +682,7 @@ class SpeechHandler:
                 if callback:
                     callback(status="Loading Whisper model (first time only)...")
                 logger.info("Loading Whisper model (first time)")
-                WHISPER_MODEL = whisper.load_model("base")
+                WHISPER_MODEL = load_backend("whisper").load_model("base")
                 logger.info("Whisper model loaded successfully")
 
             # Transcribe
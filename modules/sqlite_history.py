@@ -0,0 +1,300 @@
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from .message_store import message_digests
+
+logger = logging.getLogger("main.history.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    model TEXT,
+    created_at TEXT,
+    last_modified TEXT,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    metadata TEXT NOT NULL DEFAULT '{}',
+    content_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_last_modified ON sessions(last_modified);
+CREATE INDEX IF NOT EXISTS idx_sessions_model ON sessions(model);
+
+CREATE TABLE IF NOT EXISTS messages (
+    session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TEXT,
+    extra TEXT,
+    PRIMARY KEY (session_id, position)
+);
+
+CREATE TABLE IF NOT EXISTS imported_files (
+    filename TEXT PRIMARY KEY,
+    mtime REAL NOT NULL
+);
+"""
+
+# Message keys stored in their own columns; anything else goes to ``extra``
+MESSAGE_COLUMNS = ("role", "content", "timestamp")
+
+
+class SQLiteHistoryStore:
+    """Chat sessions stored in a single SQLite database (WAL mode).
+
+    Session metadata lives in an indexed ``sessions`` table, so listing does
+    not touch message bodies; messages are kept in order in ``messages``.
+    Each thread gets its own connection, so the store can be read from
+    worker threads while the GUI thread writes.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = self.connection
+        conn.executescript(SCHEMA)
+        if "content_hash" not in {row["name"] for row in conn.execute("PRAGMA table_info(sessions)")}:
+            # Databases created before sessions kept a content hash; their next save rewrites them once
+            conn.execute("ALTER TABLE sessions ADD COLUMN content_hash TEXT")
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Connection for the calling thread"""
+        conn = getattr(self._local, "connection", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.connection = conn
+        return conn
+
+    def close(self):
+        """Close the calling thread's connection"""
+        conn = getattr(self._local, "connection", None)
+        if conn is not None:
+            conn.close()
+            self._local.connection = None
+
+    def save_session(self, session_name: str, messages: List[Dict], metadata: Optional[Dict] = None):
+        """Insert or replace a session and its messages in one transaction"""
+        conn = self.connection
+        with conn:
+            self._write_session(conn, session_name, messages, metadata)
+
+    def save_sessions(self, sessions: List[Dict]):
+        """Insert or replace many sessions (in the JSON session file shape) in one transaction"""
+        conn = self.connection
+        with conn:
+            for data in sessions:
+                self._write_session(conn, data["session_name"], data.get("messages", []), data.get("metadata"))
+
+    def read_session(self, session_name: str) -> Optional[Dict]:
+        """Return a session in the same shape as the JSON session files"""
+        conn = self.connection
+        row = conn.execute("SELECT * FROM sessions WHERE name = ?", (session_name,)).fetchone()
+        if row is None:
+            return None
+        messages = [
+            self._message_from_row(message)
+            for message in conn.execute(
+                "SELECT role, content, timestamp, extra FROM messages "
+                "WHERE session_id = ? ORDER BY position",
+                (row["id"],),
+            )
+        ]
+        return {
+            "session_name": row["name"],
+            "messages": messages,
+            "metadata": {
+                "created_at": row["created_at"],
+                "message_count": row["message_count"],
+                "last_modified": row["last_modified"],
+                **json.loads(row["metadata"]),
+            },
+        }
+
+    def session_info(self, session_name: str) -> Optional[Dict]:
+        """A session's metadata without its messages"""
+        row = self.connection.execute("SELECT * FROM sessions WHERE name = ?", (session_name,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "session_name": row["name"],
+            "metadata": {
+                "created_at": row["created_at"],
+                "message_count": row["message_count"],
+                "last_modified": row["last_modified"],
+                **json.loads(row["metadata"]),
+            },
+        }
+
+    def read_range(self, session_name: str, start: int, end: int) -> List[Dict]:
+        """Messages ``start`` to ``end`` (exclusive) of a session, by position"""
+        rows = self.connection.execute(
+            "SELECT m.role, m.content, m.timestamp, m.extra FROM messages m "
+            "JOIN sessions s ON s.id = m.session_id "
+            "WHERE s.name = ? AND m.position >= ? AND m.position < ? ORDER BY m.position",
+            (session_name, start, end),
+        )
+        return [self._message_from_row(row) for row in rows]
+
+    def list_sessions(self) -> List[Dict]:
+        """Session metadata, most recently modified first"""
+        sessions = []
+        for row in self.connection.execute(
+            "SELECT name, created_at, message_count, last_modified, model, metadata FROM sessions "
+            "ORDER BY last_modified DESC"
+        ):
+            session = dict(row)
+            session["starred"] = bool(json.loads(session.pop("metadata")).get("starred"))
+            sessions.append(session)
+        return sessions
+
+    def session_sizes(self) -> Dict[str, int]:
+        """Bytes of message content stored for every session"""
+        return dict(self.connection.execute(
+            "SELECT s.name, COALESCE(SUM(LENGTH(CAST(m.content AS BLOB))), 0) FROM sessions s "
+            "LEFT JOIN messages m ON m.session_id = s.id GROUP BY s.id"
+        ).fetchall())
+
+    def update_metadata(self, session_name: str, metadata: Dict) -> bool:
+        """Merge ``metadata`` into a session's metadata without touching its messages"""
+        with self.connection as conn:
+            row = conn.execute("SELECT metadata FROM sessions WHERE name = ?", (session_name,)).fetchone()
+            if row is None:
+                return False
+            merged = {**json.loads(row["metadata"]), **metadata}
+            conn.execute(
+                "UPDATE sessions SET metadata = ? WHERE name = ?", (json.dumps(merged, ensure_ascii=False), session_name)
+            )
+        return True
+
+    def delete_session(self, session_name: str) -> bool:
+        """Delete a session and its messages"""
+        with self.connection as conn:
+            return conn.execute("DELETE FROM sessions WHERE name = ?", (session_name,)).rowcount > 0
+
+    def import_sessions(self, sources: Iterable[Tuple[str, float, str, Callable[[], Optional[Dict]]]]) -> int:
+        """Import sessions whose source is new or changed since the last import.
+
+        ``sources`` yields ``(key, mtime, session_name, read)``: ``key``
+        names the source (e.g. its file name), ``mtime`` changes whenever
+        the source does, and ``read()`` returns the session data, or None
+        if it cannot be read. See ``ChatHistory.import_json_sessions``.
+        """
+        start = time.perf_counter()
+        conn = self.connection
+        imported = {row["filename"]: row["mtime"] for row in conn.execute("SELECT filename, mtime FROM imported_files")}
+
+        count = 0
+        with conn:
+            for key, mtime, session_name, read in sources:
+                if imported.get(key) == mtime:
+                    continue
+                data = read()
+                if data is None:
+                    logger.error(f"Failed to import session {session_name} from {key}")
+                    continue
+                self._write_session(conn, session_name, data.get("messages", []), data.get("metadata", {}))
+                conn.execute(
+                    "INSERT OR REPLACE INTO imported_files (filename, mtime) VALUES (?, ?)",
+                    (key, mtime),
+                )
+                count += 1
+
+        if count:
+            elapsed = time.perf_counter() - start
+            logger.info(f"Imported {count} sessions into {self.db_path} in {elapsed:.1f}s")
+        return count
+
+    def _write_session(self, conn: sqlite3.Connection, session_name: str, messages: List[Dict],
+                       metadata: Optional[Dict]):
+        metadata = dict(metadata or {})
+        now = datetime.now().isoformat()
+        row = conn.execute(
+            "SELECT id, created_at, message_count, metadata, content_hash FROM sessions WHERE name = ?",
+            (session_name,)
+        ).fetchone()
+        if row:
+            # Keep metadata set separately (e.g. a star) when the session is saved again
+            metadata = {**json.loads(row["metadata"]), **metadata}
+        created_at = metadata.pop("created_at", None) or (row["created_at"] if row else now)
+        last_modified = metadata.pop("last_modified", None) or now
+        metadata.pop("message_count", None)
+        stored = row["message_count"] if row else 0
+        stored_prefix, content_hash = message_digests(messages, stored)
+        values = (
+            metadata.get("model"),
+            created_at,
+            last_modified,
+            len(messages),
+            json.dumps(metadata, ensure_ascii=False),
+            content_hash,
+        )
+        start = 0
+        if row:
+            session_id = row["id"]
+            conn.execute(
+                "UPDATE sessions SET model = ?, created_at = ?, last_modified = ?, "
+                "message_count = ?, metadata = ?, content_hash = ? WHERE id = ?",
+                values + (session_id,),
+            )
+            if stored and stored_prefix is not None and stored_prefix == row["content_hash"]:
+                # Autosave after every reply only adds the new messages
+                start = stored
+            else:
+                # A paged view may read its rows from this session, so read it before they are deleted
+                messages = list(messages)
+                conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+        else:
+            session_id = conn.execute(
+                "INSERT INTO sessions (model, created_at, last_modified, message_count, metadata, content_hash, "
+                "name) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                values + (session_name,),
+            ).lastrowid
+        conn.executemany(
+            "INSERT INTO messages (session_id, position, role, content, timestamp, extra) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (self._message_row(session_id, i, message) for i, message in enumerate(messages[start:], start)),
+        )
+
+    def _message_row(self, session_id: int, position: int, message: Dict):
+        extra = {key: value for key, value in message.items() if key not in MESSAGE_COLUMNS}
+        return (
+            session_id,
+            position,
+            message["role"],
+            message["content"],
+            message.get("timestamp"),
+            json.dumps(extra, ensure_ascii=False) if extra else None,
+        )
+
+    def _message_from_row(self, row: sqlite3.Row) -> Dict:
+        message = {"role": row["role"], "content": row["content"], "timestamp": row["timestamp"]}
+        if row["extra"]:
+            message.update(json.loads(row["extra"]))
+        return message
+
+
+if __name__ == "__main__":
+    # Import JSON sessions: python -m modules.sqlite_history chat_history/chat_history [history.db]
+    import sys
+    from .chat_history import ChatHistory
+
+    logging.basicConfig(level=logging.INFO)
+    source = sys.argv[1]
+    store = SQLiteHistoryStore(sys.argv[2] if len(sys.argv) > 2 else os.path.join(source, "history.db"))
+    history = ChatHistory(source)
+    try:
+        print(f"Imported {history.import_json_sessions(store)} sessions into {store.db_path}")
+    finally:
+        history.close()
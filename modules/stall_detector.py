@@ -0,0 +1,212 @@
+from PyQt6.QtCore import QObject, QSettings, QTimer
+from PyQt6.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QLabel,
+    QTableWidget,
+    QTableWidgetItem,
+    QHeaderView,
+)
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+logger = logging.getLogger("main.stalls")
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _stall_site(stack: List[traceback.FrameSummary]) -> str:
+    """Innermost frame that belongs to this project, or the innermost frame"""
+    for frame in reversed(stack):
+        filename = os.path.abspath(frame.filename)
+        if filename.startswith(PROJECT_ROOT) and "site-packages" not in filename:
+            return f"{os.path.relpath(filename, PROJECT_ROOT)}:{frame.lineno} ({frame.name})"
+    if stack:
+        frame = stack[-1]
+        return f"{os.path.basename(frame.filename)}:{frame.lineno} ({frame.name})"
+    return "unknown"
+
+
+def summarize(records: Iterable[Dict], top: int = 10) -> List[Dict]:
+    """Group stall records by site, worst total duration first"""
+    sites: Dict[str, Dict] = {}
+    for record in records:
+        site = sites.setdefault(
+            record["site"], {"site": record["site"], "count": 0, "total_ms": 0.0, "max_ms": 0.0, "stack": ""}
+        )
+        site["count"] += 1
+        site["total_ms"] += record["duration_ms"]
+        if record["duration_ms"] >= site["max_ms"]:
+            site["max_ms"] = record["duration_ms"]
+            site["stack"] = record.get("stack", "")
+    return sorted(sites.values(), key=lambda site: site["total_ms"], reverse=True)[:top]
+
+
+def load_trace(path: str) -> List[Dict]:
+    """Read stall records from a trace file"""
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                records.append(json.loads(line))
+    return records
+
+
+class StallDetector(QObject):
+    """Watchdog that detects GUI event-loop stalls and records where they happened.
+
+    A timer on the GUI thread updates a heartbeat every ``interval_ms``; a
+    watchdog thread notices when the heartbeat is older than the threshold
+    and captures the main thread's stack. When the loop recovers, the stall
+    duration and stack are appended to a JSONL trace file in ``logs/``.
+    Stalls inside C code that holds the GIL are captured once it is released.
+    Nothing is watched until ``start`` is called, so the blocking work of
+    startup (tracked by the startup stages) is not reported as stalls.
+    """
+
+    def __init__(self, parent=None, interval_ms: int = 50, threshold_ms: Optional[int] = None):
+        super().__init__(parent)
+        settings = QSettings("AI-Chat-App", "Performance")
+        self.threshold = (threshold_ms or int(settings.value("stall_threshold_ms", 200))) / 1000
+        self.interval = interval_ms / 1000
+
+        logs_dir = "logs"
+        os.makedirs(logs_dir, exist_ok=True)
+        self.trace_file = os.path.join(logs_dir, f"stalls_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+
+        self.records: List[Dict] = []
+        self.max_latency_ms = 0.0
+        self._latency_total = 0.0
+        self._beats = 0
+
+        self._main_thread_id = threading.get_ident()
+        self._lock = threading.Lock()
+        self._heartbeat = time.monotonic()
+        self._pending: Optional[Dict] = None
+        self._running = False
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self._beat)
+        self._watchdog: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start the heartbeat and watchdog"""
+        if self._running:
+            return
+        with self._lock:
+            self._heartbeat = time.monotonic()
+            self._pending = None
+        self._running = True
+        self.timer.start()
+        self._watchdog = threading.Thread(target=self._watch, name="stall-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(f"Stall detector started (threshold {self.threshold * 1000:.0f} ms, trace {self.trace_file})")
+
+    @property
+    def average_latency_ms(self) -> float:
+        return self._latency_total / self._beats if self._beats else 0.0
+
+    def summary(self, top: int = 10) -> List[Dict]:
+        """Top stall sites recorded in this session"""
+        with self._lock:
+            return summarize(list(self.records), top)
+
+    def stop(self):
+        """Stop the heartbeat and watchdog"""
+        self._running = False
+        self.timer.stop()
+
+    def _beat(self):
+        now = time.monotonic()
+        with self._lock:
+            gap = now - self._heartbeat
+            self._heartbeat = now
+            pending, self._pending = self._pending, None
+
+        latency_ms = max(gap - self.interval, 0) * 1000
+        self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+        self._latency_total += latency_ms
+        self._beats += 1
+
+        if pending is None and gap > self.threshold:
+            # The watchdog could not sample the stack (e.g. the GIL was held throughout)
+            pending = {"site": "unknown (stack not sampled)", "stack": ""}
+        if pending is not None:
+            self._record(pending, gap * 1000)
+
+    def _record(self, pending: Dict, duration_ms: float):
+        record = {
+            "timestamp": datetime.now().isoformat(),
+            "duration_ms": round(duration_ms, 1),
+            "site": pending["site"],
+            "stack": pending["stack"],
+        }
+        with self._lock:
+            self.records.append(record)
+        logger.warning(f"GUI stalled for {duration_ms:.0f} ms at {record['site']}")
+        try:
+            with open(self.trace_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            logger.error(f"Failed to write stall trace: {e}")
+
+    def _watch(self):
+        while self._running:
+            time.sleep(self.interval / 2)
+            with self._lock:
+                stalled = self._pending is None and time.monotonic() - self._heartbeat > self.threshold
+            if not stalled:
+                continue
+
+            frame = sys._current_frames().get(self._main_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            with self._lock:
+                self._pending = {"site": _stall_site(stack), "stack": "".join(stack.format())}
+
+
+class StallReportDialog(QDialog):
+    """Lists the sites where the GUI stalled most"""
+
+    def __init__(self, detector: StallDetector, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("GUI Stall Report")
+        self.setMinimumSize(700, 300)
+        layout = QVBoxLayout(self)
+
+        layout.addWidget(QLabel(
+            f"Threshold: {detector.threshold * 1000:.0f} ms | "
+            f"Event-loop latency avg {detector.average_latency_ms:.1f} ms, max {detector.max_latency_ms:.0f} ms | "
+            f"Trace: {detector.trace_file}"
+        ))
+
+        sites = detector.summary()
+        table = QTableWidget(len(sites), 4)
+        table.setHorizontalHeaderLabels(["Site", "Stalls", "Total (ms)", "Max (ms)"])
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        for row, site in enumerate(sites):
+            site_item = QTableWidgetItem(site["site"])
+            site_item.setToolTip(site["stack"])
+            table.setItem(row, 0, site_item)
+            table.setItem(row, 1, QTableWidgetItem(str(site["count"])))
+            table.setItem(row, 2, QTableWidgetItem(f"{site['total_ms']:.0f}"))
+            table.setItem(row, 3, QTableWidgetItem(f"{site['max_ms']:.0f}"))
+        layout.addWidget(table)
+
+        if not sites:
+            layout.addWidget(QLabel("No stalls recorded in this session."))
+
+
+if __name__ == "__main__":
+    # Summarize a trace file: python -m modules.stall_detector logs/stalls_<timestamp>.jsonl
+    for site in summarize(load_trace(sys.argv[1])):
+        print(f"{site['total_ms']:>10.0f} ms  {site['count']:>5}x  max {site['max_ms']:>7.0f} ms  {site['site']}")
@@ -0,0 +1,113 @@
+from PyQt6.QtCore import QObject, QThread, QTimer, pyqtSignal
+from PyQt6.QtWidgets import QLabel
+from typing import Callable, Dict, Optional
+import logging
+import time
+
+logger = logging.getLogger("main.startup")
+
+
+class StageWorker(QThread):
+    """Runs a blocking startup stage off the GUI thread"""
+    result_ready = pyqtSignal(object, str)
+
+    def __init__(self, func: Callable):
+        super().__init__()
+        self.func = func
+
+    def run(self):
+        try:
+            self.result_ready.emit(self.func(), "")
+        except Exception as e:
+            logger.error(f"Startup stage failed: {e}", exc_info=True)
+            self.result_ready.emit(None, str(e))
+
+
+class StartupSequence(QObject):
+    """Runs startup stages after the window is shown and reports their readiness.
+
+    Each stage gets a readiness label in the status bar and its duration,
+    plus the time since launch, is logged so time-to-interactive can be
+    tracked. Stages either run deferred on the GUI thread (when they build
+    widgets) or on a worker thread with their result delivered back to the
+    GUI thread.
+    """
+    stage_finished = pyqtSignal(str, str)
+    all_finished = pyqtSignal()
+
+    def __init__(self, window, start_time: float):
+        super().__init__(window)
+        self.window = window
+        self.start_time = start_time
+        self.labels: Dict[str, QLabel] = {}
+        self.titles: Dict[str, str] = {}
+        self.timings: Dict[str, float] = {}
+        self._started: Dict[str, float] = {}
+        self._workers = []
+
+    def since_start(self) -> float:
+        """Milliseconds since the process started"""
+        return (time.perf_counter() - self.start_time) * 1000
+
+    def mark(self, event: str):
+        """Log a startup milestone"""
+        logger.info(f"Startup: {event} at {self.since_start():.0f} ms")
+
+    def add_stage(self, name: str, title: str):
+        """Register a stage and show its readiness in the status bar"""
+        label = QLabel(f"{title}: waiting")
+        label.setStyleSheet("color: gray; padding: 0 6px;")
+        self.window.statusBar().addPermanentWidget(label)
+        self.labels[name] = label
+        self.titles[name] = title
+
+    def begin(self, name: str, state: str = "loading..."):
+        self._started[name] = time.perf_counter()
+        self.set_state(name, state)
+
+    def finish(self, name: str, state: str = "ready"):
+        """Mark a stage as finished and log how long it took"""
+        duration = (time.perf_counter() - self._started.get(name, time.perf_counter())) * 1000
+        self.timings[name] = duration
+        self.set_state(name, state)
+        logger.info(f"Startup stage '{name}' {state} in {duration:.0f} ms ({self.since_start():.0f} ms after launch)")
+        self.stage_finished.emit(name, state)
+        if len(self.timings) == len(self.labels):
+            self.mark("all stages finished")
+            self.all_finished.emit()
+
+    def set_state(self, name: str, state: str):
+        if name in self.labels:
+            self.labels[name].setText(f"{self.titles[name]}: {state}")
+
+    def run_deferred(self, name: str, func: Callable[[], Optional[str]]):
+        """Run ``func`` on the GUI thread once the event loop is idle; it may return a state text"""
+        def run():
+            self.begin(name)
+            try:
+                self.finish(name, func() or "ready")
+            except Exception as e:
+                logger.error(f"Startup stage '{name}' failed: {e}", exc_info=True)
+                self.finish(name, "failed")
+
+        QTimer.singleShot(0, run)
+
+    def run_in_background(self, name: str, func: Callable, on_result: Callable[[object], Optional[str]]):
+        """Run ``func`` on a worker thread, then ``on_result(result)`` on the GUI thread"""
+        self.begin(name)
+        worker = StageWorker(func)
+
+        def done(result, error):
+            if error:
+                self.finish(name, "failed")
+            else:
+                try:
+                    self.finish(name, on_result(result) or "ready")
+                except Exception as e:
+                    logger.error(f"Startup stage '{name}' failed: {e}", exc_info=True)
+                    self.finish(name, "failed")
+            self._workers.remove(worker)
+
+        worker.result_ready.connect(done)
+        self._workers.append(worker)
+        worker.start()
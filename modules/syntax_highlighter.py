@@ -0,0 +1,110 @@
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+from collections import OrderedDict
+from queue import Queue
+from typing import Dict, Optional
+import logging
+
+from .markdown_renderer import content_digest
+
+logger = logging.getLogger("main.highlighter")
+
+# Optional imports with fallbacks
+try:
+    from pygments import highlight
+    from pygments.formatters import HtmlFormatter
+    from pygments.lexers import get_lexer_by_name, guess_lexer
+    from pygments.util import ClassNotFound
+    PYGMENTS_AVAILABLE = True
+    logger.info("Syntax highlighting (pygments) available")
+except ImportError:
+    PYGMENTS_AVAILABLE = False
+    logger.warning("Syntax highlighting (pygments) not available")
+
+# Pygments style used for each application theme
+THEME_STYLES = {
+    "light": "default",
+    "dark": "monokai",
+}
+
+
+class HighlightWorker(QThread):
+    """Worker thread that highlights code blocks off the GUI thread"""
+    result_ready = pyqtSignal(str, str)
+
+    def __init__(self, jobs: Queue):
+        super().__init__()
+        self.jobs = jobs
+
+    def run(self):
+        # Class-based output so theme changes only swap the stylesheet
+        formatter = HtmlFormatter(nowrap=True)
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            digest, code, lang = job
+            try:
+                try:
+                    lexer = get_lexer_by_name(lang) if lang else guess_lexer(code)
+                except ClassNotFound:
+                    lexer = guess_lexer(code)
+                self.result_ready.emit(digest, highlight(code, lexer, formatter))
+            except Exception as e:
+                logger.error(f"Failed to highlight code block: {e}")
+
+
+class SyntaxHighlighter(QObject):
+    """Caches highlighted code blocks by content hash and highlights misses in the background"""
+    highlighted = pyqtSignal(str)
+
+    def __init__(self, parent=None, cache_size: int = 512):
+        super().__init__(parent)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._pending = set()
+        self._stylesheets: Dict[str, str] = {}
+        self._jobs: Queue = Queue()
+        self.worker = None
+        if PYGMENTS_AVAILABLE:
+            self.worker = HighlightWorker(self._jobs)
+            self.worker.result_ready.connect(self._store_result)
+            self.worker.start()
+        logger.info("Syntax highlighter initialized")
+
+    def lookup(self, code: str, lang: str, digest: Optional[str] = None) -> Optional[str]:
+        """Return cached highlighted HTML, scheduling highlighting on a miss"""
+        digest = digest or content_digest(code, lang)
+        cached = self._cache.get(digest)
+        if cached is not None:
+            self._cache.move_to_end(digest)
+            return cached
+
+        if self.worker is not None and digest not in self._pending:
+            self._pending.add(digest)
+            self._jobs.put((digest, code, lang))
+            logger.debug(f"Queued code block for highlighting ({len(code)} chars, lang={lang or 'auto'})")
+        return None
+
+    def stylesheet(self, theme: str) -> str:
+        """Return the CSS used to colour highlighted blocks for a theme"""
+        if theme not in self._stylesheets:
+            css = "pre.code { font-family: monospace; }\n"
+            if PYGMENTS_AVAILABLE:
+                style = THEME_STYLES.get(theme, "default")
+                css += HtmlFormatter(style=style).get_style_defs("")
+            self._stylesheets[theme] = css
+        return self._stylesheets[theme]
+
+    def _store_result(self, digest: str, html: str):
+        self._pending.discard(digest)
+        self._cache[digest] = html
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        self.highlighted.emit(digest)
+
+    def shutdown(self):
+        """Stop the highlight worker thread"""
+        if self.worker is not None and self.worker.isRunning():
+            self._jobs.put(None)
+            self.worker.wait()
+            logger.debug("Highlight worker stopped")
@@ -0,0 +1,173 @@
+from PyQt6.QtCore import QObject, QSettings, QTimer, Qt
+from PyQt6.QtWidgets import QLabel
+from typing import List
+import logging
+import os
+import time
+import uuid
+
+logger = logging.getLogger("main.hibernation")
+
+
+def format_bytes(size: int) -> str:
+    """Format a byte count for display"""
+    if size < 1024 * 1024:
+        return f"{size / 1024:.0f} KB"
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+class TabHibernator(QObject):
+    """Releases the transcript of idle background tabs and restores it on activation.
+
+    A tab is hibernated when it has been idle longer than the configured
+    threshold, or when the estimated memory of all tabs exceeds the budget
+    (least recently used tabs first). Its messages are written to disk and
+    its display widget and QTextDocument are destroyed; switching back to
+    the tab reloads the messages and re-renders them from the highlight cache.
+    """
+
+    def __init__(self, tab_manager, check_interval: int = 30):
+        super().__init__(tab_manager)
+        self.tab_manager = tab_manager
+
+        settings = QSettings("AI-Chat-App", "Performance")
+        self.idle_seconds = float(settings.value("hibernate_idle_seconds", 600))
+        self.memory_budget = int(float(settings.value("memory_budget_mb", 256)) * 1024 * 1024)
+
+        self.storage_dir = os.path.join("chat_history", "hibernate")
+        os.makedirs(self.storage_dir, exist_ok=True)
+
+        # Memory readout shown next to the tabs
+        self.memory_label = QLabel("")
+        self.memory_label.setStyleSheet("color: gray; padding: 0 6px;")
+        tab_manager.setCornerWidget(self.memory_label, Qt.Corner.TopRightCorner)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.check)
+        self.timer.start(check_interval * 1000)
+        tab_manager.currentChanged.connect(self._on_current_changed)
+        logger.info(
+            f"Tab hibernation enabled (idle {self.idle_seconds:.0f}s, "
+            f"budget {format_bytes(self.memory_budget)})"
+        )
+
+    def register(self, tab):
+        """Start tracking a newly created tab"""
+        tab.tab_id = uuid.uuid4().hex
+        tab.hibernated = False
+        tab.placeholder = None
+        self.touch(tab)
+
+    def touch(self, tab):
+        """Mark a tab as recently used"""
+        tab.last_active = time.monotonic()
+
+    def memory_usage(self, tab) -> int:
+        """Estimated bytes held in memory by a tab's conversation and document"""
+        if tab.hibernated:
+            return 0
+        return tab.messages.memory_usage() + tab.output_display.memory_usage()
+
+    def check(self):
+        """Hibernate idle tabs, then least recently used tabs while over budget"""
+        now = time.monotonic()
+        for tab in self._tabs():
+            if self._can_hibernate(tab) and now - tab.last_active > self.idle_seconds:
+                self.hibernate(tab)
+
+        total = sum(self.memory_usage(tab) for tab in self._tabs())
+        if total > self.memory_budget:
+            candidates = sorted(
+                (tab for tab in self._tabs() if self._can_hibernate(tab)),
+                key=lambda tab: tab.last_active,
+            )
+            for tab in candidates:
+                if total <= self.memory_budget:
+                    break
+                usage = self.memory_usage(tab)
+                if self.hibernate(tab):
+                    total -= usage
+
+        self.update_readout()
+
+    def hibernate(self, tab) -> bool:
+        """Persist a tab's messages and release its document and display widget"""
+        try:
+            path = os.path.join(self.storage_dir, f"tab_{tab.tab_id}.json")
+            tab.messages.unload(path)
+        except Exception as e:
+            logger.error(f"Failed to hibernate tab {tab.messages.model_name}: {e}")
+            return False
+
+        display = tab.output_display
+        display.unbind()
+        placeholder = QLabel("Conversation hibernated to save memory.")
+        placeholder.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        placeholder.setStyleSheet("color: gray;")
+        tab.layout().replaceWidget(display, placeholder)
+        display.deleteLater()
+
+        tab.output_display = None
+        tab.placeholder = placeholder
+        tab.hibernated = True
+        logger.info(f"Hibernated tab {tab.messages.model_name} ({len(tab.messages)} messages)")
+        return True
+
+    def restore(self, tab):
+        """Reload a hibernated tab's messages and rebuild its display"""
+        if not tab.hibernated:
+            return
+        start = time.perf_counter()
+        tab.messages.reload()
+        display = self.tab_manager.create_display(tab)
+        tab.layout().replaceWidget(tab.placeholder, display)
+        tab.placeholder.deleteLater()
+
+        tab.output_display = display
+        tab.placeholder = None
+        tab.hibernated = False
+        elapsed = (time.perf_counter() - start) * 1000
+        logger.info(f"Restored tab {tab.messages.model_name} in {elapsed:.1f} ms")
+
+    def release(self, tab):
+        """Drop hibernation and scrollback files for a tab that is being closed"""
+        tab.messages.release()
+
+    def shutdown(self):
+        """Stop checking and remove all hibernation and scrollback files"""
+        self.timer.stop()
+        for tab in self._tabs():
+            tab.messages.release()
+
+    def update_readout(self):
+        """Refresh the per-tab memory tooltips and the current tab readout"""
+        total = 0
+        for i in range(self.tab_manager.count()):
+            tab = self.tab_manager.widget(i)
+            usage = self.memory_usage(tab)
+            total += usage
+            tooltip = "Hibernated" if tab.hibernated else f"~{format_bytes(usage)} in memory"
+            self.tab_manager.setTabToolTip(i, tooltip)
+
+        current = self.tab_manager.currentWidget()
+        if current is not None:
+            self.memory_label.setText(
+                f"Tab: {format_bytes(self.memory_usage(current))} | All tabs: {format_bytes(total)}"
+            )
+
+    def _on_current_changed(self, index: int):
+        tab = self.tab_manager.widget(index)
+        if tab is None or not hasattr(tab, "tab_id"):
+            return
+        self.restore(tab)
+        self.touch(tab)
+        self.update_readout()
+
+    def _can_hibernate(self, tab) -> bool:
+        if tab.hibernated or tab is self.tab_manager.currentWidget():
+            return False
+        worker = getattr(tab, "current_worker", None)
+        return not (worker and worker.isRunning())
+
+    def _tabs(self) -> List:
+        return [self.tab_manager.widget(i) for i in range(self.tab_manager.count())]
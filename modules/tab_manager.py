@@ -3,19 +3,85 @@ from PyQt6.QtWidgets import (
     QWidget,
     QVBoxLayout,
     QHBoxLayout,
-    QTextEdit,
     QPushButton,
     QLineEdit,
     QFrame,
 )
+from PyQt6.QtCore import QSettings, QThread, QTimer, pyqtSignal
 from datetime import datetime
+from typing import Callable, List, Optional, Sequence
 import logging
+import os
+import time
+from .autosave import AutosaveWorker, RecoveryJournal
 from .model_config import ModelConfig
 from .chat_history import ChatHistory
+from .chat_display import ChatDisplay
+from .message_store import MessageStore
+from .syntax_highlighter import SyntaxHighlighter
+from .tab_hibernation import TabHibernator
+from .search_index import SearchIndex
+from .session_retention import RetentionJob, RetentionPolicy
+
+# Retention waits while a query is running or a message arrived this recently
+RETENTION_IDLE_SECONDS = 10
+# Saved sessions handed to the GUI thread per signal when indexing them in memory
+SESSION_BATCH = 50
+
+
+class SessionReader(QThread):
+    """Brings the search index of saved sessions up to date off the GUI thread.
+
+    With FTS5 the history's persistent index is updated, which only reads
+    sessions whose message count changed since it was last indexed.
+    Without it every session is read and handed to the GUI thread in
+    batches for the in-memory index.
+    """
+    sessions_read = pyqtSignal(list)
+    indexed = pyqtSignal(int)
+
+    def __init__(self, chat_history: ChatHistory, archive_after_days: float = 0):
+        super().__init__()
+        self.chat_history = chat_history
+        self.archive_after_days = archive_after_days
+
+    def run(self):
+        self.chat_history.import_json_sessions()
+        self.chat_history.archive_old_sessions(self.archive_after_days)
+        if self.chat_history.search is not None:
+            self.indexed.emit(self.chat_history.update_search_index())
+            return
+
+        batch = []
+        for session in self.chat_history.list_sessions():
+            if not session["name"]:
+                continue
+            data = self.chat_history.read_session(session["name"])
+            if data is not None:
+                batch.append((session["name"], data.get("messages", [])))
+            if len(batch) >= SESSION_BATCH:
+                self.sessions_read.emit(batch)
+                batch = []
+        if batch:
+            self.sessions_read.emit(batch)
+
+
+class RetentionWorker(QThread):
+    """Applies the retention policy at low priority, yielding to interactive work"""
+    report_ready = pyqtSignal(dict)
+
+    def __init__(self, job: RetentionJob, dry_run: bool = False):
+        super().__init__()
+        self.job = job
+        self.dry_run = dry_run
+
+    def run(self):
+        self.report_ready.emit(self.job.run(self.dry_run))
 
 
 class TabManager(QTabWidget):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, model_config: Optional[ModelConfig] = None,
+                 chat_history: Optional[ChatHistory] = None):
         super().__init__(parent)
         self.logger = logging.getLogger("main.tab_manager")
         self.logger.info("Initializing TabManager")
@@ -23,27 +89,94 @@ class TabManager(QTabWidget):
         self.parent = parent
         self.setTabsClosable(True)
         self.tabCloseRequested.connect(self.close_tab)
-        self.model_config = ModelConfig()
-        self.chat_history = ChatHistory()
-        self.initialize_model_tabs()
+        # Shared with the main window; the config arrives with the startup config stage
+        self.model_config = model_config
+        self.chat_history = chat_history or ChatHistory()
+        self.highlighter = SyntaxHighlighter(self)
+        self.theme = "light"
 
-    def initialize_model_tabs(self):
+        # Scrollback window for live tabs; older messages are spilled to disk
+        settings = QSettings("AI-Chat-App", "Performance")
+        self.scrollback_messages = int(settings.value("scrollback_messages", 200))
+        self.scrollback_bytes = int(float(settings.value("scrollback_mb", 4)) * 1024 * 1024)
+        self.scrollback_dir = os.path.join("chat_history", "scrollback")
+
+        # Sessions untouched this long are compressed into the archive (0 disables)
+        self.archive_after_days = float(settings.value("archive_after_days", 30))
+
+        # Deletes and merges run in the background after the history is indexed
+        self.retention_enabled = settings.value("retention_enabled", "false") in (True, "true")
+        self.retention_policy = RetentionPolicy(
+            max_age_days=float(settings.value("retention_max_age_days", 0)),
+            max_total_mb=float(settings.value("retention_max_mb", 0)),
+            empty_messages=int(settings.value("retention_empty_messages", 1)),
+            merge_below=int(settings.value("retention_merge_below", 3)),
+            grace_days=float(settings.value("retention_grace_days", 7)),
+        )
+        self.retention_worker = None
+        self.last_activity = time.monotonic()
+        self._pending_queries = set()
+
+        self.hibernator = TabHibernator(self)
+        self.search_index = SearchIndex()
+        self.session_reader = None
+
+        # Debounced background autosave of changed tabs (0 disables it)
+        self.autosave_delay = float(settings.value("autosave_seconds", 3))
+        self.recovery = RecoveryJournal(os.path.join("chat_history", "recovery"))
+        self._dirty_tabs = set()
+        self._dirty_since = None
+        self.autosave_timer = QTimer(self)
+        self.autosave_timer.setSingleShot(True)
+        self.autosave_timer.timeout.connect(self.autosave_dirty_tabs)
+        self.autosaver = None
+        if self.autosave_delay > 0:
+            self.autosaver = AutosaveWorker(self.chat_history)
+            self.autosaver.saved.connect(self._on_autosaved)
+            self.autosaver.start()
+
+        # Sessions written by other processes (headless tools, a second window)
+        self.change_timer = QTimer(self)
+        self.change_timer.timeout.connect(self.apply_external_changes)
+        poll_seconds = float(settings.value("history_poll_seconds", 2))
+        if poll_seconds > 0:
+            self.change_timer.start(int(poll_seconds * 1000))
+
+    def initialize_model_tabs(self, model_config: Optional[ModelConfig] = None):
         """Create initial tabs for each installed model"""
+        if model_config is not None:
+            self.model_config = model_config
+        self.model_config.subscribe(self._on_config_changed)
         self.logger.info("Initializing model tabs")
         available_models = self.model_config.list_available_models()
         for model in available_models:
             self.create_model_tab(model)
         self.logger.info(f"Created {len(available_models)} model tabs")
+        self.restore_recovered_sessions()
 
-    def create_model_tab(self, model_name):
-        """Create a new tab for a specific model"""
+    def create_model_tab(self, model_name, messages: Optional[List] = None, session_name: Optional[str] = None,
+                         base: Optional[Sequence] = None):
+        """Create a new tab for a specific model, optionally continuing a saved session"""
         self.logger.info(f"Creating new tab for model: {model_name}")
         tab = QWidget()
         layout = QVBoxLayout(tab)
 
+        # Conversation state lives in the message store; the display follows it
+        tab.messages = MessageStore(model_name, messages, base)
+        tab.messages.session_name = session_name
+        tab.messages.set_scrollback(self.scrollback_messages, self.scrollback_bytes, self.scrollback_dir)
+        self.hibernator.register(tab)
+
+        # Keep the search index in step with the conversation; a paged base is
+        # already indexed as its saved session
+        start = tab.messages.base_count
+        for i, message in enumerate(tab.messages.get_range(start, len(tab.messages)), start):
+            self.search_index.add(("tab", tab.tab_id), i, message)
+        tab.messages.subscribe(lambda store, message: self._index_tab_message(tab, store, message))
+        tab.messages.subscribe(lambda store, message: self._on_tab_changed(tab, store, message))
+
         # Chat display
-        output_display = QTextEdit()
-        output_display.setReadOnly(True)
+        output_display = self.create_display(tab)
         layout.addWidget(output_display)
 
         # Input section
@@ -74,19 +207,28 @@ class TabManager(QTabWidget):
 
         # Connect signals
         submit_button.clicked.connect(lambda: self.handle_query(tab))
-        clear_button.clicked.connect(output_display.clear)
+        clear_button.clicked.connect(lambda: self.clear_tab(tab))
         input_field.returnPressed.connect(lambda: self.handle_query(tab))
 
-        # Add welcome message
-        output_display.append(f"Welcome to {model_name} chat!")
-        output_display.append("Type your message and press Enter or click Send.")
-        output_display.append("-" * 50)
-
         # Add tab
         self.addTab(tab, model_name)
         self.logger.debug(f"Tab created successfully for model: {model_name}")
         return tab
 
+    def create_display(self, tab):
+        """Create the chat display for a tab and render its messages"""
+        model_name = tab.messages.model_name
+        output_display = ChatDisplay(self.highlighter)
+        output_display.set_theme(self.theme)
+        output_display.set_scrollback(self.scrollback_messages, self.scrollback_bytes)
+
+        # Add welcome message
+        output_display.append(f"Welcome to {model_name} chat!")
+        output_display.append("Type your message and press Enter or click Send.")
+        output_display.append("-" * 50)
+        output_display.bind(tab.messages)
+        return output_display
+
     def handle_query(self, tab):
         """Handle query from the current tab"""
         query = tab.input_field.text().strip()
@@ -101,14 +243,20 @@ class TabManager(QTabWidget):
         model_name = self.tabText(self.indexOf(tab))
         self.logger.info(f"Processing query for model {model_name}: {query[:50]}...")
 
-        # Display query
-        tab.output_display.append(f"\nUser: {query}")
+        # Record query; the display renders it from the store
+        self.hibernator.touch(tab)
+        tab.messages.add_message("user", query)
+        model_info = self.model_config.get_model_info(model_name) or {}
+        prompt = tab.messages.build_prompt(model_info.get("context_length", 4096))
 
         # Start worker thread
         from main import Worker  # Import here to avoid circular import
-        worker = Worker(query, model_name, self.model_config)
+        worker = Worker(prompt, model_name, self.model_config)
         worker.result_ready.connect(lambda response: self.handle_response(tab, response))
         worker.start()
+        tab.query_started = time.perf_counter()
+        self.last_activity = time.monotonic()
+        self._pending_queries.add(tab.tab_id)
         self.logger.debug(f"Started worker thread for model {model_name}")
 
         # Store worker reference to prevent garbage collection
@@ -119,30 +267,40 @@ class TabManager(QTabWidget):
         model_name = self.tabText(self.indexOf(tab))
         self.logger.info(f"Received response from model {model_name}: {response[:50]}...")
         
-        tab.output_display.append(f"\nAssistant: {response}")
+        self.hibernator.touch(tab)
+        # Response latency is kept with the message for the history analytics
+        started = getattr(tab, "query_started", None)
+        latency = {"latency_ms": round((time.perf_counter() - started) * 1000)} if started else {}
+        tab.query_started = None
+        self.last_activity = time.monotonic()
+        self._pending_queries.discard(tab.tab_id)
+        tab.messages.add_message("assistant", response, **latency)
+        self.hibernator.update_readout()
 
         # Handle TTS if enabled
         if hasattr(self.parent, "tts_enabled") and self.parent.tts_enabled:
-            if not self.parent.speech_handler.is_speaking:
-                self.logger.debug("Initiating text-to-speech for response")
-                self.parent.speaking_indicator.setText("🔊 AI is speaking...")
-                self.parent.stop_button.setEnabled(True)
-
-                def tts_callback(error=None):
-                    self.parent.speaking_indicator.setText("")
-                    self.parent.stop_button.setEnabled(False)
-                    if error:
-                        self.logger.error(f"TTS error: {error}")
+            # Spoken on the speech thread; responses arriving meanwhile wait in its queue
+            self.logger.debug("Queueing response for text-to-speech")
+
+            def tts_callback(error=None):
+                if error:
+                    self.logger.error(f"TTS error: {error}")
+                    if tab.output_display is not None:
                         tab.output_display.append(f"TTS Error: {error}")
 
-                self.parent.speech_handler.text_to_speech(
-                    response, 
-                    self.parent.tts_dropdown.currentText(), 
-                    callback=tts_callback
-                )
-            else:
-                self.logger.debug("Adding response to speech queue")
-                self.parent.speech_handler.speech_queue.append(response)
+            self.parent.speech_handler.text_to_speech(
+                response,
+                self.parent.tts_dropdown.currentText(),
+                callback=tts_callback
+            )
+
+    def apply_theme(self, theme: str):
+        """Update code highlighting colours in every tab"""
+        self.theme = theme
+        for i in range(self.count()):
+            tab = self.widget(i)
+            if tab.output_display is not None:
+                tab.output_display.set_theme(theme)
 
     def close_tab(self, index):
         """Close the specified tab"""
@@ -155,7 +313,11 @@ class TabManager(QTabWidget):
             self.logger.debug(f"Stopping worker thread for model: {model_name}")
             tab.current_worker.quit()
             tab.current_worker.wait()
+        self._pending_queries.discard(tab.tab_id)
         
+        self.autosave_tab(tab)
+        self.hibernator.release(tab)
+        self.search_index.remove_source(("tab", tab.tab_id))
         self.removeTab(index)
 
         # Don't allow closing the last tab
@@ -172,26 +334,298 @@ class TabManager(QTabWidget):
             self.logger.debug(f"Current active tab: {model_name}")
         return current_tab
 
+    def save_tab_session(self, tab) -> bool:
+        """Save the conversation of a single tab to chat history"""
+        store = tab.messages
+        if not store.session_name:
+            store.session_name = f"{store.model_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+        messages = store.snapshot()
+        saved = self.chat_history.save_session(
+            store.session_name, metadata={"model": store.model_name}, messages=messages
+        )
+        if saved:
+            self.logger.info(f"Saved chat session to chat history: {store.session_name}")
+            self.index_session(store.session_name, messages)
+            self._dirty_tabs.discard(tab.tab_id)
+            self.recovery.reset(tab.tab_id)
+        return bool(saved)
+
+    def clear_tab(self, tab):
+        """Start a new conversation in a tab, autosaving the current one first"""
+        self.autosave_tab(tab)
+        tab.messages.clear()
+
+    def autosave_tab(self, tab):
+        """Queue a background save of a tab with unsaved messages"""
+        if self.autosaver is None or tab.tab_id not in self._dirty_tabs:
+            return
+        self._dirty_tabs.discard(tab.tab_id)
+        store = tab.messages
+        if not store.session_name:
+            store.session_name = f"{store.model_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.autosaver.submit(tab.tab_id, store.session_name, store.model_name, store.snapshot())
+
+    def autosave_dirty_tabs(self):
+        """Queue background saves for every tab changed since the last autosave"""
+        self._dirty_since = None
+        for i in range(self.count()):
+            self.autosave_tab(self.widget(i))
+
+    def restore_recovered_sessions(self):
+        """Reopen conversations that were not saved when the application last exited"""
+        for path, recovered in self.recovery.pending():
+            session_name = recovered["session"]
+            messages = []
+            if session_name:
+                data = self.chat_history.read_session(session_name)
+                messages = data.get("messages", []) if data else []
+            while len(messages) in recovered["messages"]:
+                messages.append(recovered["messages"][len(messages)])
+            if not messages:
+                os.remove(path)
+                continue
+
+            model_name = recovered["model"]
+            if not session_name:
+                session_name = f"{model_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            # Persist before dropping the recovery file so a second crash loses nothing
+            if self.chat_history.save_session(session_name, {"model": model_name}, messages=messages):
+                os.remove(path)
+                self.logger.warning(f"Recovered {len(messages)} messages of unsaved session {session_name}")
+                self.open_session(session_name)
+            else:
+                self.logger.error(f"Failed to restore recovered session from {path}")
+
+    def shutdown_autosave(self):
+        """Flush pending autosaves and stop the autosave thread"""
+        if self.autosaver is not None:
+            self.autosave_timer.stop()
+            self.autosave_dirty_tabs()
+            self.autosaver.stop()
+            self.autosaver.wait()
+            self.autosaver = None
+        self.recovery.close()
+
+    def is_busy(self) -> bool:
+        """Whether interactive work is going on that background jobs should wait for"""
+        # Called from background threads, so only plain attributes are read
+        return bool(self._pending_queries or self._dirty_tabs) or \
+            time.monotonic() - self.last_activity < RETENTION_IDLE_SECONDS
+
+    def start_retention(self, dry_run: bool = False, on_finished: Optional[Callable[[dict], None]] = None) -> bool:
+        """Apply the retention policy in the background; sessions open in tabs are left alone"""
+        if self.retention_worker is not None:
+            return False
+        protected = {self.widget(i).messages.session_name for i in range(self.count())}
+        job = RetentionJob(self.chat_history, self.retention_policy, protected, should_yield=self.is_busy)
+        self.retention_worker = RetentionWorker(job, dry_run)
+
+        def finished(report):
+            self.retention_worker = None
+            if not report["dry_run"]:
+                self.index_retention_changes(report)
+            if on_finished:
+                on_finished(report)
+
+        self.retention_worker.report_ready.connect(finished)
+        self.retention_worker.start(QThread.Priority.LowestPriority)
+        return True
+
+    def index_retention_changes(self, report: dict):
+        """Drop deleted sessions from the in-memory index and index the sessions they were merged into"""
+        if self.chat_history.search is not None:
+            # The history's full-text index is updated by the deletes and saves themselves
+            return
+        for session_name in report["removed_sessions"]:
+            self.search_index.remove_source(("session", session_name))
+        for session_name in report["merge_targets"]:
+            data = self.chat_history.read_session(session_name)
+            if data is not None:
+                self.index_session(session_name, data.get("messages", []))
+
+    def stop_retention(self):
+        """Stop a running retention job after its current action"""
+        if self.retention_worker is not None:
+            self.retention_worker.job.stop()
+            self.retention_worker.wait()
+            self.retention_worker = None
+
+    def toggle_star(self, tab) -> Optional[bool]:
+        """Star or unstar the saved session of a tab; returns the new state, or None if it could not be saved"""
+        self.save_tab_session(tab)
+        session_name = tab.messages.session_name
+        starred = not any(
+            session["name"] == session_name and session.get("starred") for session in self.chat_history.list_sessions()
+        )
+        if not self.chat_history.set_starred(session_name, starred):
+            return None
+        return starred
+
+    def export_tab_session(self, tab, format: str = "markdown") -> Optional[str]:
+        """Export the complete conversation of a tab, including spilled messages"""
+        self.chat_history.current_session = tab.messages.messages
+        self.chat_history.session_name = tab.messages.session_name
+        return self.chat_history.export_session(format)
+
     def save_all_sessions(self):
         """Save chat history from all tabs"""
         self.logger.info("Saving all chat sessions")
         for i in range(self.count()):
             tab = self.widget(i)
-            model_name = self.tabText(i)
-            chat_text = tab.output_display.toPlainText()
-            
             try:
-                # Save to chat history
-                session_name = f"{model_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                messages = []
-                for line in chat_text.split('\n'):
-                    if line.startswith("User: "):
-                        messages.append({"role": "user", "content": line[6:]})
-                    elif line.startswith("Assistant: "):
-                        messages.append({"role": "assistant", "content": line[11:]})
-                
-                self.chat_history.current_session = messages
-                if self.chat_history.save_session(session_name):
-                    self.logger.info(f"Saved chat session to chat history: {session_name}")
+                self.save_tab_session(tab)
             except Exception as e:
-                self.logger.error(f"Error saving chat session for model {model_name}: {str(e)}")
+                self.logger.error(f"Error saving chat session for model {self.tabText(i)}: {str(e)}")
+
+    def find_tab(self, tab_id: str):
+        """Return the open tab with the given id"""
+        for i in range(self.count()):
+            tab = self.widget(i)
+            if tab.tab_id == tab_id:
+                return tab
+        return None
+
+    def find_session_tab(self, session_name: str):
+        """Return the open tab holding a saved session"""
+        for i in range(self.count()):
+            tab = self.widget(i)
+            if tab.messages.session_name == session_name:
+                return tab
+        return None
+
+    def show_message(self, tab, message_index: int):
+        """Switch to a tab and scroll to one of its messages"""
+        self.setCurrentWidget(tab)
+        if tab.output_display is not None:
+            tab.output_display.scroll_to_message(message_index)
+
+    def open_session(self, session_name: str, message_index: Optional[int] = None):
+        """Show a saved session, opening it in a new tab if needed"""
+        tab = self.find_session_tab(session_name)
+        if tab is None:
+            # Only the pages the display shows are read; older ones load on scroll
+            messages = self.chat_history.open_paged(session_name)
+            if messages is None or self.model_config is None:
+                return None
+
+            models = self.model_config.list_available_models()
+            model_name = messages.metadata.get("model")
+            if model_name not in models:
+                prefixed = [model for model in models if session_name.startswith(f"{model}_")]
+                model_name = prefixed[0] if prefixed else models[0]
+            tab = self.create_model_tab(model_name, session_name=session_name, base=messages)
+            if self.retention_worker is not None:
+                self.retention_worker.job.protected.add(session_name)
+            self.logger.info(f"Opened saved session {session_name} in a new tab")
+
+        if message_index is None:
+            self.setCurrentWidget(tab)
+        else:
+            self.show_message(tab, message_index)
+        return tab
+
+    def index_session(self, session_name: str, messages: List):
+        """Index a saved session in memory, adding only messages not indexed yet.
+
+        With FTS5 saved sessions are searched through the history's own
+        index, which every save already updates, so there is nothing to do.
+        """
+        if self.chat_history.search is not None:
+            return
+        source = ("session", session_name)
+        indexed = self.search_index.source_size(source)
+        if indexed > len(messages):
+            self.search_index.remove_source(source)
+            indexed = 0
+        for i, message in enumerate(messages[indexed:], indexed):
+            self.search_index.add(source, i, message)
+
+    def index_saved_sessions(self, on_finished: Optional[Callable[[int], None]] = None):
+        """Bring the search index of saved sessions up to date in the background"""
+        self.session_reader = SessionReader(self.chat_history, self.archive_after_days)
+        added = [0]
+
+        def index(batch):
+            before = len(self.search_index)
+            for session_name, messages in batch:
+                self.index_session(session_name, messages)
+            added[0] += len(self.search_index) - before
+
+        def indexed(count):
+            added[0] = count
+
+        def finished():
+            self.logger.info(f"Search index ready ({added[0]} new messages indexed)")
+            if on_finished:
+                on_finished(added[0])
+
+        self.session_reader.sessions_read.connect(index)
+        self.session_reader.indexed.connect(indexed)
+        self.session_reader.finished.connect(finished)
+        self.session_reader.start()
+
+    def apply_external_changes(self):
+        """Re-index in memory the sessions other processes changed since the last check"""
+        changes = self.chat_history.poll_changes()
+        if not changes or self.chat_history.search is not None:
+            # With FTS5, other processes update the shared full-text index themselves
+            return
+        if any(change["op"] == "reset" for change in changes):
+            self.logger.info("History change log was restarted; re-indexing saved sessions")
+            if self.session_reader is None or not self.session_reader.isRunning():
+                self.index_saved_sessions()
+            return
+
+        for session_name in {change["session"] for change in changes}:
+            source = ("session", session_name)
+            messages = self.chat_history.open_paged(session_name)
+            if messages is None:
+                self.search_index.remove_source(source)
+            else:
+                # Paged, so only messages past those already indexed are read
+                self.index_session(session_name, messages)
+        self.logger.debug(f"Applied {len(changes)} history changes from other processes")
+
+    def _on_config_changed(self, config: ModelConfig, changed: List[str]):
+        """Open tabs for models added to the configuration"""
+        open_models = {self.widget(i).messages.model_name for i in range(self.count())}
+        for model_name in changed:
+            if model_name in config.models and model_name not in open_models:
+                self.create_model_tab(model_name)
+
+    def _on_tab_changed(self, tab, store, message):
+        """Record a new message for crash recovery and schedule an autosave"""
+        if message is None:
+            self._dirty_tabs.discard(tab.tab_id)
+            self.recovery.reset(tab.tab_id)
+            return
+        if self.autosaver is None:
+            return
+        self.recovery.record(tab.tab_id, store.model_name, store.session_name, len(store) - 1, message)
+        self._dirty_tabs.add(tab.tab_id)
+
+        # Debounce, but never hold changes back for more than a few intervals
+        now = time.monotonic()
+        if self._dirty_since is None:
+            self._dirty_since = now
+        if now - self._dirty_since < self.autosave_delay * 4 or not self.autosave_timer.isActive():
+            self.autosave_timer.start(int(self.autosave_delay * 1000))
+
+    def _on_autosaved(self, tab_id: str, session_name: str, count: int, ok: bool):
+        if not ok:
+            self.logger.error(f"Autosave failed for session {session_name}")
+            return
+        tab = self.find_tab(tab_id)
+        if tab is None or (len(tab.messages) == count and tab_id not in self._dirty_tabs):
+            self.recovery.reset(tab_id)
+        if tab is not None and tab.messages.session_name == session_name:
+            self.index_session(session_name, tab.messages)
+        self.logger.debug(f"Autosaved {count} messages of {session_name}")
+
+    def _index_tab_message(self, tab, store, message):
+        source = ("tab", tab.tab_id)
+        if message is None:
+            self.search_index.remove_source(source)
+        else:
+            self.search_index.add(source, len(store) - 1, message)
@@ -0,0 +1,26 @@
+from modules.chat_history import ChatHistory
+from modules.history_analytics import HistoryAnalytics
+
+
+def _conversation(count, length=10):
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": "x" * length, "timestamp": None}
+        for i in range(count)
+    ]
+
+
+def test_refresh_rebuilds_session_rewritten_and_extended(tmp_path):
+    history = ChatHistory(str(tmp_path / "history"), backend="sqlite")
+    try:
+        history.save_session("llama_20260101_000000", {"model": "llama"}, messages=_conversation(4))
+        analytics = HistoryAnalytics(history)
+        analytics.refresh()
+        assert analytics.summary()["characters"] == 40
+
+        # Longer messages throughout, and two more of them
+        history.save_session("llama_20260101_000000", {"model": "llama"}, messages=_conversation(6, length=20))
+        analytics.refresh()
+        assert analytics.summary()["characters"] == 120
+        assert HistoryAnalytics(history).summary()["characters"] == 120
+    finally:
+        history.close()
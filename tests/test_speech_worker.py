@@ -0,0 +1,59 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+from PyQt6.QtCore import Qt
+
+from modules import speech_module
+from modules.speech_module import SpeechWorker
+
+TEXT = " ".join(f"This is sentence number {i} of the reply." for i in range(6))
+
+
+class StubModel:
+    synthesizer = SimpleNamespace(output_sample_rate=22050)
+
+    def tts(self, sentence):
+        return [0.0] * 16
+
+
+@pytest.fixture
+def worker(monkeypatch, tmp_path):
+    monkeypatch.setattr(speech_module, "COQUI_TTS_AVAILABLE", True)
+    worker = SpeechWorker(str(tmp_path), pipelined=True, sentence_pause=0)
+    monkeypatch.setattr(worker, "_coqui_model", StubModel)
+    return worker
+
+
+def run_jobs(worker, *texts):
+    """Run queued jobs on a plain thread; returns {job id: error}, or None if the worker hung"""
+    finished = {}
+    worker.job_finished.connect(
+        lambda job_id, error: finished.__setitem__(job_id, error), Qt.ConnectionType.DirectConnection
+    )
+    for text in texts:
+        worker.submit(text, "Coqui TTS (Local AI)")
+    worker._jobs.put(None)
+    thread = threading.Thread(target=worker.run, daemon=True)
+    thread.start()
+    thread.join(10)
+    return None if thread.is_alive() else finished
+
+
+def test_playback_error_ends_the_job_while_synthesis_waits(worker, monkeypatch):
+    played = []
+
+    def play(job_id, audio, sample_rate, index):
+        if job_id == 1:
+            # Synthesis is already blocked on the full ready queue by now
+            raise RuntimeError("audio device lost")
+        played.append(index)
+
+    monkeypatch.setattr(worker, "_play_audio", play)
+
+    finished = run_jobs(worker, TEXT, TEXT)
+
+    assert finished is not None, "speech worker hung after a playback error"
+    assert "audio device lost" in finished[1]
+    assert finished[2] == ""
+    assert played == list(range(len(speech_module.split_sentences(TEXT))))
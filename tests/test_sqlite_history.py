@@ -0,0 +1,114 @@
+import pytest
+
+from modules.chat_history import ChatHistory
+from modules.message_store import MessageStore
+from modules.session_pager import PagedMessages
+
+
+def _conversation(count):
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i}", "timestamp": None}
+        for i in range(count)
+    ]
+
+
+def _history(tmp_path):
+    history = ChatHistory(str(tmp_path / "history"), backend="sqlite")
+    history.save_session("llama_20260101_000000", {"model": "llama"}, messages=_conversation(10))
+    return history
+
+
+def test_reopened_session_keeps_saved_messages(tmp_path):
+    history = _history(tmp_path)
+    try:
+        store = MessageStore("llama", base=history.open_paged("llama_20260101_000000"))
+        store.add_message("user", "message 10")
+        history.save_session("llama_20260101_000000", {"model": "llama"}, messages=store.snapshot())
+
+        messages = history.read_session("llama_20260101_000000")["messages"]
+        assert [m["content"] for m in messages] == [f"message {i}" for i in range(11)]
+    finally:
+        history.close()
+
+
+def test_rewritten_session_reads_paged_messages_before_replacing_them(tmp_path):
+    history = _history(tmp_path)
+    try:
+        paged = history.open_paged("llama_20260101_000000")
+
+        def fetch(start, end):
+            # Edit the first message so the saved rows no longer form a prefix
+            messages = paged.get_range(start, end)
+            return [dict(m, content="edited") if start + i == 0 else m for i, m in enumerate(messages)]
+
+        history.save_session("llama_20260101_000000", {"model": "llama"}, messages=PagedMessages(10, fetch))
+
+        messages = history.read_session("llama_20260101_000000")["messages"]
+        assert [m["content"] for m in messages] == ["edited"] + [f"message {i}" for i in range(1, 10)]
+    finally:
+        history.close()
+
+
+def test_rewritten_middle_of_session_replaces_stored_messages(tmp_path):
+    history = _history(tmp_path)
+    try:
+        messages = _conversation(11)
+        messages[5] = dict(messages[5], content="rewritten")
+        history.save_session("llama_20260101_000000", {"model": "llama"}, messages=messages)
+
+        saved = history.read_session("llama_20260101_000000")["messages"]
+        assert [m["content"] for m in saved] == [m["content"] for m in messages]
+    finally:
+        history.close()
+
+
+def test_import_includes_journaled_messages(tmp_path):
+    storage = str(tmp_path / "history")
+    json_history = ChatHistory(storage)
+    json_history.save_session("llama_20260101_000000", {"model": "llama"}, messages=_conversation(2))
+    json_history.save_session("llama_20260101_000000", {"model": "llama"}, messages=_conversation(3))
+    assert (tmp_path / "history" / "chat_llama_20260101_000000.journal").exists()
+    json_history.close()
+
+    history = ChatHistory(storage, backend="sqlite")
+    try:
+        assert history.import_json_sessions() == 1
+        messages = history.read_session("llama_20260101_000000")["messages"]
+        assert [m["content"] for m in messages] == [f"message {i}" for i in range(3)]
+    finally:
+        history.close()
+
+
+def test_rewritten_middle_of_session_is_reindexed_for_search(tmp_path):
+    history = _history(tmp_path)
+    if history.search is None:
+        history.close()
+        pytest.skip("SQLite was built without FTS5")
+    try:
+        messages = _conversation(11)
+        messages[5] = dict(messages[5], content="rewritten")
+        history.save_session("llama_20260101_000000", {"model": "llama"}, messages=messages)
+
+        assert [hit.message_index for hit in history.search.search("rewritten")] == [5]
+        assert [hit.message_index for hit in history.search.search('"message 5"')] == []
+    finally:
+        history.close()
+
+
+def test_import_includes_archived_sessions(tmp_path):
+    storage = str(tmp_path / "history")
+    json_history = ChatHistory(storage)
+    json_history.save_session("llama_20250101_000000", {"model": "llama"}, messages=_conversation(4))
+    json_history.wait_for_compaction()
+    assert json_history.archive_old_sessions(max_age_days=1e-9)["sessions"] == 1
+    json_history.close()
+
+    history = ChatHistory(storage, backend="sqlite")
+    try:
+        assert history.import_json_sessions() == 1
+        assert [session["name"] for session in history.list_sessions()] == ["llama_20250101_000000"]
+        data = history.read_session("llama_20250101_000000")
+        assert [m["content"] for m in data["messages"]] == [f"message {i}" for i in range(4)]
+        assert data["metadata"]["archived_at"]
+    finally:
+        history.close()
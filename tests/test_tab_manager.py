@@ -0,0 +1,45 @@
+import os
+import time
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication  # noqa: E402
+
+from modules.chat_history import ChatHistory  # noqa: E402
+from modules.tab_manager import TabManager  # noqa: E402
+
+app = QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def tab_manager(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    history = ChatHistory(str(tmp_path / "history"))
+    # Without FTS5, saved sessions are searched through the in-memory index
+    history.search = None
+    manager = TabManager(chat_history=history)
+    yield manager
+    manager.shutdown_autosave()
+    history.close()
+    manager.deleteLater()
+    app.processEvents()
+
+
+def test_autosave_indexes_tab_messages_in_memory(tab_manager):
+    assert tab_manager.autosaver is not None, "autosave is disabled in the settings"
+    tab = tab_manager.create_model_tab("llama")
+    tab.messages.session_name = "llama_20260101_000000"
+    tab.messages.add_message("user", "where is the lighthouse")
+    tab.messages.add_message("assistant", "on the northern cliff")
+
+    source = ("session", "llama_20260101_000000")
+    tab_manager.autosave_dirty_tabs()
+    deadline = time.monotonic() + 5
+    while tab_manager.search_index.source_size(source) < 2 and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+
+    assert tab_manager.search_index.source_size(source) == 2
+    assert source in {result.source for result in tab_manager.search_index.search("lighthouse")}